@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scopa.game.headlessgame import HeadlessScopaGame
+from scopa.player import ScopaPlayer
+from scopa.strategy import MOVE_CACHE, ScopaStrategy
+
+
+class TurnAllocationMeter:
+
+    # Measures each turn, from begin_player_turn_event to post_move_event, with tracemalloc: the peak memory
+    # allocated on top of what was live when the turn began, and how much of it was still live when the turn ended
+    def __init__(self):
+        self.peaks = []
+        self.retained = []
+        self.__turn_start = 0
+
+    def begin_turn(self, player: ScopaPlayer):
+        tracemalloc.reset_peak()
+        self.__turn_start = tracemalloc.get_traced_memory()[0]
+
+    def end_turn(self, player: ScopaPlayer):
+        current, peak = tracemalloc.get_traced_memory()
+        self.peaks.append(peak - self.__turn_start)
+        self.retained.append(current - self.__turn_start)
+
+
+def measure_turn_allocations(num_games: int = 20, num_players: int = 2, seed: int = 0) -> TurnAllocationMeter:
+    MOVE_CACHE.disable()
+    meter = TurnAllocationMeter()
+    tracemalloc.start()
+    try:
+        for game_seed in range(seed, seed + num_games):
+            players = [ScopaPlayer(f'Player {seat + 1}', strategy=ScopaStrategy.DEFAULT, show_hand=False)
+                       for seat in range(num_players)]
+            game = HeadlessScopaGame(players=players, seed=game_seed)
+            game.begin_player_turn_event = meter.begin_turn
+            game.post_move_event = meter.end_turn
+            game.start_game()
+    finally:
+        tracemalloc.stop()
+    return meter
+
+
+def main(args):
+    meter = measure_turn_allocations(args.games, args.players, args.seed)
+    peaks = sorted(meter.peaks)
+    print(f'{len(peaks)} AI turns over {args.games} games')
+    print(f'peak bytes allocated per turn: mean {sum(peaks) / len(peaks):.0f}, p50 {peaks[len(peaks) // 2]}, '
+          f'p99 {peaks[min(int(0.99 * len(peaks)), len(peaks) - 1)]}, max {peaks[-1]}')
+    print(f'bytes still live after a turn: mean {sum(meter.retained) / len(meter.retained):.1f}')
+    if args.budget is not None and sum(peaks) / len(peaks) > args.budget:
+        print(f'Mean peak allocation per turn is over the budget of {args.budget} bytes')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure memory allocated by each turn of headless games')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=int, help='fail if the mean peak bytes per turn exceeds this')
+    main(parser.parse_args())
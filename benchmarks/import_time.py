@@ -0,0 +1,23 @@
+import argparse
+import os
+import sys
+
+# The budgets and the check itself live in the test suite (tests/test_import_time.py); this script only reports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+from test_import_time import FORBIDDEN_MODULES, IMPORT_BUDGETS_MS, measure_import
+
+
+def report_import_times(repeats: int = 5):
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        measurements = [measure_import(module) for _ in range(repeats)]
+        elapsed = min(elapsed for elapsed, _ in measurements)
+        forbidden = sorted(name for name in measurements[0][1] if name.split('.')[0] in FORBIDDEN_MODULES)
+        note = f'  imports {", ".join(forbidden)}' if forbidden else ''
+        print(f'{module:28} {elapsed:8.2f} ms (budget {budget:.0f} ms){note}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report how long the headless entry points take to import')
+    parser.add_argument('--repeats', type=int, default=5)
+    report_import_times(parser.parse_args().repeats)
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scopa import moveparser
+from scopa.cards import ALL_CARDS
+from scopa.game.headlessgame import HeadlessScopaGame
+from scopa.player import ScopaPlayer
+from scopa.simulation import simulate_games
+from scopa.strategy import MOVE_CACHE, ScopaStrategy, get_all_valid_moves
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+BOARD_SIZES = range(0, 15)
+HEADLESS_PLAYER_COUNTS = (2, 3, 4)
+POSITIONS_PER_SIZE = 50
+
+__BENCHMARKS = {}
+
+
+def benchmark(name: str, ops_per_call: int = 1):
+    def register(function):
+        __BENCHMARKS[name] = (function, ops_per_call)
+        return function
+    return register
+
+
+def random_positions(board_size: int, count: int = POSITIONS_PER_SIZE, hand_size: int = 3, seed: int = 0):
+    rng = random.Random(seed * 100 + board_size)
+    positions = []
+    for _ in range(count):
+        cards = rng.sample(ALL_CARDS, board_size + hand_size)
+        positions.append((cards[hand_size:], cards[:hand_size]))
+    return positions
+
+
+def __register_move_generation(board_size: int):
+    positions = random_positions(board_size)
+
+    @benchmark(f'get_all_valid_moves[board={board_size}]', ops_per_call=len(positions))
+    def run():
+        for board, hand in positions:
+            get_all_valid_moves(board, hand)
+
+
+def __register_make_move(board_size: int):
+    positions = random_positions(board_size)
+    strategy = ScopaStrategy(ScopaStrategy.DEFAULT)
+
+    @benchmark(f'make_move[board={board_size}]', ops_per_call=len(positions))
+    def run():
+        for board, hand in positions:
+            strategy.make_move(board, hand)
+
+
+for __board_size in BOARD_SIZES:
+    __register_move_generation(__board_size)
+    __register_make_move(__board_size)
+
+
+def __full_capture_game(num_players: int) -> tuple[HeadlessScopaGame, dict]:
+    players = [ScopaPlayer(f'Player {seat + 1}') for seat in range(num_players)]
+    for index, card in enumerate(random.Random(num_players).sample(ALL_CARDS, len(ALL_CARDS))):
+        players[index % num_players].capture_card(card)
+    return HeadlessScopaGame(players=players), {player: 0 for player in players}
+
+
+def __register_update_scores(num_players: int):
+    game, scores = __full_capture_game(num_players)
+
+    @benchmark(f'update_scores[players={num_players}]', ops_per_call=100)
+    def run():
+        for _ in range(100):
+            game._ScopaGame__update_scores(scores)
+        game.hand_scores.clear()
+
+
+for __num_players in HEADLESS_PLAYER_COUNTS:
+    __register_update_scores(__num_players)
+
+
+__MOVE_STRINGS = ['t,7co,3cu,4sw', 'd,kcl', 'T,ACU,ASW', 't,qs,2co,3cl,4cu', 'D,5Co', 't,jcl,jco']
+
+
+@benchmark('parse_move', ops_per_call=len(__MOVE_STRINGS) * 100)
+def parse_move():
+    for _ in range(100):
+        for move_str in __MOVE_STRINGS:
+            moveparser.parse_move(move_str)
+
+
+def game_log_moves(num_games: int = 50) -> list:
+    # Moves in the order real games make them, which is how move logs repeat them
+    moves = []
+    for seed in range(num_games):
+        game = HeadlessScopaGame(players=[ScopaPlayer('Player 1'), ScopaPlayer('Player 2')], seed=seed)
+        game.move_made_event = moves.append
+        game.start_game()
+    return moves
+
+
+__GAME_LOG_MOVES = game_log_moves()
+__GAME_LOG_LINES = list(moveparser.format_moves(__GAME_LOG_MOVES))
+
+
+@benchmark('parse_moves[game_log]', ops_per_call=len(__GAME_LOG_LINES))
+def parse_moves():
+    for _ in moveparser.parse_moves(__GAME_LOG_LINES):
+        pass
+
+
+@benchmark('format_moves[game_log]', ops_per_call=len(__GAME_LOG_MOVES))
+def format_moves():
+    for _ in moveparser.format_moves(__GAME_LOG_MOVES):
+        pass
+
+
+def __register_headless(num_players: int):
+    @benchmark(f'headless_games[players={num_players}]', ops_per_call=10)
+    def run():
+        simulate_games(10, [ScopaStrategy.DEFAULT] * num_players, seed=0, keep_games=False)
+
+
+for __num_players in HEADLESS_PLAYER_COUNTS:
+    __register_headless(__num_players)
+
+
+def run_benchmarks(name_filter: str = None, min_time: float = 0.2, repeats: int = 5) -> dict:
+    MOVE_CACHE.disable()
+    results = {}
+    for name, (function, ops_per_call) in __BENCHMARKS.items():
+        if name_filter and name_filter not in name:
+            continue
+
+        # Calibrate how many calls fill min_time, then keep the fastest of several repeats
+        function()
+        calls = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(calls):
+                function()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            calls *= 2
+
+        best = elapsed
+        for _ in range(repeats - 1):
+            start = time.perf_counter()
+            for _ in range(calls):
+                function()
+            best = min(best, time.perf_counter() - start)
+
+        seconds_per_op = best / (calls * ops_per_call)
+        results[name] = {'seconds_per_op': seconds_per_op, 'ops_per_second': 1 / seconds_per_op}
+        print(f'{name:40} {seconds_per_op * 1e6:12.2f} us/op {1 / seconds_per_op:14.1f} ops/s')
+
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'benchmarks': results}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        baseline_result = baseline['benchmarks'].get(name)
+        if baseline_result is None:
+            continue
+        ratio = result['seconds_per_op'] / baseline_result['seconds_per_op']
+        status = 'REGRESSION' if ratio > 1 + threshold else 'faster' if ratio < 1 - threshold else 'ok'
+        print(f'{name:40} {ratio:8.2f}x baseline  {status}')
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(args):
+    results = run_benchmarks(name_filter=args.filter, min_time=args.min_time, repeats=args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f'{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: '
+                  f'{", ".join(regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Scopa engine hot paths')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH,
+                        help='compare against a baseline JSON file (defaults to the committed baseline)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='slowdown relative to the baseline that counts as a regression')
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this string')
+    parser.add_argument('--min-time', type=float, default=0.2)
+    parser.add_argument('--repeats', type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,35 @@
+import argparse
+import importlib
+import sys
+
+# A subcommand's module is only imported once that subcommand has been chosen, so headless commands never load Tk (or
+# anything else they do not use) and short-lived worker processes start quickly
+SUBCOMMANDS = {
+    'play': ('scopa.main', 'play a game against the computer'),
+    'simulate': ('scopa.simulation', 'play headless games between strategies'),
+    'tournament': ('scopa.tournament', 'play every matchup of a set of strategies'),
+    'tune': ('scopa.tuning', 'tune strategy weights by self-play and write a weight profile'),
+    'compare': ('scopa.comparison', 'play two strategies until a sequential test tells them apart'),
+    'build-policy': ('scopa.policytable', 'precompute DEFAULT moves for opening positions into a table file'),
+    'serve': ('scopa.server', 'host Scopa tables over TCP'),
+    'loadtest': ('scopa.loadtest', 'load test a running server'),
+}
+
+
+def main(argv: list[str] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog='scopa', formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog='commands:\n' + '\n'.join(f'  {command:14}{description}' for command,
+                                                                      (_, description) in SUBCOMMANDS.items()))
+    parser.add_argument('command', choices=SUBCOMMANDS, metavar='command')
+    command = parser.parse_args(argv[:1]).command
+
+    module_name, description = SUBCOMMANDS[command]
+    module = importlib.import_module(module_name)
+    command_parser = argparse.ArgumentParser(prog=f'scopa {command}', description=description)
+    module.add_arguments(command_parser)
+    module.main(command_parser.parse_args(argv[1:]))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from enum import IntEnum, Enum
+from typing import Iterator, Sequence
 import random
 
 
@@ -42,6 +43,8 @@ def get_prime_points(rank: ScopaCardRank) -> int:
 
 class ScopaCard:
 
+    __slots__ = ('__rank', '__suit', '__index', '__bit')
+
     __rank_strs = {
         ScopaCardRank.ACE: 'A',
         ScopaCardRank.TWO: '2',
@@ -62,9 +65,21 @@ class ScopaCard:
         ScopaCardSuit.SWORDS: '\u2694'
     }
 
-    def __init__(self, rank: ScopaCardRank, suit: ScopaCardSuit):
-        self.__rank = rank
-        self.__suit = suit
+    __suit_indices = {suit: index for index, suit in enumerate(ScopaCardSuit)}
+
+    # Every (rank, suit) pair maps to a single shared instance
+    __interned = {}
+
+    def __new__(cls, rank: ScopaCardRank, suit: ScopaCardSuit):
+        card = ScopaCard.__interned.get((rank, suit))
+        if card is None:
+            card = super().__new__(cls)
+            card.__rank = rank
+            card.__suit = suit
+            card.__index = (rank - 1) * len(ScopaCard.__suit_indices) + ScopaCard.__suit_indices[suit]
+            card.__bit = 1 << card.__index
+            ScopaCard.__interned[(rank, suit)] = card
+        return card
 
     def rank(self) -> ScopaCardRank:
         return self.__rank
@@ -72,33 +87,145 @@ class ScopaCard:
     def suit(self) -> ScopaCardSuit:
         return self.__suit
 
+    def index(self) -> int:
+        return self.__index
+
+    def bit(self) -> int:
+        return self.__bit
+
     def __str__(self):
         return f'{ScopaCard.__rank_strs[self.__rank]}{ScopaCard.__suit_strs[self.__suit]}'
 
     def __eq__(self, other_card):
-        return self.__suit == other_card.__suit and self.__rank == other_card.__rank
+        return self is other_card or (self.__suit == other_card.__suit and self.__rank == other_card.__rank)
 
     def __hash__(self):
-        return hash((self.__rank, self.__suit))
+        return self.__index
+
+    def __reduce__(self):
+        return ScopaCard, (self.__rank, self.__suit)
+
+
+ALL_CARDS: tuple[ScopaCard, ...] = tuple(ScopaCard(rank, suit) for rank in ScopaCardRank for suit in ScopaCardSuit)
+FULL_DECK_MASK = (1 << len(ALL_CARDS)) - 1
+
+SUIT_MASKS = {suit: sum(card.bit() for card in ALL_CARDS if card.suit() == suit) for suit in ScopaCardSuit}
+RANK_MASKS = {rank: sum(card.bit() for card in ALL_CARDS if card.rank() == rank) for rank in ScopaCardRank}
+COINS_MASK = SUIT_MASKS[ScopaCardSuit.COINS]
+SEVEN_OF_COINS = ScopaCard(ScopaCardRank.SEVEN, ScopaCardSuit.COINS)
+
+# Ranks of each card, indexed by card index, for loops that only have bit positions
+CARD_RANKS: tuple[int, ...] = tuple(int(card.rank()) for card in ALL_CARDS)
+CARD_PRIMES: tuple[int, ...] = tuple(__PRIME_POINTS[card.rank()] for card in ALL_CARDS)
+
+# Cards of each suit ordered from most to fewest prime points
+__SUIT_PRIME_ORDER = tuple(
+    tuple(sorted((card for card in ALL_CARDS if card.suit() == suit), key=lambda c: -__PRIME_POINTS[c.rank()]))
+    for suit in ScopaCardSuit
+)
+
+
+# Rank masks ordered from most to fewest prime points
+__RANK_MASKS_BY_PRIME = tuple((RANK_MASKS[rank], __PRIME_POINTS[rank])
+                              for rank in sorted(ScopaCardRank, key=lambda r: -__PRIME_POINTS[r]))
+
+
+def card_from_index(index: int) -> ScopaCard:
+    return ALL_CARDS[index]
+
+
+def cards_to_mask(cards) -> int:
+    mask = 0
+    for card in cards:
+        mask |= card.bit()
+    return mask
+
+
+def mask_indices(mask: int) -> list[int]:
+    indices = []
+    while mask:
+        low_bit = mask & -mask
+        indices.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return indices
+
+
+def mask_to_cards(mask: int) -> list[ScopaCard]:
+    return [ALL_CARDS[index] for index in mask_indices(mask)]
+
+
+def mask_card_count(mask: int) -> int:
+    return mask.bit_count()
+
+
+def mask_coin_count(mask: int) -> int:
+    return (mask & COINS_MASK).bit_count()
+
+
+def mask_max_prime(mask: int) -> int:
+    for rank_mask, prime_points in __RANK_MASKS_BY_PRIME:
+        if mask & rank_mask:
+            return prime_points
+    return 0
+
+
+def mask_prime_sum(mask: int) -> int:
+    prime_sum = 0
+    for suit_cards in __SUIT_PRIME_ORDER:
+        for card in suit_cards:
+            if mask & card.bit():
+                prime_sum += __PRIME_POINTS[card.rank()]
+                break
+    return prime_sum
 
 
 class ScopaDeck:
 
-    def __init__(self):
-        self.__cards = [ScopaCard(rank, suit) for rank in ScopaCardRank for suit in ScopaCardSuit]
+    # The deck is a fixed permutation of the interned cards plus a cursor to the next card to draw. If an iterator
+    # of deals (sequences of card indices) is given, each shuffle loads the next deal instead of shuffling.
+    def __init__(self, deals: Iterator[Sequence[int]] = None):
+        self.__cards = list(ALL_CARDS)
+        self.__cursor = 0
+        self.__deals = deals
 
-    def shuffle(self):
-        random.shuffle(self.__cards)
+    def shuffle(self, rng: random.Random = None):
+        if self.__deals is not None:
+            self.set_order(next(self.__deals))
+            return
 
-    def draw_card(self) -> ScopaCard:
-        if self.__cards:
-            return self.__cards.pop(0)
+        if self.__cursor == 0:
+            (rng or random).shuffle(self.__cards)
+            return
 
-    def cards_left(self) -> bool:
-        return len(self.__cards) > 0
+        remaining = self.__cards[self.__cursor:]
+        (rng or random).shuffle(remaining)
+        self.__cards[self.__cursor:] = remaining
 
-    def refresh_deck(self):
-        self.__cards = [ScopaCard(rank, suit) for rank in ScopaCardRank for suit in ScopaCardSuit]
+    def set_order(self, card_indices: Sequence[int]):
+        if len(card_indices) != len(ALL_CARDS):
+            raise ValueError(f'A deal must order all {len(ALL_CARDS)} cards')
+        self.__cards = [ALL_CARDS[index] for index in card_indices]
+        self.__cursor = 0
 
+    def order(self) -> list[int]:
+        return [card.index() for card in self.__cards]
 
+    def has_deals(self) -> bool:
+        # Whether shuffles load deals from an iterator rather than shuffling with the game's random generator
+        return self.__deals is not None
+
+    def draw_card(self) -> ScopaCard:
+        if self.__cursor < len(self.__cards):
+            card = self.__cards[self.__cursor]
+            self.__cursor += 1
+            return card
 
+    def cards_left(self) -> bool:
+        return self.__cursor < len(self.__cards)
+
+    def num_cards_left(self) -> int:
+        return len(self.__cards) - self.__cursor
+
+    def refresh_deck(self):
+        self.__cards[:] = ALL_CARDS
+        self.__cursor = 0
@@ -0,0 +1,296 @@
+import argparse
+import json
+import math
+import os
+import time
+
+from scopa.scoring import ScopaHandScore
+from scopa.simulation import play_game
+from scopa.strategy import ScopaStrategy, load_weights_profile
+
+
+class ScopaComparisonStats:
+
+    # Running totals of a candidate strategy against a baseline. Games come in pairs on the same seed with the seats
+    # swapped, and each pair is one observation: the candidate's mean game score over the two games (1 for a win,
+    # 0.5 for a tie, 0 for a loss), and the candidate's category points minus the baseline's, per game. Pairs share
+    # their deals, so much of the luck of the cards cancels out within a pair.
+    def __init__(self):
+        self.pairs = 0
+        self.games = 0
+        self.wins = 0
+        self.losses = 0
+        self.ties = 0
+        self.score_sum = 0.0
+        self.score_square_sum = 0.0
+        self.category_points = {category: [0, 0] for category in ScopaHandScore.CATEGORIES}
+        self.category_difference_sums = {category: 0.0 for category in ScopaHandScore.CATEGORIES}
+        self.category_difference_square_sums = {category: 0.0 for category in ScopaHandScore.CATEGORIES}
+
+    def add_pair(self, games: list, candidate_seats: list[int]):
+        # games are ScopaGameResults of one seed, candidate_seats the candidate's seat in each
+        score = 0.0
+        differences = {category: 0 for category in ScopaHandScore.CATEGORIES}
+        for game, seat in zip(games, candidate_seats):
+            self.games += 1
+            if seat in game.winners:
+                if len(game.winners) == 1:
+                    self.wins += 1
+                    score += 1.0
+                else:
+                    self.ties += 1
+                    score += 0.5
+            else:
+                self.losses += 1
+            for hand in game.hands:
+                for category, winner, points in hand.awards():
+                    side = 0 if winner == seat else 1
+                    self.category_points[category][side] += points
+                    differences[category] += points if side == 0 else -points
+
+        score /= len(games)
+        self.pairs += 1
+        self.score_sum += score
+        self.score_square_sum += score * score
+        for category, difference in differences.items():
+            difference /= len(games)
+            self.category_difference_sums[category] += difference
+            self.category_difference_square_sums[category] += difference * difference
+
+    def merge(self, other: 'ScopaComparisonStats'):
+        self.pairs += other.pairs
+        self.games += other.games
+        self.wins += other.wins
+        self.losses += other.losses
+        self.ties += other.ties
+        self.score_sum += other.score_sum
+        self.score_square_sum += other.score_square_sum
+        for category in ScopaHandScore.CATEGORIES:
+            for side in range(2):
+                self.category_points[category][side] += other.category_points[category][side]
+            self.category_difference_sums[category] += other.category_difference_sums[category]
+            self.category_difference_square_sums[category] += other.category_difference_square_sums[category]
+
+    def score(self) -> float:
+        return self.score_sum / self.pairs if self.pairs else 0.5
+
+    def score_variance(self) -> float:
+        # Sample variance of the per-pair score
+        if self.pairs < 2:
+            return 0.0
+        mean = self.score()
+        return max(self.score_square_sum - self.pairs * mean * mean, 0.0) / (self.pairs - 1)
+
+    def score_interval(self, z: float = 1.96) -> tuple[float, float]:
+        half_width = z * math.sqrt(self.score_variance() / self.pairs) if self.pairs else 0.5
+        return self.score() - half_width, self.score() + half_width
+
+    def category_rates(self) -> dict[str, tuple[float, float]]:
+        # Points per game of (candidate, baseline) in each category
+        return {category: (candidate / self.games if self.games else 0.0, baseline / self.games if self.games else 0.0)
+                for category, (candidate, baseline) in self.category_points.items()}
+
+    def category_difference_interval(self, category: str, z: float = 1.96) -> tuple[float, float]:
+        # Confidence interval of the candidate's advantage in category points per game
+        if self.pairs < 2:
+            return -math.inf, math.inf
+        mean = self.category_difference_sums[category] / self.pairs
+        variance = max(self.category_difference_square_sums[category] - self.pairs * mean * mean, 0.0) \
+            / (self.pairs - 1)
+        half_width = z * math.sqrt(variance / self.pairs)
+        return mean - half_width, mean + half_width
+
+    def to_dict(self) -> dict:
+        return {
+            'pairs': self.pairs,
+            'games': self.games,
+            'wins': self.wins,
+            'losses': self.losses,
+            'ties': self.ties,
+            'score': self.score(),
+            'score_interval': list(self.score_interval()),
+            'category_rates': {category: list(rates) for category, rates in self.category_rates().items()},
+            'category_difference_intervals': {category: list(self.category_difference_interval(category))
+                                              for category in ScopaHandScore.CATEGORIES},
+        }
+
+
+class ScopaSequentialTest:
+
+    CONTINUE = 'continue'
+    BETTER = 'better'
+    WORSE = 'worse'
+    NEGLIGIBLE = 'negligible'
+
+    # Two sequential probability ratio tests on the candidate's pair score, with the usual normal approximation of
+    # the log-likelihood ratio from the sample mean and variance. One tests "equal" (score 0.5) against "better by
+    # delta", the other against "worse by delta". Either accepting its alternative ends the run with a significant
+    # difference; both accepting "equal" ends it with a difference shown to be smaller than delta. alpha is the
+    # false positive rate of each test, beta the rate of missing a real difference of delta.
+    # The variance is floored at MIN_SCORE_VARIANCE: strategies that play identically score exactly 0.5 on every pair,
+    # and a variance of 0 would leave both ratios undefined rather than accept "equal".
+    MIN_SCORE_VARIANCE = 0.01
+
+    def __init__(self, delta: float = 0.03, alpha: float = 0.05, beta: float = 0.05, min_pairs: int = 50):
+        if not 0 < delta < 0.5:
+            raise ValueError('delta must be between 0 and 0.5')
+        self.delta = delta
+        self.alpha = alpha
+        self.beta = beta
+        self.min_pairs = min_pairs
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+
+    def log_likelihood_ratios(self, stats: ScopaComparisonStats) -> tuple[float, float]:
+        # (better vs equal, worse vs equal)
+        variance = max(stats.score_variance(), ScopaSequentialTest.MIN_SCORE_VARIANCE)
+        return (ScopaSequentialTest.__log_likelihood_ratio(stats, 0.5, 0.5 + self.delta, variance),
+                ScopaSequentialTest.__log_likelihood_ratio(stats, 0.5, 0.5 - self.delta, variance))
+
+    def status(self, stats: ScopaComparisonStats) -> str:
+        if stats.pairs < self.min_pairs:
+            return ScopaSequentialTest.CONTINUE
+        better, worse = self.log_likelihood_ratios(stats)
+        if better >= self.upper_bound:
+            return ScopaSequentialTest.BETTER
+        if worse >= self.upper_bound:
+            return ScopaSequentialTest.WORSE
+        if better <= self.lower_bound and worse <= self.lower_bound:
+            return ScopaSequentialTest.NEGLIGIBLE
+        return ScopaSequentialTest.CONTINUE
+
+    @staticmethod
+    def __log_likelihood_ratio(stats: ScopaComparisonStats, score0: float, score1: float, variance: float) -> float:
+        return stats.pairs * (score1 - score0) * (2 * stats.score() - score0 - score1) / (2 * variance)
+
+
+class ScopaComparisonResult:
+
+    def __init__(self, candidate: str, baseline: str, stats: ScopaComparisonStats, status: str, elapsed: float):
+        self.candidate = candidate
+        self.baseline = baseline
+        self.stats = stats
+        self.status = status
+        self.elapsed = elapsed
+
+    def to_dict(self) -> dict:
+        return {'candidate': self.candidate, 'baseline': self.baseline, 'status': self.status,
+                'elapsed': self.elapsed, **self.stats.to_dict()}
+
+
+def play_pairs(candidate: ScopaStrategy, baseline: ScopaStrategy, seed_start: int, seed_stop: int,
+               game_options: dict = None) -> ScopaComparisonStats:
+    game_options = {} if game_options is None else game_options
+    stats = ScopaComparisonStats()
+    for seed in range(seed_start, seed_stop):
+        stats.add_pair([play_game([candidate, baseline], seed, **game_options),
+                        play_game([baseline, candidate], seed, **game_options)], [0, 1])
+    return stats
+
+
+def run_comparison(candidate: ScopaStrategy, baseline: ScopaStrategy, test: ScopaSequentialTest = None,
+                   max_games: int = 20000, seed: int = 0, workers: int = None, batch_pairs: int = 50,
+                   progress=None, **game_options) -> ScopaComparisonResult:
+    # Plays batches of seed pairs until the test stops or max_games is reached. Workers play batches ahead while
+    # the test looks at finished ones, always in seed order, so the result does not depend on the number of workers
+    # (at most workers - 1 batches are played past the stopping point and ignored).
+    test = ScopaSequentialTest() if test is None else test
+    max_pairs = max(max_games // 2, 1)
+    batches = [(batch_start, min(batch_start + batch_pairs, seed + max_pairs))
+               for batch_start in range(seed, seed + max_pairs, batch_pairs)]
+    stats = ScopaComparisonStats()
+    status = ScopaSequentialTest.CONTINUE
+    start = time.perf_counter()
+
+    if workers == 1:
+        for batch_start, batch_stop in batches:
+            stats.merge(play_pairs(candidate, baseline, batch_start, batch_stop, game_options))
+            status = test.status(stats)
+            if progress:
+                progress(stats, test)
+            if status != ScopaSequentialTest.CONTINUE:
+                break
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        max_in_flight = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=max_in_flight) as executor:
+            in_flight = []
+            next_batch = 0
+            while status == ScopaSequentialTest.CONTINUE and (in_flight or next_batch < len(batches)):
+                while next_batch < len(batches) and len(in_flight) < max_in_flight:
+                    batch_start, batch_stop = batches[next_batch]
+                    in_flight.append(executor.submit(play_pairs, candidate, baseline, batch_start, batch_stop,
+                                                     game_options))
+                    next_batch += 1
+                stats.merge(in_flight.pop(0).result())
+                status = test.status(stats)
+                if progress:
+                    progress(stats, test)
+            for future in in_flight:
+                future.cancel()
+
+    return ScopaComparisonResult(candidate.name(), baseline.name(), stats, status, time.perf_counter() - start)
+
+
+def __print_progress(stats: ScopaComparisonStats, test: ScopaSequentialTest):
+    low, high = stats.score_interval()
+    better, worse = test.log_likelihood_ratios(stats)
+    print(f'{stats.games} games: score {stats.score():.3f} [{low:.3f}, {high:.3f}], '
+          f'LLR better {better:+.2f} / worse {worse:+.2f} (bounds {test.lower_bound:.2f}, {test.upper_bound:.2f})')
+
+
+def __strategy(name: str, profile: str) -> ScopaStrategy:
+    return ScopaStrategy(name, weights=load_weights_profile(profile) if profile else None)
+
+
+def main(args):
+    candidate = __strategy(args.candidate, args.candidate_profile)
+    baseline = __strategy(args.baseline, args.baseline_profile)
+    test = ScopaSequentialTest(delta=args.delta, alpha=args.alpha, beta=args.beta, min_pairs=args.min_pairs)
+    try:
+        result = run_comparison(candidate, baseline, test, max_games=args.max_games, seed=args.seed,
+                                workers=args.workers, batch_pairs=args.batch_pairs,
+                                progress=__print_progress if args.progress else None,
+                                winning_score=args.winning_score)
+    finally:
+        candidate.close()
+        baseline.close()
+
+    stats = result.stats
+    low, high = stats.score_interval()
+    print(f'Played {stats.games} games in {result.elapsed:.2f}s: {result.status.upper()}')
+    print(f'Candidate {stats.wins} wins, {stats.losses} losses, {stats.ties} ties; '
+          f'score {stats.score():.3f} [{low:.3f}, {high:.3f}]')
+    for category, (candidate_rate, baseline_rate) in stats.category_rates().items():
+        low, high = stats.category_difference_interval(category)
+        print(f'  {category:15} {candidate_rate:.3f} vs {baseline_rate:.3f} points/game '
+              f'(difference [{low:+.3f}, {high:+.3f}])')
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(result.to_dict(), json_file, indent=2)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--candidate', default=ScopaStrategy.DEFAULT)
+    parser.add_argument('--candidate-profile', help='weight profile for the candidate')
+    parser.add_argument('--baseline', default=ScopaStrategy.DEFAULT)
+    parser.add_argument('--baseline-profile', help='weight profile for the baseline')
+    parser.add_argument('--delta', type=float, default=0.03,
+                        help='smallest difference in game score worth detecting (0.5 is an even match)')
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--min-pairs', type=int, default=50, help='seed pairs played before the test may stop')
+    parser.add_argument('--max-games', type=int, default=20000)
+    parser.add_argument('--batch-pairs', type=int, default=50, help='seed pairs per task sent to a worker')
+    parser.add_argument('--winning-score', type=int, default=11)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--progress', action='store_true', help='print the test after every batch')
+    parser.add_argument('--json', help='write results to this file')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,160 @@
+import json
+import os
+
+from scopa.game.basegame import ScopaGame
+from scopa.player import ScopaPlayer
+from scopa.scoring import ScopaHandScore
+from scopa.strategy import ScopaMove
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAX_PLAYERS = 4
+
+# One row per decision. Masks use the card bit indices from scopa.cards; captured_<seat> holds each seat's captures
+# before the move (seats are the game's initial player order); the outcome columns are for the deciding seat.
+DATASET_COLUMNS = {
+    'game_seed': 'uint64',
+    'hand_number': 'uint16',
+    'turn': 'uint16',
+    'seat': 'uint8',
+    'num_players': 'uint8',
+    'board_mask': 'uint64',
+    'hand_mask': 'uint64',
+    **{f'captured_{seat}': 'uint64' for seat in range(MAX_PLAYERS)},
+    'move_card': 'uint8',
+    'move_take_mask': 'uint64',
+    'hand_points': 'int8',
+    'hand_point_margin': 'int8',
+}
+
+
+class ScopaDatasetWriter:
+
+    # Appends columns to one raw little-endian file per column in a directory, so a dataset can grow across runs and
+    # be opened with np.memmap without loading it
+    def __init__(self, directory: str):
+        if np is None:
+            raise ImportError('numpy is required to write Scopa datasets')
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.__files = {column: open(os.path.join(directory, f'{column}.bin'), 'ab') for column in DATASET_COLUMNS}
+        with open(os.path.join(directory, 'dataset.json'), 'w') as metadata_file:
+            json.dump({'columns': DATASET_COLUMNS}, metadata_file, indent=2)
+
+    def write_rows(self, rows: dict[str, list]):
+        for column, dtype in DATASET_COLUMNS.items():
+            np.asarray(rows[column], dtype=np.dtype(dtype).newbyteorder('<')).tofile(self.__files[column])
+
+    def flush(self):
+        for column_file in self.__files.values():
+            column_file.flush()
+
+    def close(self):
+        for column_file in self.__files.values():
+            column_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Columns are appended one after another, so a run interrupted in the middle of write_rows leaves some of them longer
+# than others. Such a dataset is refused rather than read with rows from different decisions paired up.
+def open_dataset(directory: str) -> dict[str, 'np.memmap']:
+    if np is None:
+        raise ImportError('numpy is required to read Scopa datasets')
+    columns = {}
+    for column, dtype in DATASET_COLUMNS.items():
+        path = os.path.join(directory, f'{column}.bin')
+        dtype = np.dtype(dtype).newbyteorder('<')
+        num_rows, remainder = divmod(os.path.getsize(path), dtype.itemsize)
+        if remainder:
+            raise ValueError(f'{path} ends with a partly written row')
+        columns[column] = np.memmap(path, dtype=dtype, mode='r', shape=(num_rows,)) if num_rows else \
+            np.zeros(0, dtype=dtype)
+    row_counts = {column: len(values) for column, values in columns.items()}
+    if len(set(row_counts.values())) > 1:
+        raise ValueError(f'Columns of the dataset in {directory} have different row counts {row_counts}, '
+                         f'probably from an interrupted write')
+    return columns
+
+
+class ScopaDatasetRecorder:
+
+    __RECORDED_EVENTS = ('new_deck_event', 'begin_player_turn_event', 'move_made_event', 'hand_scored_event')
+
+    # Collects one row per decision from a game's event hooks (wrapped on the instance, like ScopaGameRecorder) and
+    # writes each hand's rows once the hand has been scored and its outcome is known
+    def __init__(self, game: ScopaGame, writer: ScopaDatasetWriter):
+        self.game = game
+        self.writer = writer
+        self.__seats = None
+        self.__hand_number = -1
+        self.__rows = None
+        self.__pending = None
+
+    def attach(self) -> 'ScopaDatasetRecorder':
+        for event in ScopaDatasetRecorder.__RECORDED_EVENTS:
+            original = getattr(self.game, event)
+            recorder = getattr(self, f'_ScopaDatasetRecorder__{event}')
+            setattr(self.game, event, ScopaDatasetRecorder.__wrap(original, recorder))
+        return self
+
+    def detach(self):
+        for event in ScopaDatasetRecorder.__RECORDED_EVENTS:
+            delattr(self.game, event)
+
+    @staticmethod
+    def __wrap(original, recorder):
+        def recorded(*args):
+            recorder(*args)
+            original(*args)
+        return recorded
+
+    def __new_deck_event(self, scores: dict[ScopaPlayer, int]):
+        if self.__seats is None:
+            if len(self.game.players) > MAX_PLAYERS:
+                raise ValueError(f'Datasets support at most {MAX_PLAYERS} players')
+            self.__seats = {player: seat for seat, player in enumerate(self.game.players)}
+        self.__hand_number += 1
+        self.__rows = {column: [] for column in DATASET_COLUMNS}
+
+    def __begin_player_turn_event(self, player: ScopaPlayer):
+        captured = [0] * MAX_PLAYERS
+        for other, seat in self.__seats.items():
+            captured[seat] = other.get_captured_mask()
+        self.__pending = (self.__seats[player], self.game.board_mask, player.get_hand_mask(), captured)
+
+    def __move_made_event(self, move: ScopaMove):
+        seat, board_mask, hand_mask, captured = self.__pending
+        rows = self.__rows
+        rows['game_seed'].append(self.game.seed or 0)
+        rows['hand_number'].append(self.__hand_number)
+        rows['turn'].append(len(rows['turn']))
+        rows['seat'].append(seat)
+        rows['num_players'].append(len(self.__seats))
+        rows['board_mask'].append(board_mask)
+        rows['hand_mask'].append(hand_mask)
+        for captured_seat, captured_mask in enumerate(captured):
+            rows[f'captured_{captured_seat}'].append(captured_mask)
+        move_card, move_take_mask = move.masks()
+        rows['move_card'].append(move_card)
+        rows['move_take_mask'].append(move_take_mask)
+
+    def __hand_scored_event(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        points = hand_score.points()
+        seat_points = [0] * len(self.__seats)
+        for player, seat in self.__seats.items():
+            seat_points[seat] = points[player]
+        margins = [total - max(p for other, p in enumerate(seat_points) if other != seat)
+                   for seat, total in enumerate(seat_points)]
+
+        rows = self.__rows
+        rows['hand_points'] = [seat_points[seat] for seat in rows['seat']]
+        rows['hand_point_margin'] = [margins[seat] for seat in rows['seat']]
+        self.writer.write_rows(rows)
@@ -0,0 +1,33 @@
+from typing import Iterator
+
+from scopa.cards import ALL_CARDS
+
+
+def generate_deals(num_deals: int, seed: int = None) -> 'np.ndarray':
+    # (num_deals, 40) uint8 array; each row is a shuffled deck of card indices
+    np = __numpy()
+    rng = np.random.default_rng(seed)
+    ordered = np.tile(np.arange(len(ALL_CARDS), dtype=np.uint8), (num_deals, 1))
+    return rng.permuted(ordered, axis=1, out=ordered)
+
+
+def iter_deals(seed: int = None, batch_size: int = 16) -> Iterator[list[int]]:
+    # Endless stream of deals for ScopaDeck, generated batch_size at a time from one seeded generator
+    np = __numpy()
+    return __deal_stream(np, np.random.default_rng(seed), batch_size)
+
+
+def __deal_stream(np, rng: 'np.random.Generator', batch_size: int) -> Iterator[list[int]]:
+    ordered = np.arange(len(ALL_CARDS), dtype=np.uint8)
+    while True:
+        batch = np.tile(ordered, (batch_size, 1))
+        yield from rng.permuted(batch, axis=1, out=batch).tolist()
+
+
+def __numpy():
+    # Importing numpy takes longer than the rest of the package, so it is only loaded once deals are batched
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('numpy is required to generate batches of deals') from None
+    return numpy
@@ -0,0 +1,149 @@
+import random
+import time
+
+from scopa.cards import CARD_PRIMES, SEVEN_OF_COINS
+from scopa.engine import ScopaObservation, ScopaState
+
+
+class ScopaEndgameStats:
+
+    def __init__(self):
+        self.nodes = 0
+        self.table_lookups = 0
+        self.table_hits = 0
+        self.elapsed = 0.0
+
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def table_hit_rate(self) -> float:
+        return self.table_hits / self.table_lookups if self.table_lookups else 0.0
+
+    def to_dict(self) -> dict:
+        return {'nodes': self.nodes, 'elapsed': self.elapsed, 'nodes_per_second': self.nodes_per_second(),
+                'table_lookups': self.table_lookups, 'table_hits': self.table_hits,
+                'table_hit_rate': self.table_hit_rate()}
+
+
+class ScopaEndgameSolver:
+
+    __EXACT = 0
+    __LOWER_BOUND = 1
+    __UPPER_BOUND = 2
+
+    # Once the deck is empty every unseen card is in an opponent's hand, so the rest of the hand is a perfect
+    # information game. It is searched with alpha-beta (paranoid: seat 0 maximizes its hand points minus the best
+    # opponent's, every opponent minimizes that) on a single state that moves are applied to and undone on, with a
+    # transposition table keyed by its Zobrist hash. With two or more opponents still holding cards only the union of
+    # their hands is known, so root moves are averaged over up to max_deals deals of it.
+    def __init__(self, max_deals: int = 16, max_table_size: int = 1_000_000, seed: int = None):
+        self.max_deals = max_deals
+        self.max_table_size = max_table_size
+        self.rng = random.Random(seed)
+        self.table = {}
+        self.stats = ScopaEndgameStats()
+
+    def choose_move(self, observation: ScopaObservation) -> tuple[int, int]:
+        if observation.cards_in_deck:
+            raise ValueError('The endgame solver needs an empty deck')
+
+        start = time.perf_counter()
+        if len(self.table) > self.max_table_size:
+            self.table.clear()
+
+        holders = sum(1 for hand_count in observation.hand_counts[1:] if hand_count)
+        num_deals = 1 if holders <= 1 else self.max_deals
+        root_values = {}
+        root_moves = None
+        for _ in range(num_deals):
+            state = ScopaState.determinize(observation, self.rng)
+            if root_moves is None:
+                root_moves = state.legal_moves()
+                if len(root_moves) == 1:
+                    break
+            for move in root_moves:
+                state.apply(move)
+                root_values[move] = root_values.get(move, 0) + self.__alpha_beta(state, -1000, 1000)
+                state.undo()
+
+        self.stats.elapsed += time.perf_counter() - start
+        return max(root_moves, key=lambda move: root_values.get(move, 0))
+
+    def solve(self, state: ScopaState) -> tuple[int, tuple[int, int]]:
+        # Value and best move for seat 0 in a fully known position with an empty deck
+        start = time.perf_counter()
+        best_value, best_move = None, None
+        for move in self.__ordered_moves(state, None):
+            state.apply(move)
+            value = self.__alpha_beta(state, -1000, 1000)
+            state.undo()
+            if best_value is None or (value > best_value if state.to_move == 0 else value < best_value):
+                best_value, best_move = value, move
+        self.stats.elapsed += time.perf_counter() - start
+        return best_value, best_move
+
+    def __alpha_beta(self, state: ScopaState, alpha: int, beta: int) -> int:
+        self.stats.nodes += 1
+        if state.is_over():
+            points = state.hand_points()
+            return points[0] - max(points[1:])
+
+        self.stats.table_lookups += 1
+        entry = self.table.get(state.hash)
+        table_move = None
+        if entry is not None:
+            self.stats.table_hits += 1
+            value, bound, table_move = entry
+            if bound == ScopaEndgameSolver.__EXACT:
+                return value
+            if bound == ScopaEndgameSolver.__LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        original_alpha, original_beta = alpha, beta
+        maximizing = state.to_move == 0
+        best_value = -1000 if maximizing else 1000
+        best_move = None
+        for move in self.__ordered_moves(state, table_move):
+            state.apply(move)
+            value = self.__alpha_beta(state, alpha, beta)
+            state.undo()
+            if maximizing:
+                if value > best_value:
+                    best_value, best_move = value, move
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_move = value, move
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = ScopaEndgameSolver.__UPPER_BOUND
+        elif best_value >= original_beta:
+            bound = ScopaEndgameSolver.__LOWER_BOUND
+        else:
+            bound = ScopaEndgameSolver.__EXACT
+        self.table[state.hash] = (best_value, bound, best_move)
+        return best_value
+
+    @staticmethod
+    def __ordered_moves(state: ScopaState, table_move: tuple[int, int]) -> list[tuple[int, int]]:
+        # Table move first, then scopas, takes of the seven of coins and bigger takes, then discards of low primes
+        board = state.board
+        seven_of_coins_bit = SEVEN_OF_COINS.bit()
+
+        def priority(move: tuple[int, int]) -> int:
+            hand_index, take_mask = move
+            if move == table_move:
+                return -1000
+            if not take_mask:
+                return CARD_PRIMES[hand_index]
+            taken = take_mask | (1 << hand_index)
+            return -(100 * (take_mask == board) + 50 * bool(taken & seven_of_coins_bit) + take_mask.bit_count())
+
+        return sorted(state.legal_moves(), key=priority)
@@ -0,0 +1,284 @@
+import random
+
+from scopa.cards import ALL_CARDS, COINS_MASK, FULL_DECK_MASK, SEVEN_OF_COINS, mask_indices, mask_prime_sum
+from scopa.strategy import get_all_valid_move_masks
+
+
+class ScopaObservation:
+
+    # What one player can see at their turn. Seats are relative to the observing player (seat 0) and follow turn
+    # order; lead is the seat that played first in the current deal.
+    def __init__(self, board_mask: int, hand_mask: int, captured: tuple[int, ...], scopas: tuple[int, ...],
+                 hand_counts: tuple[int, ...], lead: int, cards_in_deck: int, hand_size: int, last_taker: int = -1):
+        self.board_mask = board_mask
+        self.hand_mask = hand_mask
+        self.captured = captured
+        self.scopas = scopas
+        self.hand_counts = hand_counts
+        self.lead = lead
+        self.cards_in_deck = cards_in_deck
+        self.hand_size = hand_size
+        self.last_taker = last_taker
+
+    def num_players(self) -> int:
+        return len(self.captured)
+
+    def unseen_mask(self) -> int:
+        # Captures are taken face up, so the only hidden cards are opponents' hands and the deck
+        unseen = FULL_DECK_MASK & ~self.board_mask & ~self.hand_mask
+        for captured in self.captured:
+            unseen &= ~captured
+        return unseen
+
+
+class ScopaState:
+
+    # Mask-based model of one hand of Scopa following the ScopaGame rules, cheap enough to copy and play out
+    # thousands of times per decision. Seats are in turn order; the deck is a tuple of card indices drawn from
+    # deck_position onwards; last_taker is the seat that captured last, or -1. Search walks a single state with
+    # apply and undo instead of copying it at every node, and looks positions up by their Zobrist hash.
+    __slots__ = ('board', 'hands', 'captures', 'scopas', 'deck', 'deck_position', 'to_move', 'lead', 'hand_size',
+                 'last_taker', 'hash', '__history')
+
+    # Zobrist keys: a random 64-bit number for every card in every place it can be (the board, a seat's hand or a
+    # seat's captures) and for every value of the other fields. A state's hash is the XOR of the keys of everything
+    # in it, so a move updates it by XORing out what it changes and XORing in the result. Tables that depend on the
+    # seat are flat, indexed by seat * len(ALL_CARDS) + card index (or + count for scopas); no game can seat more
+    # players than there are cards. The deck's order is not hashed, only deck_position, so hashes only tell apart
+    # states dealt from the same deck (the endgame solver's decks are all empty).
+    __ZOBRIST_RNG = random.Random(0x5C09A)
+    __BOARD_KEYS = tuple(map(__ZOBRIST_RNG.getrandbits, [64] * len(ALL_CARDS)))
+    __HAND_KEYS = tuple(map(__ZOBRIST_RNG.getrandbits, [64] * len(ALL_CARDS) ** 2))
+    __CAPTURE_KEYS = tuple(map(__ZOBRIST_RNG.getrandbits, [64] * len(ALL_CARDS) ** 2))
+    __SCOPA_KEYS = tuple(map(__ZOBRIST_RNG.getrandbits, [64] * len(ALL_CARDS) ** 2))
+    __TO_MOVE_KEYS = tuple(map(__ZOBRIST_RNG.getrandbits, [64] * len(ALL_CARDS)))
+    __LEAD_KEYS = tuple(map(__ZOBRIST_RNG.getrandbits, [64] * len(ALL_CARDS)))
+    __LAST_TAKER_KEYS = tuple(map(__ZOBRIST_RNG.getrandbits, [64] * (len(ALL_CARDS) + 1)))
+    __DECK_KEYS = tuple(map(__ZOBRIST_RNG.getrandbits, [64] * (len(ALL_CARDS) + 1)))
+
+    def __init__(self, board: int, hands: list[int], captures: list[int], scopas: list[int], deck: tuple[int, ...],
+                 to_move: int, lead: int, hand_size: int, deck_position: int = 0, last_taker: int = -1,
+                 hash: int = None):
+        self.board = board
+        self.hands = hands
+        self.captures = captures
+        self.scopas = scopas
+        self.deck = deck
+        self.deck_position = deck_position
+        self.to_move = to_move
+        self.lead = lead
+        self.hand_size = hand_size
+        self.last_taker = last_taker
+        self.hash = hash
+        self.__history = []
+
+    @staticmethod
+    def determinize(observation: ScopaObservation, rng: random.Random) -> 'ScopaState':
+        # Deal the unseen cards at random into opponents' hands and the deck
+        unseen = mask_indices(observation.unseen_mask())
+        rng.shuffle(unseen)
+
+        hands = [observation.hand_mask]
+        position = 0
+        for hand_count in observation.hand_counts[1:]:
+            hand = 0
+            for index in unseen[position:position + hand_count]:
+                hand |= 1 << index
+            hands.append(hand)
+            position += hand_count
+
+        return ScopaState(observation.board_mask, hands, list(observation.captured), list(observation.scopas),
+                          tuple(unseen[position:]), 0, observation.lead, observation.hand_size,
+                          last_taker=observation.last_taker)
+
+    @staticmethod
+    def from_game(game: 'ScopaGame', player: 'ScopaPlayer') -> 'ScopaState':
+        # The exact position of a game in progress, hidden cards and deck order included, with seats in turn order
+        # from player (seat 0). Every other player must have finished their turn, as between begin_player_turn_event
+        # and post_move_event, so that player is the one to move.
+        seat = game.players.index(player)
+        in_turn_order = game.players[seat:] + game.players[:seat]
+        num_cards_left = game.deck.num_cards_left()
+        last_taker = -1 if game.last_capture_player is None \
+            else (game.players.index(game.last_capture_player) - seat) % len(game.players)
+        return ScopaState(game.board_mask,
+                          [p.get_hand_mask() for p in in_turn_order],
+                          [p.get_captured_mask() for p in in_turn_order],
+                          [p.get_scopa_count() for p in in_turn_order],
+                          tuple(game.deck.order()[len(ALL_CARDS) - num_cards_left:]) if num_cards_left else (),
+                          0, -seat % len(game.players), game.hand_size, last_taker=last_taker)
+
+    def copy(self) -> 'ScopaState':
+        # The copy starts with no moves to undo
+        return ScopaState(self.board, list(self.hands), list(self.captures), list(self.scopas), self.deck,
+                          self.to_move, self.lead, self.hand_size, self.deck_position, self.last_taker, self.hash)
+
+    def zobrist_hash(self) -> int:
+        # The hash from scratch. self.hash caches it: apply and undo keep it up to date, play resets it to None.
+        num_cards = len(ALL_CARDS)
+        zobrist_hash = ScopaState.__TO_MOVE_KEYS[self.to_move] ^ ScopaState.__LEAD_KEYS[self.lead] \
+            ^ ScopaState.__LAST_TAKER_KEYS[self.last_taker + 1] ^ ScopaState.__DECK_KEYS[self.deck_position]
+        for index in mask_indices(self.board):
+            zobrist_hash ^= ScopaState.__BOARD_KEYS[index]
+        for seat in range(len(self.hands)):
+            for index in mask_indices(self.hands[seat]):
+                zobrist_hash ^= ScopaState.__HAND_KEYS[seat * num_cards + index]
+            for index in mask_indices(self.captures[seat]):
+                zobrist_hash ^= ScopaState.__CAPTURE_KEYS[seat * num_cards + index]
+            zobrist_hash ^= ScopaState.__SCOPA_KEYS[seat * num_cards + self.scopas[seat]]
+        return zobrist_hash
+
+    def num_players(self) -> int:
+        return len(self.hands)
+
+    def cards_in_deck(self) -> int:
+        return len(self.deck) - self.deck_position
+
+    def is_over(self) -> bool:
+        return not self.hands[self.to_move] and self.deck_position >= len(self.deck)
+
+    def legal_moves(self) -> list[tuple[int, int]]:
+        return get_all_valid_move_masks(self.board, self.hands[self.to_move])
+
+    def apply(self, move: tuple[int, int]):
+        # play, keeping the hash up to date and remembering enough to undo the move. Search calls this at every
+        # node, so it repeats play's rules rather than diffing the state before and after.
+        hand_index, take_mask = move
+        player = self.to_move
+        hand_bit = 1 << hand_index
+        zobrist_hash = self.zobrist_hash() if self.hash is None else self.hash
+        self.__history.append((hand_index, player, self.board, self.captures[player], self.scopas[player],
+                               self.last_taker, self.lead, self.deck_position, zobrist_hash))
+
+        num_cards = len(ALL_CARDS)
+        seat_offset = player * num_cards
+        zobrist_hash ^= ScopaState.__HAND_KEYS[seat_offset + hand_index]
+        self.hands[player] &= ~hand_bit
+        if take_mask:
+            self.board &= ~take_mask
+            self.captures[player] |= take_mask | hand_bit
+            zobrist_hash ^= ScopaState.__CAPTURE_KEYS[seat_offset + hand_index] \
+                ^ ScopaState.__LAST_TAKER_KEYS[self.last_taker + 1] ^ ScopaState.__LAST_TAKER_KEYS[player + 1]
+            for index in mask_indices(take_mask):
+                zobrist_hash ^= ScopaState.__BOARD_KEYS[index] ^ ScopaState.__CAPTURE_KEYS[seat_offset + index]
+            self.last_taker = player
+            if not self.board:
+                scopas = self.scopas[player]
+                zobrist_hash ^= ScopaState.__SCOPA_KEYS[seat_offset + scopas] \
+                    ^ ScopaState.__SCOPA_KEYS[seat_offset + scopas + 1]
+                self.scopas[player] = scopas + 1
+        else:
+            self.board |= hand_bit
+            zobrist_hash ^= ScopaState.__BOARD_KEYS[hand_index]
+
+        num_players = len(self.hands)
+        self.to_move = (player + 1) % num_players
+        zobrist_hash ^= ScopaState.__TO_MOVE_KEYS[player] ^ ScopaState.__TO_MOVE_KEYS[self.to_move]
+        if not self.hands[self.to_move]:
+            if self.deck_position < len(self.deck):
+                deck_position = self.deck_position
+                zobrist_hash ^= ScopaState.__LEAD_KEYS[self.lead] ^ ScopaState.__TO_MOVE_KEYS[self.to_move] \
+                    ^ ScopaState.__DECK_KEYS[deck_position]
+                self.__deal(num_players)
+                for dealt, position in enumerate(range(deck_position, self.deck_position)):
+                    seat = (self.lead + dealt) % num_players
+                    zobrist_hash ^= ScopaState.__HAND_KEYS[seat * num_cards + self.deck[position]]
+                zobrist_hash ^= ScopaState.__LEAD_KEYS[self.lead] ^ ScopaState.__TO_MOVE_KEYS[self.to_move] \
+                    ^ ScopaState.__DECK_KEYS[self.deck_position]
+            elif self.last_taker >= 0:
+                taker_offset = self.last_taker * num_cards
+                for index in mask_indices(self.board):
+                    zobrist_hash ^= ScopaState.__BOARD_KEYS[index] ^ ScopaState.__CAPTURE_KEYS[taker_offset + index]
+                self.captures[self.last_taker] |= self.board
+                self.board = 0
+        self.hash = zobrist_hash
+
+    def undo(self):
+        # Take back the last applied move, restoring the state exactly as it was before it
+        hand_index, player, board, captured, scopas, last_taker, lead, deck_position, zobrist_hash = \
+            self.__history.pop()
+
+        if self.deck_position != deck_position:
+            dealt = 0
+            for index in self.deck[deck_position:self.deck_position]:
+                dealt |= 1 << index
+            for seat in range(len(self.hands)):
+                self.hands[seat] &= ~dealt
+        self.hands[player] |= 1 << hand_index
+
+        # If a discard ended the hand, the board went to an earlier taker; none of those cards were theirs before
+        if last_taker >= 0 and last_taker != player:
+            self.captures[last_taker] &= ~(board | 1 << hand_index)
+        self.captures[player] = captured
+        self.scopas[player] = scopas
+
+        self.board = board
+        self.to_move = player
+        self.last_taker = last_taker
+        self.lead = lead
+        self.deck_position = deck_position
+        self.hash = zobrist_hash
+
+    def can_undo(self) -> bool:
+        return bool(self.__history)
+
+    def play(self, move: tuple[int, int]):
+        # Rollouts that never back out use play directly and skip the hash (which is then unknown) and the history
+        hand_index, take_mask = move
+        player = self.to_move
+        hand_bit = 1 << hand_index
+        self.hash = None
+
+        self.hands[player] &= ~hand_bit
+        if take_mask:
+            self.board &= ~take_mask
+            self.captures[player] |= take_mask | hand_bit
+            self.last_taker = player
+            if not self.board:
+                self.scopas[player] += 1
+        else:
+            self.board |= hand_bit
+
+        num_players = len(self.hands)
+        self.to_move = (player + 1) % num_players
+        if not self.hands[self.to_move]:
+            if self.deck_position < len(self.deck):
+                self.__deal(num_players)
+            elif self.last_taker >= 0:
+                # End of the hand: the last player to capture takes what is left on the board
+                self.captures[self.last_taker] |= self.board
+                self.board = 0
+
+    def __deal(self, num_players: int):
+        # The dealer rotates after every deal, so the next deal starts one seat after the previous one
+        self.lead = (self.lead + 1) % num_players
+        self.to_move = self.lead
+        for _ in range(self.hand_size):
+            for offset in range(num_players):
+                seat = (self.lead + offset) % num_players
+                self.hands[seat] |= 1 << self.deck[self.deck_position]
+                self.deck_position += 1
+
+    def hand_points(self) -> list[int]:
+        num_players = len(self.hands)
+        points = list(self.scopas)
+
+        # Ties go to the earliest player in the game's turn order, which has rotated past this deal's lead
+        order = [(self.lead + 1 + offset) % num_players for offset in range(num_players)]
+        points[max(order, key=lambda seat: self.captures[seat].bit_count())] += 1
+        points[max(order, key=lambda seat: (self.captures[seat] & COINS_MASK).bit_count())] += 1
+        for seat in order:
+            if self.captures[seat] & SEVEN_OF_COINS.bit():
+                points[seat] += 1
+                break
+        points[max(order, key=lambda seat: mask_prime_sum(self.captures[seat]))] += 1
+
+        return points
+
+    def rewards(self) -> list[int]:
+        # Each seat's hand points minus the best of its opponents'
+        points = self.hand_points()
+        rewards = []
+        for seat, seat_points in enumerate(points):
+            rewards.append(seat_points - max(p for other, p in enumerate(points) if other != seat))
+        return rewards
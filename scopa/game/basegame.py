@@ -1,8 +1,11 @@
 from scopa.cards import *
+from scopa.engine import ScopaObservation
 from scopa.player import ScopaPlayer
+from scopa.scoring import ScopaHandScore, score_hand
 from scopa.strategy import ScopaMove, ScopaMoveType
-import sys
 from abc import ABC, abstractmethod
+from typing import Iterator, Sequence
+import random
 
 
 class ScopaGame(ABC):
@@ -10,10 +13,19 @@ class ScopaGame(ABC):
     def __init__(self, players: list[ScopaPlayer] = None,
                  winning_score: int = 11,
                  hand_size: int = 3,
-                 board_size: int = 4):
-        self.deck = ScopaDeck()
-        self.deck.shuffle()
-        self.board = []
+                 board_size: int = 4,
+                 seed: int = None,
+                 deals: Iterator[Sequence[int]] = None):
+        self.seed = seed
+        self.rng = random.Random(seed) if seed is not None else None
+        self.deck = ScopaDeck(deals=deals)
+        if deals is None:
+            self.deck.shuffle(self.rng)
+        # The board is a tuple, so players and events can be given it without copying
+        self.board = ()
+        self.board_mask = 0
+        self.last_capture_player = None
+        self.__trackers = []
         self.players = [] if players is None else players
         self.winning_score = winning_score
         self.hand_size = hand_size
@@ -47,6 +59,18 @@ class ScopaGame(ABC):
     def post_move_event(self, player: ScopaPlayer):
         ...
 
+    @abstractmethod
+    def end_of_deal_event(self):
+        ...
+
+    @abstractmethod
+    def last_capture_event(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        ...
+
+    @abstractmethod
+    def hand_scored_event(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        ...
+
     @abstractmethod
     def ending_event(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
         ...
@@ -64,8 +88,10 @@ class ScopaGame(ABC):
         while not winners:
             self.new_deck_event(scores)
             self.__reset_players()
+            # Only players that track cards are told about them, so games without trackers pay nothing
+            self.__trackers = [player.tracker() for player in self.players if player.tracker() is not None]
             self.deck.refresh_deck()
-            self.deck.shuffle()
+            self.deck.shuffle(self.rng)
             self.__deal_board()
 
             while self.deck.cards_left():
@@ -76,12 +102,15 @@ class ScopaGame(ABC):
                         self.begin_player_turn_event(player)
                         while True:
                             try:
-                                move = player.make_move(self.board)
+                                move = player.make_move(self.board, self.__observation(player)
+                                                        if player.wants_observation() else None)
                                 self.__evaluate_move(move, player)
                                 break
                             except ValueError as ve:
                                 self.invalid_move_event(ve)
 
+                        for tracker in self.__trackers:
+                            tracker.see_card(move.hand_card())
                         self.move_made_event(move)
                         if not self.board:
                             self.scopa_event()
@@ -90,12 +119,28 @@ class ScopaGame(ABC):
 
                 # Change dealer
                 self.players.append(self.players.pop(0))
-                print()
+                self.end_of_deal_event()
 
+            self.__award_remaining_board()
             self.__update_scores(scores)
             winners = self.__winning_players(scores)
 
         self.ending_event(winners, scores)
+        return winners
+
+    def __observation(self, player: ScopaPlayer) -> ScopaObservation:
+        seat = self.players.index(player)
+        in_turn_order = self.players[seat:] + self.players[:seat]
+        return ScopaObservation(self.board_mask,
+                                player.get_hand_mask(),
+                                tuple(p.get_captured_mask() for p in in_turn_order),
+                                tuple(p.get_scopa_count() for p in in_turn_order),
+                                tuple(p.get_hand_mask().bit_count() for p in in_turn_order),
+                                -seat % len(self.players),
+                                self.deck.num_cards_left(),
+                                self.hand_size,
+                                -1 if self.last_capture_player is None
+                                else (self.players.index(self.last_capture_player) - seat) % len(self.players))
 
     def __winning_players(self, scores: dict[ScopaPlayer, int]):
         best_score = max(scores.values())
@@ -104,15 +149,30 @@ class ScopaGame(ABC):
         return None
 
     def __deal_board(self):
-        self.board = []
+        self.board = ()
+        self.board_mask = 0
+        self.last_capture_player = None
         for _ in range(self.board_size):
-            self.board.append(self.deck.draw_card())
+            card = self.deck.draw_card()
+            self.board += (card,)
+            self.board_mask |= card.bit()
+            for tracker in self.__trackers:
+                tracker.see_card(card)
 
     def __deal_players(self):
         for _ in range(self.hand_size):
             for player in self.players:
                 player.deal_card(self.deck.draw_card())
 
+    # Cards still on the board when the hand ends go to the last player to capture (this is not a scopa)
+    def __award_remaining_board(self):
+        if self.board and self.last_capture_player is not None:
+            remaining = self.board
+            self.last_capture_player.capture_cards(remaining)
+            self.board = ()
+            self.board_mask = 0
+            self.last_capture_event(self.last_capture_player, remaining)
+
     def __reset_players(self):
         for player in self.players:
             player.reset()
@@ -124,77 +184,45 @@ class ScopaGame(ABC):
 
             player.capture_card(move.hand_card())
             player.capture_cards(move.board_cards())
+            self.last_capture_player = player
 
+            # One pass over the board, rather than a scan per captured card
+            taken_mask = move.masks()[1]
             player.remove_hand_card(move.hand_card())
-            for board_card in move.board_cards():
-                self.board.remove(board_card)
+            self.board = tuple([board_card for board_card in self.board if not taken_mask & board_card.bit()])
+            self.board_mask &= ~taken_mask
 
             return
 
         if move.move_type() == ScopaMoveType.DISCARD:
             self.__validate_discard_move(move, player)
-            self.board.append(move.hand_card())
+            self.board += (move.hand_card(),)
+            self.board_mask |= move.hand_card().bit()
             player.remove_hand_card(move.hand_card())
             return
 
         raise ValueError(f'Invalid move type {move.move_type()}')
 
     def __validate_take_move(self, move: ScopaMove, player: ScopaPlayer):
-        if move.hand_card() not in player.get_hand():
+        if not player.has_card(move.hand_card()):
             raise ValueError(f'{move.hand_card()} not in {player}\'s hand')
 
+        rank_total = 0
         for board_card in move.board_cards():
-            if board_card not in self.board:
+            if not self.board_mask & board_card.bit():
                 raise ValueError(f'{board_card} is not on the board')
+            rank_total += board_card.rank()
 
-        if sum([board_card.rank() for board_card in move.board_cards()]) != move.hand_card().rank():
+        if rank_total != move.hand_card().rank():
             raise ValueError('Board card ranks do not add up to hand card rank')
 
     @staticmethod
     def __validate_discard_move(move: ScopaMove, player: ScopaPlayer):
-        if move.hand_card() not in player.get_hand():
+        if not player.has_card(move.hand_card()):
             raise ValueError(f'{move.hand_card()} not in {player}\'s hand')
 
     def __update_scores(self, scores: dict[ScopaPlayer, int]):
-        # Scopas
-        for player in self.players:
-            scores[player] += player.get_scopa_count()
-            print(f'{player} got {player.get_scopa_count()} scopas ({scores[player]})')
-
-        # Card Count
-        most_cards, most_cards_player = -sys.maxsize, None
-        for player in self.players:
-            num_captured = len(player.get_captured_cards())
-            most_cards, most_cards_player = max((most_cards, most_cards_player), (num_captured, player),
-                                                key=lambda x: x[0])
-        scores[most_cards_player] += 1
-        print(f'{most_cards_player} has most cards ({scores[most_cards_player]})')
-
-        # Coin Count
-        most_coins, most_coins_player = -sys.maxsize, None
-        for player in self.players:
-            num_coins = player.get_num_coins_captured()
-            most_coins, most_coins_player = max((most_coins, most_coins_player), (num_coins, player),
-                                                key=lambda x: x[0])
-        scores[most_coins_player] += 1
-        print(f'{most_coins_player} has most coins ({scores[most_coins_player]})')
-
-        # Seven of Coins
-        for player in self.players:
-            if ScopaCard(ScopaCardRank.SEVEN, ScopaCardSuit.COINS) in player.get_captured_cards():
-                scores[player] += 1
-                print(f'{player} got the 7 of Coins ({scores[player]})')
-                break
-
-        # Primes
-        highest_prime_sum, highest_prime_sum_player = -sys.maxsize, None
-        for player in self.players:
-            prime_sum = 0
-            for suit in ScopaCardSuit:
-                suit_cards = [card for card in player.get_captured_cards() if card.suit() == suit]
-                prime_sum += max([get_prime_points(card.rank()) for card in suit_cards]) if suit_cards else 0
-            highest_prime_sum, highest_prime_sum_player = max((highest_prime_sum, highest_prime_sum_player),
-                                                              (prime_sum, player), key=lambda x: x[0])
-        scores[highest_prime_sum_player] += 1
-        print(f'{highest_prime_sum_player} has highest prime score ({scores[highest_prime_sum_player]})')
-
+        hand_score = score_hand(self.players)
+        for player, points in hand_score.points().items():
+            scores[player] += points
+        self.hand_scored_event(hand_score, scores)
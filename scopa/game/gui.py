@@ -1,14 +1,196 @@
+import queue
 import tkinter as tk
 
-from scopa.player import ScopaPlayer
+from scopa.cards import ScopaCard, ScopaCardSuit
 
 WINDOW_TITLE = 'SCOPA!'
+POLL_INTERVAL_MS = 30
+LOG_LINES = 200
+
+__SUIT_COLOURS = {
+    ScopaCardSuit.COINS: '#b8860b',
+    ScopaCardSuit.CUPS: '#b22222',
+    ScopaCardSuit.SWORDS: '#1e3f8a',
+    ScopaCardSuit.CLUBS: '#1f6f2f',
+}
+
+
+def suit_colour(card: ScopaCard) -> str:
+    return __SUIT_COLOURS[card.suit()]
+
+
+class ScopaCardRow:
+
+    # A row of card labels. Labels are created the first time a row needs that many and are then reused: showing
+    # new cards only reconfigures the labels whose card changed, and surplus labels are hidden rather than destroyed
+    def __init__(self, parent: tk.Widget, title: str):
+        self.frame = tk.LabelFrame(parent, text=title, padx=4, pady=4)
+        self.__labels = []
+        self.__cards = ()
+
+    def show(self, cards: tuple[ScopaCard, ...]):
+        if cards == self.__cards:
+            return
+        while len(self.__labels) < len(cards):
+            label = tk.Label(self.frame, width=4, relief=tk.RAISED, borderwidth=2, bg='white',
+                             font=('TkDefaultFont', 16))
+            self.__labels.append(label)
+        for position, card in enumerate(cards):
+            label = self.__labels[position]
+            if position >= len(self.__cards):
+                label.grid(row=0, column=position, padx=2)
+            if position >= len(self.__cards) or self.__cards[position] is not card:
+                label.configure(text=str(card), fg=suit_colour(card))
+        for label in self.__labels[len(cards):len(self.__cards)]:
+            label.grid_remove()
+        self.__cards = cards
 
 
 class ScopaBoardGui:
 
-    def __init__(self, players: list[ScopaPlayer]):
-        self.players = players
+    # The window. It is only touched from the thread running mainloop (the Tk thread); the game thread hands it
+    # events through post(), and every POLL_INTERVAL_MS the Tk thread applies whatever has arrived and then redraws
+    # only what those events changed. However fast the game runs, the window redraws at most once per poll.
+    def __init__(self):
+        self.__events = queue.Queue()
+        self.__scores = {}
+        self.__scores_shown = {}
+        self.__hands = {}
+        self.__board = ()
+        self.__status = ''
+        self.__new_log_lines = []
+        self.__choice = None
+        self.__handlers = {
+            'scores': self.__on_scores,
+            'board': self.__on_board,
+            'hand': self.__on_hand,
+            'status': self.__on_status,
+            'log': self.__on_log,
+            'choose_move': self.__on_choose_move,
+        }
 
         self.window = tk.Tk()
         self.window.title(WINDOW_TITLE)
+
+        self.__scores_frame = tk.Frame(self.window, padx=8, pady=4)
+        self.__scores_frame.pack(fill=tk.X)
+        self.__score_labels = {}
+
+        self.__status_label = tk.Label(self.window, anchor=tk.W, padx=8, font=('TkDefaultFont', 12, 'bold'))
+        self.__status_label.pack(fill=tk.X)
+
+        self.__board_row = ScopaCardRow(self.window, 'Board')
+        self.__board_row.frame.pack(fill=tk.X, padx=8, pady=4)
+        self.__hand_rows = {}
+        self.__hands_frame = tk.Frame(self.window)
+        self.__hands_frame.pack(fill=tk.X, padx=8)
+
+        self.__moves_frame = tk.LabelFrame(self.window, text='Your move', padx=4, pady=4)
+        self.__move_buttons = []
+        self.__moves_shown = ()
+
+        self.__log = tk.Listbox(self.window, height=10)
+        self.__log.pack(fill=tk.BOTH, expand=True, padx=8, pady=4)
+
+    def post(self, event: str, *args):
+        # Called from the game thread. Arguments must not change after posting (tuples, copies of dicts, strings).
+        self.__events.put((event, args))
+
+    def run(self):
+        self.window.after(POLL_INTERVAL_MS, self.__poll)
+        self.window.mainloop()
+
+    def close(self):
+        self.window.destroy()
+
+    def __poll(self):
+        while True:
+            try:
+                event, args = self.__events.get_nowait()
+            except queue.Empty:
+                break
+            self.__handlers[event](*args)
+        self.__redraw()
+        self.window.after(POLL_INTERVAL_MS, self.__poll)
+
+    def __on_scores(self, scores: dict[str, int]):
+        self.__scores.update(scores)
+
+    def __on_board(self, board: tuple[ScopaCard, ...]):
+        self.__board = board
+
+    def __on_hand(self, name: str, hand: tuple[ScopaCard, ...]):
+        self.__hands[name] = hand
+
+    def __on_status(self, status: str):
+        self.__status = status
+
+    def __on_log(self, line: str):
+        self.__new_log_lines.append(line)
+
+    def __on_choose_move(self, moves: tuple, answers: queue.Queue):
+        self.__choice = (moves, answers)
+        self.__status = 'Choose your move'
+
+    def __choose(self, index: int):
+        # Buttons always show the current choice, as events and clicks are both handled on the Tk thread
+        if self.__choice is None or self.__choice[0] is not self.__moves_shown:
+            return
+        moves, answers = self.__choice
+        self.__choice = None
+        answers.put(moves[index])
+        self.__redraw()
+
+    def __redraw(self):
+        for name, score in self.__scores.items():
+            if self.__scores_shown.get(name) == score:
+                continue
+            label = self.__score_labels.get(name)
+            if label is None:
+                label = tk.Label(self.__scores_frame, padx=8, font=('TkDefaultFont', 12))
+                label.pack(side=tk.LEFT)
+                self.__score_labels[name] = label
+            label.configure(text=f'{name}: {score}')
+            self.__scores_shown[name] = score
+
+        if self.__status_label.cget('text') != self.__status:
+            self.__status_label.configure(text=self.__status)
+
+        self.__board_row.show(self.__board)
+        for name, hand in self.__hands.items():
+            row = self.__hand_rows.get(name)
+            if row is None:
+                row = ScopaCardRow(self.__hands_frame, f'{name}\'s hand')
+                row.frame.pack(fill=tk.X, pady=2)
+                self.__hand_rows[name] = row
+            row.show(hand)
+
+        self.__redraw_moves()
+
+        if self.__new_log_lines:
+            self.__log.insert(tk.END, *self.__new_log_lines)
+            self.__new_log_lines.clear()
+            if self.__log.size() > LOG_LINES:
+                self.__log.delete(0, self.__log.size() - LOG_LINES - 1)
+            self.__log.see(tk.END)
+
+    def __redraw_moves(self):
+        moves = () if self.__choice is None else self.__choice[0]
+        if moves is self.__moves_shown:
+            return
+        while len(self.__move_buttons) < len(moves):
+            index = len(self.__move_buttons)
+            self.__move_buttons.append(tk.Button(self.__moves_frame, anchor=tk.W,
+                                                 command=lambda i=index: self.__choose(i)))
+        for index, move in enumerate(moves):
+            button = self.__move_buttons[index]
+            button.configure(text=str(move))
+            if index >= len(self.__moves_shown):
+                button.pack(fill=tk.X)
+        for button in self.__move_buttons[len(moves):len(self.__moves_shown)]:
+            button.pack_forget()
+        if moves and not self.__moves_shown:
+            self.__moves_frame.pack(fill=tk.X, padx=8, pady=4, before=self.__log)
+        elif not moves:
+            self.__moves_frame.pack_forget()
+        self.__moves_shown = moves
@@ -1,38 +1,104 @@
-import tkinter as tk
+import queue
+import threading
+import time
 
+from scopa.cards import ScopaCard
+from scopa.engine import ScopaObservation
 from scopa.game.basegame import ScopaGame
 from scopa.game.gui import ScopaBoardGui
 from scopa.player import ScopaPlayer
-from scopa.strategy import ScopaMove
+from scopa.scoring import ScopaHandScore
+from scopa.strategy import ScopaMove, ScopaStrategy, get_all_valid_moves
+
+
+class GuiScopaPlayer(ScopaPlayer):
+
+    # A human playing in the window: make_move runs on the game thread, asks the window for a move and waits for
+    # the player to click one
+    def __init__(self, name, scopa_gui: ScopaBoardGui, strategy: str | ScopaStrategy = ScopaStrategy.DEFAULT):
+        super().__init__(name, strategy=strategy, human=True, show_hand=True)
+        self.scopa_gui = scopa_gui
+        self.__answers = queue.Queue()
+
+    def make_move(self, scopa_board: list[ScopaCard], observation: ScopaObservation = None) -> ScopaMove:
+        self.scopa_gui.post('choose_move', tuple(get_all_valid_moves(scopa_board, self.get_hand())), self.__answers)
+        return self.__answers.get()
 
 
 class GuiBasedScopaGame(ScopaGame):
 
+    # start_game plays on a worker thread while the calling thread runs the Tk mainloop. Events are posted to the
+    # window as immutable snapshots, and after every computer player's move the game thread (never the window)
+    # waits move_delay seconds so people can follow the play.
     def __init__(self, scopa_gui: ScopaBoardGui, players: list[ScopaPlayer] = None, winning_score: int = 11,
-                 hand_size: int = 3, board_size: int = 4):
+                 hand_size: int = 3, board_size: int = 4, move_delay: float = 0.75):
         super().__init__(players=players, winning_score=winning_score, hand_size=hand_size, board_size=board_size)
         self.scopa_gui = scopa_gui
+        self.move_delay = move_delay
+        self.winners = None
+        self.__turn_player = None
+
+    def start_game(self):
+        thread = threading.Thread(target=self.__play, name='scopa-game', daemon=True)
+        thread.start()
+        # Closing the window ends the program even if the game thread is waiting on a move
+        self.scopa_gui.run()
+        return self.winners
 
     def new_deck_event(self, scores: dict[ScopaPlayer, int]):
-        ...
+        self.scopa_gui.post('scores', {str(player): score for player, score in scores.items()})
+        self.scopa_gui.post('log', 'New hand')
 
     def dealing_players_event(self, dealer: ScopaPlayer):
-        ...
+        self.scopa_gui.post('board', self.board)
+        self.scopa_gui.post('log', f'{dealer} deals')
 
     def begin_player_turn_event(self, player: ScopaPlayer):
-        ...
+        self.__turn_player = player
+        self.__post_hands()
+        self.scopa_gui.post('status', f'{player} to move')
 
     def invalid_move_event(self, error: ValueError):
-        ...
+        self.scopa_gui.post('status', f'Invalid move: {error}')
 
     def move_made_event(self, move: ScopaMove):
-        ...
+        self.scopa_gui.post('board', self.board)
+        self.scopa_gui.post('log', f'{self.__turn_player}: {move}')
 
     def scopa_event(self):
-        ...
+        self.scopa_gui.post('log', f'SCOPA for {self.__turn_player}!')
 
     def post_move_event(self, player: ScopaPlayer):
-        ...
+        if player.show_hand():
+            self.scopa_gui.post('hand', str(player), player.get_hand())
+        if not player.is_human() and self.move_delay:
+            time.sleep(self.move_delay)
+
+    def end_of_deal_event(self):
+        pass
+
+    def last_capture_event(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        self.scopa_gui.post('board', self.board)
+        self.scopa_gui.post('log', f'{player} takes the rest of the board: {" ".join(str(card) for card in cards)}')
+
+    def hand_scored_event(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        for category, player, points in hand_score.awards():
+            if points:
+                self.scopa_gui.post('log', f'{player}: {points} for {category.replace("_", " ")}')
+        self.scopa_gui.post('scores', {str(player): score for player, score in scores.items()})
 
     def ending_event(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
-        ...
\ No newline at end of file
+        self.scopa_gui.post('status', ' and '.join(str(winner) for winner in winners)
+                            + (' tie!' if len(winners) > 1 else ' wins!'))
+
+    def __play(self):
+        try:
+            self.winners = super().start_game()
+        except Exception as error:
+            self.scopa_gui.post('status', f'Game stopped: {error}')
+            raise
+
+    def __post_hands(self):
+        for player in self.players:
+            if player.show_hand():
+                self.scopa_gui.post('hand', str(player), player.get_hand())
@@ -0,0 +1,50 @@
+from typing import Iterator, Sequence
+
+from scopa.cards import ScopaCard
+from scopa.game.basegame import ScopaGame
+from scopa.player import ScopaPlayer
+from scopa.scoring import ScopaHandScore
+from scopa.strategy import ScopaMove
+
+
+class HeadlessScopaGame(ScopaGame):
+
+    def __init__(self, players: list[ScopaPlayer] = None, winning_score: int = 11, hand_size: int = 3,
+                 board_size: int = 4, seed: int = None, deals: Iterator[Sequence[int]] = None):
+        super().__init__(players=players, winning_score=winning_score, hand_size=hand_size, board_size=board_size,
+                         seed=seed, deals=deals)
+        self.hand_scores = []
+        self.final_scores = None
+
+    def new_deck_event(self, scores: dict[ScopaPlayer, int]):
+        pass
+
+    def dealing_players_event(self, dealer: ScopaPlayer):
+        pass
+
+    def begin_player_turn_event(self, player: ScopaPlayer):
+        pass
+
+    def invalid_move_event(self, error: ValueError):
+        pass
+
+    def move_made_event(self, move: ScopaMove):
+        pass
+
+    def scopa_event(self):
+        pass
+
+    def post_move_event(self, player: ScopaPlayer):
+        pass
+
+    def end_of_deal_event(self):
+        pass
+
+    def last_capture_event(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        pass
+
+    def hand_scored_event(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        self.hand_scores.append(hand_score)
+
+    def ending_event(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
+        self.final_scores = dict(scores)
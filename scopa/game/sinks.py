@@ -0,0 +1,274 @@
+from abc import ABC, abstractmethod
+import json
+import sys
+import threading
+from typing import TextIO
+
+from scopa import moveparser
+from scopa.cards import ScopaCard
+from scopa.player import ScopaPlayer
+from scopa.scoring import ScopaHandScore
+from scopa.strategy import ScopaMove
+
+
+class ScopaEventSink(ABC):
+
+    # Where a game's output goes. Games forward each of their events here, so the same game can write to the
+    # terminal, to a log or nowhere, and a sink that writes nothing never formats anything.
+    @abstractmethod
+    def new_deck(self, scores: dict[ScopaPlayer, int]):
+        ...
+
+    @abstractmethod
+    def dealing_players(self, dealer: ScopaPlayer):
+        ...
+
+    @abstractmethod
+    def begin_player_turn(self, player: ScopaPlayer, board: tuple[ScopaCard, ...]):
+        ...
+
+    @abstractmethod
+    def invalid_move(self, error: ValueError):
+        ...
+
+    @abstractmethod
+    def move_made(self, move: ScopaMove):
+        ...
+
+    @abstractmethod
+    def scopa(self):
+        ...
+
+    @abstractmethod
+    def post_move(self, player: ScopaPlayer):
+        ...
+
+    @abstractmethod
+    def end_of_deal(self):
+        ...
+
+    @abstractmethod
+    def last_capture(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        ...
+
+    @abstractmethod
+    def hand_scored(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        ...
+
+    @abstractmethod
+    def ending(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
+        ...
+
+    @abstractmethod
+    def aborted(self, reason: str):
+        ...
+
+    @abstractmethod
+    def flush(self):
+        ...
+
+
+class ScopaNullEventSink(ScopaEventSink):
+
+    def new_deck(self, scores: dict[ScopaPlayer, int]):
+        pass
+
+    def dealing_players(self, dealer: ScopaPlayer):
+        pass
+
+    def begin_player_turn(self, player: ScopaPlayer, board: tuple[ScopaCard, ...]):
+        pass
+
+    def invalid_move(self, error: ValueError):
+        pass
+
+    def move_made(self, move: ScopaMove):
+        pass
+
+    def scopa(self):
+        pass
+
+    def post_move(self, player: ScopaPlayer):
+        pass
+
+    def end_of_deal(self):
+        pass
+
+    def last_capture(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        pass
+
+    def hand_scored(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        pass
+
+    def ending(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
+        pass
+
+    def aborted(self, reason: str):
+        pass
+
+    def flush(self):
+        pass
+
+
+class ScopaTextEventSink(ScopaEventSink):
+
+    # The text game's running commentary. Lines are collected in memory and written to the stream (stdout unless
+    # given) in one write at the end of every hand, and also before a human player's turn and after an invalid move,
+    # so anyone at the keyboard has seen everything before being asked for a move.
+    def __init__(self, stream: TextIO = None):
+        self.__stream = stream
+        self.__lines = []
+
+    def new_deck(self, scores: dict[ScopaPlayer, int]):
+        self.__lines.append('No winner yet')
+        self.__lines.append(str([f'{player}: {score}' for player, score in scores.items()]))
+        self.__lines.append('')
+
+    def dealing_players(self, dealer: ScopaPlayer):
+        self.__lines.append(f'-----DEALING CARDS ({dealer} is the Dealer)-----')
+
+    def begin_player_turn(self, player: ScopaPlayer, board: tuple[ScopaCard, ...]):
+        self.__lines.append('')
+        self.__lines.append(f'Player Turn: {player}')
+        self.__lines.append(f'Board: {[str(card) for card in board]}')
+        if player.show_hand():
+            self.__lines.append(f'Player {player} hand: {[str(card) for card in player.get_hand()]}')
+        if player.is_human():
+            self.flush()
+
+    def invalid_move(self, error: ValueError):
+        self.__lines.append(f'Invalid move: {error}')
+        self.flush()
+
+    def move_made(self, move: ScopaMove):
+        self.__lines.append(f'Move made: {move}')
+
+    def scopa(self):
+        self.__lines.append('SCOPA!!!!!!!!!!!!!!')
+
+    def post_move(self, player: ScopaPlayer):
+        if player.show_hand():
+            self.__lines.append(f'New hand: {[str(card) for card in player.get_hand()]}')
+
+    def end_of_deal(self):
+        self.__lines.append('')
+
+    def last_capture(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        self.__lines.append(f'{player} takes the rest of the board: {[str(card) for card in cards]}')
+
+    def hand_scored(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        running_scores = {player: score - hand_score.points()[player] for player, score in scores.items()}
+        for category, player, points in hand_score.awards():
+            running_scores[player] += points
+            if category == ScopaHandScore.SCOPA:
+                self.__lines.append(f'{player} got {points} scopas ({running_scores[player]})')
+            elif category == ScopaHandScore.CARDS:
+                self.__lines.append(f'{player} has most cards ({running_scores[player]})')
+            elif category == ScopaHandScore.COINS:
+                self.__lines.append(f'{player} has most coins ({running_scores[player]})')
+            elif category == ScopaHandScore.SEVEN_OF_COINS:
+                self.__lines.append(f'{player} got the 7 of Coins ({running_scores[player]})')
+            elif category == ScopaHandScore.PRIMES:
+                self.__lines.append(f'{player} has highest prime score ({running_scores[player]})')
+        self.flush()
+
+    def ending(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
+        final_scores = [f'{player}: {score}' for player, score in scores.items()]
+        if len(winners) > 1:
+            self.__lines.append(' and '.join(str(w) for w in winners) + f' tie! Final scores: {final_scores}')
+        else:
+            self.__lines.append(f'{winners[0]} wins! Final scores: {final_scores}')
+        self.flush()
+
+    def aborted(self, reason: str):
+        self.__lines.append(f'Game aborted: {reason}')
+        self.flush()
+
+    def flush(self):
+        if not self.__lines:
+            return
+        # Looked up on every flush so that redirecting sys.stdout after the sink is made still works
+        stream = sys.stdout if self.__stream is None else self.__stream
+        stream.write('\n'.join(self.__lines) + '\n')
+        stream.flush()
+        self.__lines.clear()
+
+
+class ScopaJsonLinesEventSink(ScopaEventSink):
+
+    # One JSON object per event, with cards and moves in moveparser's notation and players by name, for logs that
+    # other programs read. fields (e.g. a table id) are added to every object. Objects are written to the stream at
+    # the end of every hand; give several sinks sharing one stream the same lock.
+    def __init__(self, stream: TextIO, fields: dict = None, lock: threading.Lock = None):
+        self.__stream = stream
+        self.__fields = {} if fields is None else fields
+        self.__lock = lock
+        self.__lines = []
+        self.__turn_player = None
+
+    def new_deck(self, scores: dict[ScopaPlayer, int]):
+        self.__write('new_deck', scores=ScopaJsonLinesEventSink.__names(scores))
+
+    def dealing_players(self, dealer: ScopaPlayer):
+        self.__write('deal', dealer=str(dealer))
+
+    def begin_player_turn(self, player: ScopaPlayer, board: tuple[ScopaCard, ...]):
+        self.__turn_player = player
+        if player.show_hand():
+            self.__write('turn', player=str(player), board=[moveparser.format_card(card) for card in board],
+                         hand=[moveparser.format_card(card) for card in player.get_hand()])
+        else:
+            self.__write('turn', player=str(player), board=[moveparser.format_card(card) for card in board])
+
+    def invalid_move(self, error: ValueError):
+        self.__write('invalid_move', player=str(self.__turn_player), error=str(error))
+
+    def move_made(self, move: ScopaMove):
+        self.__write('move', player=str(self.__turn_player), move=moveparser.format_move(move))
+
+    def scopa(self):
+        self.__write('scopa', player=str(self.__turn_player))
+
+    def post_move(self, player: ScopaPlayer):
+        pass
+
+    def end_of_deal(self):
+        pass
+
+    def last_capture(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        self.__write('last_capture', player=str(player), cards=[moveparser.format_card(card) for card in cards])
+
+    def hand_scored(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        self.__write('hand_scored', awards=[[category, str(player), points]
+                                            for category, player, points in hand_score.awards()],
+                     scores=ScopaJsonLinesEventSink.__names(scores))
+        self.flush()
+
+    def ending(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
+        self.__write('end', winners=[str(winner) for winner in winners], scores=ScopaJsonLinesEventSink.__names(scores))
+        self.flush()
+
+    def aborted(self, reason: str):
+        # Written with the events of the unfinished hand, which would otherwise never be flushed
+        self.__write('aborted', reason=reason)
+        self.flush()
+
+    def flush(self):
+        if not self.__lines:
+            return
+        text = '\n'.join(self.__lines) + '\n'
+        self.__lines.clear()
+        if self.__lock is None:
+            self.__stream.write(text)
+            self.__stream.flush()
+            return
+        with self.__lock:
+            self.__stream.write(text)
+            self.__stream.flush()
+
+    def __write(self, event: str, **values):
+        self.__lines.append(json.dumps({**self.__fields, 'event': event, **values}, separators=(',', ':')))
+
+    @staticmethod
+    def __names(scores: dict[ScopaPlayer, int]) -> dict[str, int]:
+        return {str(player): score for player, score in scores.items()}
@@ -1,42 +1,52 @@
+from typing import Iterator, Sequence
+
+from scopa.cards import ScopaCard
 from scopa.game.basegame import ScopaGame
+from scopa.game.sinks import ScopaEventSink, ScopaTextEventSink
 from scopa.player import ScopaPlayer
+from scopa.scoring import ScopaHandScore
 from scopa.strategy import ScopaMove
 
 
 class TextBasedScopaGame(ScopaGame):
 
+    # Every event goes to the sink, which by default buffers the text commentary and prints it a hand at a time
+    def __init__(self, players: list[ScopaPlayer] = None, winning_score: int = 11, hand_size: int = 3,
+                 board_size: int = 4, seed: int = None, deals: Iterator[Sequence[int]] = None,
+                 sink: ScopaEventSink = None):
+        super().__init__(players=players, winning_score=winning_score, hand_size=hand_size, board_size=board_size,
+                         seed=seed, deals=deals)
+        self.sink = ScopaTextEventSink() if sink is None else sink
+
     def new_deck_event(self, scores: dict[ScopaPlayer, int]):
-        print('No winner yet')
-        print([f'{player}: {score}' for player, score in scores.items()])
-        print()
+        self.sink.new_deck(scores)
 
     def dealing_players_event(self, dealer: ScopaPlayer):
-        print(f'-----DEALING CARDS ({dealer} is the Dealer)-----')
+        self.sink.dealing_players(dealer)
 
     def begin_player_turn_event(self, player: ScopaPlayer):
-        print()
-        print(f'Player Turn: {player}')
-        print(f'Board: {[str(card) for card in self.board]}')
-        if player.show_hand():
-            print(f'Player {player} hand: {[str(card) for card in player.get_hand()]}')
+        self.sink.begin_player_turn(player, self.board)
 
     def invalid_move_event(self, error: ValueError):
-        print(f'Invalid move: {error}')
+        self.sink.invalid_move(error)
 
     def move_made_event(self, move: ScopaMove):
-        print(f'Move made: {move}')
+        self.sink.move_made(move)
 
     def scopa_event(self):
-        print('SCOPA!!!!!!!!!!!!!!')
+        self.sink.scopa()
 
     def post_move_event(self, player: ScopaPlayer):
-        if player.show_hand():
-            print(f'New hand: {[str(card) for card in player.get_hand()]}')
+        self.sink.post_move(player)
 
-    def ending_event(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
-        final_scores = [f'{player}: {score}' for player, score in scores.items()]
-        if len(winners) > 1:
-            print(' and '.join(str(w) for w in winners) + f' tie! Final scores: {final_scores}')
-            return
+    def end_of_deal_event(self):
+        self.sink.end_of_deal()
 
-        print(f'{winners[0]} wins! Final scores: {final_scores}')
\ No newline at end of file
+    def last_capture_event(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        self.sink.last_capture(player, cards)
+
+    def hand_scored_event(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        self.sink.hand_scored(hand_score, scores)
+
+    def ending_event(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
+        self.sink.ending(winners, scores)
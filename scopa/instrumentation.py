@@ -0,0 +1,200 @@
+import cProfile
+import pstats
+import time
+
+from scopa.game.basegame import ScopaGame
+from scopa.player import ScopaPlayer
+from scopa.scoring import ScopaHandScore
+from scopa.strategy import ScopaMove, get_all_valid_move_masks
+
+
+class ScopaLatencyHistogram:
+
+    BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bucket_counts = [0] * len(ScopaLatencyHistogram.BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(ScopaLatencyHistogram.BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'total': self.total, 'mean': self.total / self.count if self.count else 0.0,
+                'max': self.max,
+                'buckets': dict(zip(ScopaLatencyHistogram.BUCKETS, self.bucket_counts))}
+
+
+class ScopaGameInstrumentation:
+
+    __INSTRUMENTED_EVENTS = ('new_deck_event', 'begin_player_turn_event', 'invalid_move_event', 'move_made_event',
+                             'hand_scored_event')
+
+    # Opt-in metrics collected by wrapping a game's event hooks on the instance. A game that was never attached (or
+    # has been detached) runs its own hooks directly, so there is no cost when instrumentation is off. Counting the
+    # valid moves of every turn generates them again outside the strategy, so it is only done with count_moves.
+    def __init__(self, game: ScopaGame, profile_turns: set[int] = None, count_moves: bool = False):
+        self.game = game
+        self.count_moves = count_moves
+        self.profile_turns = set() if profile_turns is None else set(profile_turns)
+        self.profiler = cProfile.Profile() if self.profile_turns else None
+
+        self.turns = 0
+        self.hands = 0
+        self.decision_latency = {}
+        self.invalid_moves = {}
+        self.candidate_moves = {}
+        self.board_sizes = {}
+        self.hand_latency = ScopaLatencyHistogram()
+
+        self.__attached = False
+        self.__turn_player = None
+        self.__turn_start = None
+        self.__hand_start = None
+        self.__profiling = False
+
+    def attach(self) -> 'ScopaGameInstrumentation':
+        if not self.__attached:
+            for event in ScopaGameInstrumentation.__INSTRUMENTED_EVENTS:
+                original = getattr(self.game, event)
+                wrapper = getattr(self, f'_ScopaGameInstrumentation__{event}')
+                setattr(self.game, event, self.__wrap(original, wrapper))
+            self.__attached = True
+        return self
+
+    def detach(self):
+        if self.__attached:
+            for event in ScopaGameInstrumentation.__INSTRUMENTED_EVENTS:
+                delattr(self.game, event)
+            self.__attached = False
+
+    @staticmethod
+    def __wrap(original, wrapper):
+        def instrumented(*args):
+            wrapper(original, *args)
+        return instrumented
+
+    def __new_deck_event(self, original, scores: dict[ScopaPlayer, int]):
+        original(scores)
+        self.__hand_start = time.perf_counter()
+
+    def __begin_player_turn_event(self, original, player: ScopaPlayer):
+        original(player)
+        self.turns += 1
+
+        board_size = self.game.board_mask.bit_count()
+        self.board_sizes[board_size] = self.board_sizes.get(board_size, 0) + 1
+        if self.count_moves:
+            num_moves = len(get_all_valid_move_masks(self.game.board_mask, player.get_hand_mask()))
+            self.candidate_moves[num_moves] = self.candidate_moves.get(num_moves, 0) + 1
+
+        if self.turns in self.profile_turns:
+            self.__profiling = True
+            self.profiler.enable()
+        self.__turn_player = player
+        self.__turn_start = time.perf_counter()
+
+    def __invalid_move_event(self, original, error: ValueError):
+        label = str(self.__turn_player)
+        self.invalid_moves[label] = self.invalid_moves.get(label, 0) + 1
+        original(error)
+
+    def __move_made_event(self, original, move: ScopaMove):
+        if self.__turn_start is not None:
+            elapsed = time.perf_counter() - self.__turn_start
+            if self.__profiling:
+                self.profiler.disable()
+                self.__profiling = False
+            label = (str(self.__turn_player), self.__turn_player.strategy_name())
+            histogram = self.decision_latency.get(label)
+            if histogram is None:
+                histogram = self.decision_latency[label] = ScopaLatencyHistogram()
+            histogram.observe(elapsed)
+            self.__turn_start = None
+        original(move)
+
+    def __hand_scored_event(self, original, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        if self.__hand_start is not None:
+            self.hand_latency.observe(time.perf_counter() - self.__hand_start)
+            self.__hand_start = None
+        self.hands += 1
+        original(hand_score, scores)
+
+    def metrics(self) -> dict:
+        return {
+            'turns': self.turns,
+            'hands': self.hands,
+            'decision_latency': [{'player': player, 'strategy': strategy, **histogram.to_dict()}
+                                 for (player, strategy), histogram in self.decision_latency.items()],
+            'invalid_moves': dict(self.invalid_moves),
+            'candidate_moves': dict(sorted(self.candidate_moves.items())),
+            'board_sizes': dict(sorted(self.board_sizes.items())),
+            'hand_latency': self.hand_latency.to_dict(),
+        }
+
+    def profile_stats(self) -> pstats.Stats:
+        if self.profiler is None:
+            raise ValueError('No turns were selected for profiling')
+        return pstats.Stats(self.profiler)
+
+    def prometheus_text(self) -> str:
+        escape = ScopaGameInstrumentation.__escape
+        lines = ['# HELP scopa_decision_seconds Time from the start of a turn until its move is made',
+                 '# TYPE scopa_decision_seconds histogram']
+        for (player, strategy), histogram in self.decision_latency.items():
+            labels = f'player="{escape(player)}",strategy="{escape(strategy)}"'
+            lines.extend(ScopaGameInstrumentation.__histogram_lines('scopa_decision_seconds', labels, histogram))
+
+        lines.extend(['# HELP scopa_hand_seconds Time to play and score one hand',
+                      '# TYPE scopa_hand_seconds histogram'])
+        lines.extend(ScopaGameInstrumentation.__histogram_lines('scopa_hand_seconds', '', self.hand_latency))
+
+        lines.extend(['# HELP scopa_turns_total Turns played', '# TYPE scopa_turns_total counter',
+                      f'scopa_turns_total {self.turns}'])
+
+        lines.extend(['# HELP scopa_invalid_moves_total Rejected moves that had to be retried',
+                      '# TYPE scopa_invalid_moves_total counter'])
+        for player, count in self.invalid_moves.items():
+            lines.append(f'scopa_invalid_moves_total{{player="{escape(player)}"}} {count}')
+
+        lines.extend(['# HELP scopa_candidate_moves_turns_total Turns by number of valid moves',
+                      '# TYPE scopa_candidate_moves_turns_total counter'])
+        for num_moves, count in sorted(self.candidate_moves.items()):
+            lines.append(f'scopa_candidate_moves_turns_total{{moves="{num_moves}"}} {count}')
+
+        lines.extend(['# HELP scopa_board_size_turns_total Turns by number of cards on the board',
+                      '# TYPE scopa_board_size_turns_total counter'])
+        for board_size, count in sorted(self.board_sizes.items()):
+            lines.append(f'scopa_board_size_turns_total{{size="{board_size}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        with open(path, 'w') as metrics_file:
+            metrics_file.write(self.prometheus_text())
+
+    @staticmethod
+    def __escape(label_value: str) -> str:
+        return label_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @staticmethod
+    def __histogram_lines(name: str, labels: str, histogram: ScopaLatencyHistogram) -> list[str]:
+        lines = []
+        separator = ',' if labels else ''
+        cumulative = 0
+        for bound, count in zip(ScopaLatencyHistogram.BUCKETS, histogram.bucket_counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram.total}' if labels else f'{name}_sum {histogram.total}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}' if labels else f'{name}_count {histogram.count}')
+        return lines
@@ -0,0 +1,139 @@
+import math
+import random
+import time
+
+from scopa.engine import ScopaObservation, ScopaState
+from scopa.strategy import ScopaStrategy
+
+
+class ScopaISMCTSNode:
+
+    __slots__ = ('player', 'children', 'visits', 'reward', 'availability')
+
+    def __init__(self, player: int):
+        # player is the seat whose move led to this node; reward is from that seat's point of view
+        self.player = player
+        self.children = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.availability = 1
+
+
+class ScopaISMCTS:
+
+    GREEDY_ROLLOUTS = 'greedy'
+    RANDOM_ROLLOUTS = 'random'
+    __SUPPORTED_ROLLOUTS = {GREEDY_ROLLOUTS, RANDOM_ROLLOUTS}
+
+    # Single-observer information set MCTS: every iteration deals the unseen cards into a random determinization
+    # consistent with the observation, descends the shared tree restricted to the moves legal in that deal, expands
+    # one node and plays the rest of the hand out with the rollout policy
+    def __init__(self, iterations: int = 1000, time_budget: float = None, exploration: float = 2.0,
+                 rollout: str = GREEDY_ROLLOUTS, workers: int = 1, seed: int = None):
+        if rollout not in ScopaISMCTS.__SUPPORTED_ROLLOUTS:
+            raise ValueError(f'Rollout policy {rollout} not supported. Must be one of {ScopaISMCTS.__SUPPORTED_ROLLOUTS}.')
+        if iterations is None and time_budget is None:
+            raise ValueError('ISMCTS needs an iteration count or a time budget')
+
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rollout = rollout
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.__executor = None
+
+    def choose_move(self, observation: ScopaObservation) -> tuple[int, int]:
+        root_moves = ScopaState.determinize(observation, self.rng).legal_moves()
+        if len(root_moves) == 1:
+            return root_moves[0]
+
+        if self.workers > 1:
+            if self.__executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.__executor = ProcessPoolExecutor(max_workers=self.workers)
+            iterations = None if self.iterations is None else -(-self.iterations // self.workers)
+            futures = [self.__executor.submit(search, observation, iterations, self.time_budget, self.exploration,
+                                              self.rollout, self.rng.getrandbits(64))
+                       for _ in range(self.workers)]
+            root_stats = {}
+            for future in futures:
+                for move, (visits, reward) in future.result().items():
+                    total_visits, total_reward = root_stats.get(move, (0, 0.0))
+                    root_stats[move] = (total_visits + visits, total_reward + reward)
+        else:
+            root_stats = search(observation, self.iterations, self.time_budget, self.exploration, self.rollout,
+                                self.rng.getrandbits(64))
+
+        # Most visited root move, falling back on generation order between equals
+        return max(root_moves, key=lambda move: root_stats.get(move, (0, 0.0)))
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_ScopaISMCTS__executor'] = None
+        return state
+
+
+def search(observation: ScopaObservation, iterations: int = None, time_budget: float = None,
+           exploration: float = 2.0, rollout: str = ScopaISMCTS.GREEDY_ROLLOUTS,
+           seed: int = None) -> dict[tuple[int, int], tuple[int, float]]:
+    rng = random.Random(seed)
+    policy = ScopaStrategy(ScopaStrategy.DEFAULT) if rollout == ScopaISMCTS.GREEDY_ROLLOUTS else None
+    root = ScopaISMCTSNode(-1)
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    iteration = 0
+
+    while (iterations is None or iteration < iterations) and (deadline is None or time.perf_counter() < deadline):
+        iteration += 1
+        state = ScopaState.determinize(observation, rng)
+        node = root
+        path = []
+
+        # Selection and expansion
+        while not state.is_over():
+            moves = state.legal_moves()
+            untried = []
+            for move in moves:
+                child = node.children.get(move)
+                if child is None:
+                    untried.append(move)
+                else:
+                    child.availability += 1
+
+            if untried:
+                move = untried[rng.randrange(len(untried))]
+                child = ScopaISMCTSNode(state.to_move)
+                node.children[move] = child
+                state.play(move)
+                path.append(child)
+                break
+
+            move = max(moves, key=lambda m: __ucb(node.children[m], exploration))
+            node = node.children[move]
+            state.play(move)
+            path.append(node)
+
+        # Rollout
+        while not state.is_over():
+            if policy is None:
+                moves = state.legal_moves()
+                state.play(moves[rng.randrange(len(moves))])
+            else:
+                state.play(policy.make_mask_move(state.board, state.hands[state.to_move]))
+
+        # Backpropagation
+        rewards = state.rewards()
+        for node in path:
+            node.visits += 1
+            node.reward += rewards[node.player]
+
+    return {move: (child.visits, child.reward) for move, child in root.children.items()}
+
+
+def __ucb(node: ScopaISMCTSNode, exploration: float) -> float:
+    return node.reward / node.visits + exploration * math.sqrt(math.log(node.availability) / node.visits)
@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from scopa.server import DEFAULT_PORT
+
+
+class ScopaLoadTestResult:
+
+    def __init__(self, connections: int):
+        self.connections = connections
+        self.games_finished = 0
+        self.games_aborted = 0
+        self.move_latencies = []
+        self.turn_latencies = []
+        self.elapsed = 0.0
+        self.server_before = None
+        self.server_after = None
+
+    @staticmethod
+    def percentile(values: list[float], fraction: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def server_delta(self, key: str) -> float:
+        return self.server_after[key] - self.server_before[key]
+
+    def tables_per_core(self) -> float:
+        # Table-seconds played per second of server CPU: how many tables at this pace one core keeps up with
+        cpu_seconds = self.server_delta('cpu_seconds')
+        return self.server_delta('table_seconds') / cpu_seconds if cpu_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'connections': self.connections,
+            'games_finished': self.games_finished,
+            'games_aborted': self.games_aborted,
+            'elapsed': self.elapsed,
+            'moves': len(self.move_latencies),
+            'move_latency_p50': ScopaLoadTestResult.percentile(self.move_latencies, 0.5),
+            'move_latency_p99': ScopaLoadTestResult.percentile(self.move_latencies, 0.99),
+            'turn_latency_p50': ScopaLoadTestResult.percentile(self.turn_latencies, 0.5),
+            'turn_latency_p99': ScopaLoadTestResult.percentile(self.turn_latencies, 0.99),
+            'server_cpu_seconds': self.server_delta('cpu_seconds'),
+            'server_table_seconds': self.server_delta('table_seconds'),
+            'tables_per_core': self.tables_per_core(),
+        }
+
+
+async def server_stats(host: str, port: int) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'STATS\n')
+    line = (await reader.readline()).decode().split()
+    writer.close()
+    return {key: float(value) for key, value in (field.split('=') for field in line[1:])}
+
+
+async def play_client(host: str, port: int, name: str, result: ScopaLoadTestResult, rng: random.Random,
+                      think_time: float = 0.0):
+    # A simulated player: answers every MOVES prompt with a random index. Move latency runs from sending the answer
+    # until the server announces the move; turn latency until the next prompt, which includes the AI players' turns.
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'JOIN {name}\n'.encode())
+    sent = None
+    prompt = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                result.games_aborted += 1
+                return
+            message, _, payload = line.decode().strip().partition(' ')
+
+            if message == 'MOVES':
+                if sent is not None:
+                    result.turn_latencies.append(time.perf_counter() - sent)
+                turn, *moves = payload.split()
+                prompt = (turn, len(moves))
+                if think_time:
+                    await asyncio.sleep(rng.uniform(0, 2 * think_time))
+                writer.write(f'{turn} {rng.randint(1, len(moves))}\n'.encode())
+                sent = time.perf_counter()
+            elif message == 'ERROR' and prompt is not None:
+                # The answer was rejected and the server is waiting for another
+                writer.write(f'{prompt[0]} {rng.randint(1, prompt[1])}\n'.encode())
+                sent = time.perf_counter()
+            elif message == 'MOVED' and payload.split(' ', 1)[0] == name and sent is not None:
+                result.move_latencies.append(time.perf_counter() - sent)
+            elif message == 'END':
+                result.games_finished += 1
+                return
+            elif message == 'ABORTED':
+                result.games_aborted += 1
+                return
+    finally:
+        writer.close()
+
+
+async def run_load_test(host: str = '127.0.0.1', port: int = DEFAULT_PORT, connections: int = 200,
+                        think_time: float = 0.0, seed: int = 0) -> ScopaLoadTestResult:
+    result = ScopaLoadTestResult(connections)
+    result.server_before = await server_stats(host, port)
+    start = time.perf_counter()
+    await asyncio.gather(*[play_client(host, port, f'load{client}', result, random.Random(seed + client), think_time)
+                           for client in range(connections)])
+    result.elapsed = time.perf_counter() - start
+    result.server_after = await server_stats(host, port)
+    return result
+
+
+def main(args):
+    result = asyncio.run(run_load_test(args.host, args.port, args.connections, args.think_time, args.seed))
+    summary = result.to_dict()
+    print(f'{result.connections} connections: {result.games_finished} games finished, {result.games_aborted} aborted '
+          f'in {result.elapsed:.2f}s')
+    print(f'move latency p50 {summary["move_latency_p50"] * 1000:.2f} ms, '
+          f'p99 {summary["move_latency_p99"] * 1000:.2f} ms ({summary["moves"]} moves)')
+    print(f'turn latency p50 {summary["turn_latency_p50"] * 1000:.2f} ms, '
+          f'p99 {summary["turn_latency_p99"] * 1000:.2f} ms')
+    print(f'server used {summary["server_cpu_seconds"]:.2f} CPU seconds for {summary["server_table_seconds"]:.1f} '
+          f'table-seconds: {summary["tables_per_core"]:.1f} tables per core')
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(summary, json_file, indent=2)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--connections', type=int, default=200, help='simulated players connected at once')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='mean seconds a simulated player waits before answering')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write results to this file')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test a running Scopa server')
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -1,22 +1,33 @@
-from scopa.game.gui import ScopaBoardGui
 from scopa.game.textgame import TextBasedScopaGame
-from scopa.game.guigame import GuiBasedScopaGame
-from player import ScopaPlayer
+from scopa.player import ScopaPlayer
 import argparse
 
 
 def main(args):
-    kenny = ScopaPlayer('Kenny', human=True)
     brenna = ScopaPlayer('Brenna', show_hand=False)
     andreas = ScopaPlayer('Andreas', show_hand=False)
-    players = [kenny, brenna, andreas]
 
-    game = TextBasedScopaGame(players=players) if args.text else GuiBasedScopaGame(ScopaBoardGui(players), players=players)
+    if args.text:
+        kenny = ScopaPlayer('Kenny', human=True)
+        game = TextBasedScopaGame(players=[kenny, brenna, andreas])
+    else:
+        # Tk is only loaded for the GUI, so the text game also runs where tkinter is not installed
+        from scopa.game.gui import ScopaBoardGui
+        from scopa.game.guigame import GuiBasedScopaGame, GuiScopaPlayer
+        gui = ScopaBoardGui()
+        kenny = GuiScopaPlayer('Kenny', gui)
+        game = GuiBasedScopaGame(gui, players=[kenny, brenna, andreas], move_delay=args.move_delay)
 
     game.start_game()
 
 
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--text', action='store_true')
+    parser.add_argument('--move-delay', type=float, default=0.75,
+                        help='seconds the GUI pauses after each computer move')
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('--text', action='store_true')
+    add_arguments(parser)
     main(parser.parse_args())
@@ -1,7 +1,8 @@
 import re
+from typing import Iterable, Iterator
 
-from cards import ScopaCardRank, ScopaCard, ScopaCardSuit
-from strategy import ScopaMove, ScopaMoveType
+from scopa.cards import ALL_CARDS, ScopaCardRank, ScopaCard, ScopaCardSuit, mask_indices
+from scopa.strategy import ScopaMove, ScopaMoveType
 
 __HAND_CARD_GROUP = "hand_card"
 __BOARD_CARDS_GROUP = "board_cards"
@@ -13,6 +14,7 @@ __HAND_CARD_FORMAT = fr'(?P<{__HAND_CARD_GROUP}>{__SCOPA_CARD_FORMAT})'
 __BOARD_CARDS_FORMAT = fr'(?P<{__BOARD_CARDS_GROUP}>{__SCOPA_CARD_FORMAT}(,{__SCOPA_CARD_FORMAT})*)'
 
 __SCOPA_MOVE_FORMAT = fr'{__MOVE_TYPE_FORMAT},{__HAND_CARD_FORMAT}(,{__BOARD_CARDS_FORMAT})?'
+__SCOPA_MOVE_PATTERN = re.compile(__SCOPA_MOVE_FORMAT)
 
 __STR_TO_TYPE = {
     't': ScopaMoveType.TAKE,
@@ -40,10 +42,24 @@ __STR_TO_SUIT = {
     'cl': ScopaCardSuit.CLUBS
 }
 
+# Every accepted (lower case) spelling of a card, e.g. '7co', 'ks' and 'ksw', mapped to its interned card
+__CARD_TOKENS = {rank_str + suit_str: ScopaCard(rank, suit)
+                 for rank_str, rank in __STR_TO_RANK.items() for suit_str, suit in __STR_TO_SUIT.items()}
+
+# Notation written by format_move, indexed by card index
+__SUIT_NOTATION = {
+    ScopaCardSuit.COINS: 'co',
+    ScopaCardSuit.CUPS: 'cu',
+    ScopaCardSuit.SWORDS: 'sw',
+    ScopaCardSuit.CLUBS: 'cl'
+}
+__RANK_NOTATION = {rank: rank_str for rank_str, rank in __STR_TO_RANK.items()}
+__CARD_NOTATION = tuple(__RANK_NOTATION[card.rank()] + __SUIT_NOTATION[card.suit()] for card in ALL_CARDS)
+
 
 def parse_move(move_str: str) -> ScopaMove:
     move_str = move_str.strip()
-    match = re.match(__SCOPA_MOVE_FORMAT, move_str)
+    match = __SCOPA_MOVE_PATTERN.match(move_str)
     if not match:
         raise ValueError('Move string is not valid')
 
@@ -59,6 +75,63 @@ def parse_move(move_str: str) -> ScopaMove:
 
 
 def __parse_card_str(card_str) -> ScopaCard:
-    return ScopaCard(__STR_TO_RANK[card_str[0]], __STR_TO_SUIT[card_str[1:]])
-
-
+    return __CARD_TOKENS[card_str]
+
+
+def parse_moves(lines: Iterable[str], cache_size: int = 65536) -> Iterator[ScopaMove]:
+    # Streams moves from an open file or any iterable of lines, one move per line; blank lines are skipped. Lines are
+    # split on commas and their cards looked up in a token table rather than matched against the pattern, and since
+    # game logs repeat the same moves over and over (moves are immutable) the first cache_size distinct lines are
+    # memoized.
+    parsed = {}
+    for line_number, line in enumerate(lines, 1):
+        move = parsed.get(line)
+        if move is None:
+            move_str = line.strip()
+            if not move_str:
+                continue
+            try:
+                move = __parse_tokens(move_str.lower())
+            except ValueError as ve:
+                raise ValueError(f'Line {line_number}: {ve}') from None
+            if len(parsed) < cache_size:
+                parsed[line] = move
+        yield move
+
+
+def __parse_tokens(move_str: str) -> ScopaMove:
+    move_type_str, _, cards_str = move_str.partition(',')
+    move_type = __STR_TO_TYPE.get(move_type_str)
+    try:
+        cards = [__CARD_TOKENS[card_str] for card_str in cards_str.split(',')]
+    except KeyError:
+        raise ValueError(f'Move string {move_str!r} is not valid') from None
+    if move_type is None:
+        raise ValueError(f'Move string {move_str!r} is not valid')
+    return ScopaMove(move_type, cards[0], board_cards=cards[1:])
+
+
+def format_card(card: ScopaCard) -> str:
+    return __CARD_NOTATION[card.index()]
+
+
+def format_move(move: ScopaMove) -> str:
+    # Lower case ASCII notation that parse_move and parse_moves read back, e.g. 't,7co,3cu,4sw' or 'd,kcl'. Board cards
+    # are written in card index order, so the notation only depends on move.masks().
+    notation = __CARD_NOTATION
+    hand_index, take_mask = move.masks()
+    if not take_mask:
+        return 'd,' + notation[hand_index]
+    return ','.join(['t', notation[hand_index]] + [notation[index] for index in mask_indices(take_mask)])
+
+
+def format_moves(moves: Iterable[ScopaMove], cache_size: int = 65536) -> Iterator[str]:
+    # One newline-terminated line per move, for file.writelines and parse_moves; memoized like parse_moves
+    formatted = {}
+    for move in moves:
+        line = formatted.get(move.masks())
+        if line is None:
+            line = format_move(move) + '\n'
+            if len(formatted) < cache_size:
+                formatted[move.masks()] = line
+        yield line
@@ -1,6 +1,8 @@
-from scopa.cards import ScopaCard, ScopaCardSuit
+from scopa.cards import ScopaCard, ScopaCardSuit, CARD_PRIMES, SEVEN_OF_COINS, mask_to_cards
+from scopa.engine import ScopaObservation
 from scopa.strategy import ScopaStrategy, ScopaMove, get_all_valid_moves
-import moveparser
+from scopa.tracker import ScopaCardTracker
+from scopa import moveparser
 
 
 class ScopaPlayer:
@@ -9,16 +11,24 @@ class ScopaPlayer:
     __SELECT_FROM_LIST = 'select_from_list'
     __SUPPORTED_MOVE_INPUTS = {__TEXT_INPUT, __SELECT_FROM_LIST}
 
-    def __init__(self, name, strategy: str = ScopaStrategy.DEFAULT, human: bool = False, show_hand: bool = True,
-                 move_input: str = __SELECT_FROM_LIST):
-        self.__hand = []
-        self.__captures = set()
-        self.__strategy = ScopaStrategy(strategy)
+    def __init__(self, name, strategy: str | ScopaStrategy = ScopaStrategy.DEFAULT, human: bool = False,
+                 show_hand: bool = True, move_input: str = __SELECT_FROM_LIST, track_cards: bool = False):
+        # The hand is a tuple so it can be handed out without copying
+        self.__hand = ()
+        self.__hand_mask = 0
+        self.__captures = 0
+        self.__strategy = strategy if isinstance(strategy, ScopaStrategy) else ScopaStrategy(strategy)
+        self.__owns_strategy = self.__strategy is not strategy
         self.__name = name
         self.__human = human
         self.__show_hand = show_hand
         self.__coins_captured = 0
+        self.__num_captured = 0
+        self.__best_primes = [0] * len(ScopaCardSuit)
+        self.__prime_total = 0
+        self.__has_seven_of_coins = False
         self.__scopas = 0
+        self.__tracker = ScopaCardTracker() if track_cards else None
 
         if move_input.lower() not in ScopaPlayer.__SUPPORTED_MOVE_INPUTS:
             raise ValueError(f'Unsupported move input selected for player. Must be one of {ScopaPlayer.__SUPPORTED_MOVE_INPUTS}')
@@ -30,9 +40,15 @@ class ScopaPlayer:
     def show_hand(self) -> bool:
         return self.__show_hand
 
-    def make_move(self, scopa_board: list[ScopaCard]) -> ScopaMove:
+    def is_human(self) -> bool:
+        return self.__human
+
+    def wants_observation(self) -> bool:
+        return not self.__human and self.__strategy.needs_observation()
+
+    def make_move(self, scopa_board: list[ScopaCard], observation: ScopaObservation = None) -> ScopaMove:
         if not self.__human:
-            return self.__strategy.make_move(scopa_board, self.__hand)
+            return self.__strategy.make_move(scopa_board, self.__hand, observation=observation, tracker=self.__tracker)
 
         if self.__move_input == ScopaPlayer.__TEXT_INPUT:
             move_input = input('Enter move: ')
@@ -60,22 +76,53 @@ class ScopaPlayer:
     def name(self) -> str:
         return self.__name
 
+    def strategy_name(self) -> str:
+        return 'human' if self.__human else self.__strategy.name()
+
+    def tracker(self) -> ScopaCardTracker:
+        return self.__tracker
+
+    # Closes the strategy if the player made it from a name; a strategy passed in is closed by whoever made it
+    def close(self):
+        if self.__owns_strategy:
+            self.__strategy.close()
+
     def deal_card(self, card: ScopaCard):
-        self.__hand.append(card)
+        self.__hand += (card,)
+        self.__hand_mask |= card.bit()
+        if self.__tracker is not None:
+            self.__tracker.see_card(card)
 
     def remove_hand_card(self, card: ScopaCard):
-        self.__hand.remove(card)
+        position = self.__hand.index(card)
+        self.__hand = self.__hand[:position] + self.__hand[position + 1:]
+        self.__hand_mask &= ~card.bit()
 
     def capture_card(self, card: ScopaCard):
+        if self.__captures & card.bit():
+            return
         if card.suit() == ScopaCardSuit.COINS:
             self.__coins_captured += 1
-        self.__captures.add(card)
+            if card is SEVEN_OF_COINS:
+                self.__has_seven_of_coins = True
+        self.__captures |= card.bit()
+        self.__num_captured += 1
+
+        # Primiera only counts the best card of each suit, so keep the running total as each suit's best improves
+        suit_index = card.index() % len(ScopaCardSuit)
+        prime_points = CARD_PRIMES[card.index()]
+        if prime_points > self.__best_primes[suit_index]:
+            self.__prime_total += prime_points - self.__best_primes[suit_index]
+            self.__best_primes[suit_index] = prime_points
 
     def capture_cards(self, cards: list[ScopaCard]):
         for card in cards:
             self.capture_card(card)
 
     def get_captured_cards(self) -> set[ScopaCard]:
+        return set(mask_to_cards(self.__captures))
+
+    def get_captured_mask(self) -> int:
         return self.__captures
 
     def add_scopa(self):
@@ -87,14 +134,36 @@ class ScopaPlayer:
     def get_num_coins_captured(self) -> int:
         return self.__coins_captured
 
+    def get_num_captured(self) -> int:
+        return self.__num_captured
+
+    def get_prime_total(self) -> int:
+        return self.__prime_total
+
+    def has_seven_of_coins(self) -> bool:
+        return self.__has_seven_of_coins
+
     def reset(self):
-        self.__hand = []
-        self.__captures = set()
+        self.__hand = ()
+        self.__hand_mask = 0
+        self.__captures = 0
         self.__coins_captured = 0
+        self.__num_captured = 0
+        self.__best_primes = [0] * len(ScopaCardSuit)
+        self.__prime_total = 0
+        self.__has_seven_of_coins = False
         self.__scopas = 0
+        if self.__tracker is not None:
+            self.__tracker.reset()
+
+    def get_hand(self) -> tuple[ScopaCard, ...]:
+        return self.__hand
+
+    def get_hand_mask(self) -> int:
+        return self.__hand_mask
 
-    def get_hand(self) -> list[ScopaCard]:
-        return list(self.__hand)
+    def has_card(self, card: ScopaCard) -> bool:
+        return bool(self.__hand_mask & card.bit())
 
     def __str__(self):
         return self.__name
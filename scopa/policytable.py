@@ -0,0 +1,265 @@
+from array import array
+from bisect import bisect_left
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+from scopa.cards import ScopaCard, ALL_CARDS, CARD_RANKS
+from scopa.strategy import ScopaMove, ScopaMoveType, ScopaStrategy, get_all_valid_move_masks, load_weights_profile
+
+# The table covers the positions of a fresh deal: a full opening board and a full hand
+BOARD_SIZE = 4
+HAND_SIZE = 3
+
+POLICY_TABLE_MAGIC = b'SCPOLICY'
+POLICY_TABLE_VERSION = 1
+
+# Magic, then version, length of the weights JSON and number of records. The weights JSON follows, padded to a
+# multiple of 8 bytes so the records that come after it can be read in place as an array of uint64.
+POLICY_TABLE_HEADER = struct.Struct('<8sIIQ')
+POLICY_RECORD_BYTES = 8
+
+# Bits per card index in a record key
+__CARD_BITS = 6
+
+
+# Scoring only looks at ranks, coins and the seven of coins, so two positions that differ by swapping the suits of
+# non-coin cards of the same rank have the same moves with the same scores. The canonical form keeps coins where
+# they are and, rank by rank, moves the board's other cards into the lowest non-coin suits (cups, then swords, then
+# clubs) and the hand's into the suits after those. Returns the canonical board and hand card indices, each sorted,
+# and the actual card behind every canonical index.
+def canonicalize(scopa_board: tuple[ScopaCard, ...], hand: tuple[ScopaCard, ...]) \
+        -> tuple[list[int], list[int], dict[int, ScopaCard]]:
+    next_suit = [1] * 10
+    cards = {}
+    board_indices = []
+    for card in scopa_board:
+        index = card.index()
+        if index & 3:
+            rank = index >> 2
+            index = (rank << 2) | next_suit[rank]
+            next_suit[rank] += 1
+        cards[index] = card
+        board_indices.append(index)
+    hand_indices = []
+    for card in hand:
+        index = card.index()
+        if index & 3:
+            rank = index >> 2
+            index = (rank << 2) | next_suit[rank]
+            next_suit[rank] += 1
+        cards[index] = card
+        hand_indices.append(index)
+    board_indices.sort()
+    hand_indices.sort()
+    return board_indices, hand_indices, cards
+
+
+def canonical_masks(board_mask: int, hand_mask: int) -> tuple[int, int]:
+    board_indices, hand_indices, _ = canonicalize(tuple(card for card in ALL_CARDS if board_mask & card.bit()),
+                                                  tuple(card for card in ALL_CARDS if hand_mask & card.bit()))
+    return sum(1 << index for index in board_indices), sum(1 << index for index in hand_indices)
+
+
+def position_key(board_indices: list[int], hand_indices: list[int]) -> int:
+    # The sorted canonical card indices, board first, 6 bits each; sorting keys sorts positions board by board
+    key = 0
+    for index in board_indices:
+        key = (key << __CARD_BITS) | index
+    for index in hand_indices:
+        key = (key << __CARD_BITS) | index
+    return key
+
+
+class ScopaPolicyTable:
+
+    # A built table opened read-only through mmap, so processes opening the same file share its pages and nothing is
+    # read until looked up. Records are uint64s sorted by position key: the key, then one byte holding the position of
+    # the chosen hand card in the sorted canonical hand (high nibble) and which sorted canonical board cards it takes
+    # (low nibble). Positions are only stored when the strategy's choice does not depend on card order.
+    def __init__(self, path: str):
+        if sys.byteorder != 'little':
+            raise ValueError('Policy tables can only be read on little-endian machines')
+        self.path = path
+        with open(path, 'rb') as table_file:
+            self.__mmap = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.__mmap) < POLICY_TABLE_HEADER.size:
+            raise ValueError(f'{path} is not a policy table')
+        magic, version, weights_length, num_records = POLICY_TABLE_HEADER.unpack_from(self.__mmap)
+        if magic != POLICY_TABLE_MAGIC or version != POLICY_TABLE_VERSION:
+            raise ValueError(f'{path} is not a version {POLICY_TABLE_VERSION} policy table')
+        records_offset = POLICY_TABLE_HEADER.size + weights_length + -weights_length % POLICY_RECORD_BYTES
+        if len(self.__mmap) != records_offset + num_records * POLICY_RECORD_BYTES:
+            raise ValueError(f'{path} is truncated')
+        self.weights = json.loads(self.__mmap[POLICY_TABLE_HEADER.size:POLICY_TABLE_HEADER.size + weights_length])
+        self.__records = memoryview(self.__mmap)[records_offset:].cast('Q')
+
+    def __len__(self):
+        return len(self.__records)
+
+    def lookup(self, scopa_board: tuple[ScopaCard, ...], hand: tuple[ScopaCard, ...]) -> ScopaMove:
+        # The stored move for this position with its board cards in board order, or None if it is not in the table
+        if len(scopa_board) != BOARD_SIZE or len(hand) != HAND_SIZE:
+            return None
+        board_indices, hand_indices, cards = canonicalize(scopa_board, hand)
+        key = position_key(board_indices, hand_indices) << 8
+        records = self.__records
+        position = bisect_left(records, key)
+        if position == len(records) or records[position] >> 8 != key >> 8:
+            return None
+        move = records[position] & 0xFF
+        hand_card = cards[hand_indices[move >> 4]]
+        if not move & 0xF:
+            return ScopaMove(ScopaMoveType.DISCARD, hand_card)
+        taken = [cards[board_indices[i]] for i in range(BOARD_SIZE) if move >> i & 1]
+        return ScopaMove(ScopaMoveType.TAKE, hand_card, [card for card in scopa_board if card in taken])
+
+    def close(self):
+        self.__records.release()
+        self.__mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __reduce__(self):
+        # Worker processes reopen the file rather than receive a copy of it
+        return ScopaPolicyTable, (self.path,)
+
+
+# A canonical card may join a canonical position if it is not already there and, unless it is a coin or a cup, the
+# card of the same rank one suit below is (non-coin suits fill in order)
+def __fits(mask: int, index: int) -> bool:
+    return not mask >> index & 1 and (index & 3 <= 1 or mask >> (index - 1) & 1)
+
+
+def __canonical_sets(mask: int, start: int, size: int):
+    # Masks of the canonical sets of size cards (all indices at least start) that can be added to mask, in increasing
+    # order of their sorted indices
+    for index in range(start, len(ALL_CARDS)):
+        if __fits(mask, index):
+            if size == 1:
+                yield mask | (1 << index)
+            else:
+                yield from __canonical_sets(mask | (1 << index), index + 1, size - 1)
+
+
+def canonical_boards() -> list[int]:
+    return list(__canonical_sets(0, 0, BOARD_SIZE))
+
+
+def canonical_hands(board_mask: int) -> list[int]:
+    return [mask ^ board_mask for mask in __canonical_sets(board_mask, 0, HAND_SIZE)]
+
+
+def __encode_move(board_mask: int, hand_mask: int, hand_index: int, take_mask: int) -> int:
+    board_indices = [index for index in range(len(ALL_CARDS)) if board_mask >> index & 1]
+    hand_position = sum(1 for index in range(hand_index) if hand_mask >> index & 1)
+    return (hand_position << 4) | sum(1 << i for i, index in enumerate(board_indices) if take_mask >> index & 1)
+
+
+def __chosen_move(strategy: ScopaStrategy, board_mask: int, hand_mask: int) -> tuple[int, int]:
+    # The strategy's move if it is the only best one, else None. Tied moves are broken by card order, which the
+    # canonical form throws away, so those positions are left to the live strategy. A discard also depends on card
+    # order when another card in hand has the same rank (only the first of them gets the discard weights).
+    moves = get_all_valid_move_masks(board_mask, hand_mask, cache=None)
+    if len(moves) == 1:
+        return moves[0]
+    scores = strategy.get_move_scores(board_mask, moves)
+    best_score = max(scores)
+    if scores.count(best_score) > 1:
+        return None
+    hand_index, take_mask = moves[scores.index(best_score)]
+    if not take_mask and any(CARD_RANKS[other] == CARD_RANKS[hand_index]
+                             for other, _ in moves if other != hand_index):
+        return None
+    return hand_index, take_mask
+
+
+def policy_records(board_masks: list[int], weights: dict[str, float]) -> tuple[bytes, int]:
+    # Records for every canonical position on the given boards (in order), and the number of positions visited
+    strategy = ScopaStrategy(weights=weights)
+    records = array('Q')
+    num_positions = 0
+    for board_mask in board_masks:
+        board_indices = [index for index in range(len(ALL_CARDS)) if board_mask >> index & 1]
+        for hand_mask in canonical_hands(board_mask):
+            num_positions += 1
+            move = __chosen_move(strategy, board_mask, hand_mask)
+            if move is None:
+                continue
+            hand_indices = [index for index in range(len(ALL_CARDS)) if hand_mask >> index & 1]
+            records.append((position_key(board_indices, hand_indices) << 8) |
+                           __encode_move(board_mask, hand_mask, *move))
+    if sys.byteorder != 'little':
+        records.byteswap()
+    return records.tobytes(), num_positions
+
+
+def build_policy_table(path: str, weights: dict[str, float] = None, max_boards: int = None, workers: int = 1,
+                       chunk_size: int = 50) -> tuple[int, int]:
+    # Writes the table for the first max_boards canonical boards (all of them by default) and returns the number of
+    # positions visited and of records written. Boards are enumerated in key order, so chunks concatenated in order
+    # are already sorted.
+    weights = {**ScopaStrategy.DEFAULT_WEIGHTS, **({} if weights is None else weights)}
+    boards = canonical_boards()[:max_boards]
+    chunks = [boards[start:start + chunk_size] for start in range(0, len(boards), chunk_size)]
+    weights_json = json.dumps(weights, sort_keys=True).encode()
+    num_positions = 0
+    num_records = 0
+    with open(path, 'wb') as table_file:
+        table_file.write(POLICY_TABLE_HEADER.pack(POLICY_TABLE_MAGIC, POLICY_TABLE_VERSION, len(weights_json), 0))
+        table_file.write(weights_json + b' ' * (-len(weights_json) % POLICY_RECORD_BYTES))
+        if workers == 1:
+            results = (policy_records(chunk, weights) for chunk in chunks)
+            num_positions, num_records = __write_records(table_file, results)
+        else:
+            # Loaded here so single-process builds do not pay for importing multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(policy_records, chunks, [weights] * len(chunks))
+                num_positions, num_records = __write_records(table_file, results)
+        table_file.seek(0)
+        # The record count is only known once every chunk has been written
+        table_file.write(POLICY_TABLE_HEADER.pack(POLICY_TABLE_MAGIC, POLICY_TABLE_VERSION, len(weights_json),
+                                                  num_records))
+    return num_positions, num_records
+
+
+def __write_records(table_file, results) -> tuple[int, int]:
+    num_positions = 0
+    num_records = 0
+    for records, chunk_positions in results:
+        table_file.write(records)
+        num_positions += chunk_positions
+        num_records += len(records) // POLICY_RECORD_BYTES
+    return num_positions, num_records
+
+
+def main(args):
+    weights = load_weights_profile(args.profile) if args.profile else None
+    start = time.perf_counter()
+    num_positions, num_records = build_policy_table(args.output, weights, max_boards=args.max_boards,
+                                                    workers=args.workers, chunk_size=args.chunk_size)
+    print(f'Stored {num_records} of {num_positions} canonical positions in {args.output} '
+          f'({os.path.getsize(args.output) / 2 ** 20:.1f} MiB) in {time.perf_counter() - start:.1f}s')
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('output', help='table file to write')
+    parser.add_argument('--profile', help='build for the weights in this profile rather than the DEFAULT weights')
+    parser.add_argument('--max-boards', type=int, help='only cover the first this many canonical boards')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=50, help='canonical boards per work item')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    main(parser.parse_args())
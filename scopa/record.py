@@ -0,0 +1,259 @@
+import struct
+from typing import BinaryIO, Iterator
+
+from scopa.cards import ALL_CARDS, CARD_RANKS, ScopaCard, cards_to_mask, mask_indices
+from scopa.engine import ScopaObservation
+from scopa.game.basegame import ScopaGame
+from scopa.game.headlessgame import HeadlessScopaGame
+from scopa.player import ScopaPlayer
+from scopa.simulation import ScopaGameResult
+from scopa.strategy import ScopaMove, ScopaMoveType
+
+RECORD_MAGIC = b'SCPR'
+RECORD_VERSION = 2
+
+RECORD_FILE_HEADER = struct.Struct(f'<{len(RECORD_MAGIC)}sB')
+
+# Game header flag: the deal order of every hand is stored. Otherwise the game was shuffled by a seeded ScopaGame and
+# replaying it with the same seed deals the same cards again.
+RECORD_DEALS = 0x01
+
+# A move is one byte: bits 0-1 the position of the played card in the player's hand, bits 2-7 zero for a discard or
+# one more than the index of the taken set among the board subsets adding up to the card's rank (see take_options)
+MAX_RECORDED_HAND_SIZE = 4
+__HAND_SLOT_BITS = 0x03
+__OPTION_SHIFT = 2
+__MAX_OPTIONS = 0xFF >> __OPTION_SHIFT
+
+
+class ScopaGameRecord:
+
+    # Seed, flags, players, hand size, board size, winning score, hands; then per hand the 40-byte deal (only with
+    # RECORD_DEALS), a move count and one byte per move; then one byte per player for the final scores. deals is None
+    # for a game replayed from its seed.
+    __GAME_HEADER = struct.Struct('<QBBBBBB')
+    __MOVE_COUNT = struct.Struct('<H')
+
+    def __init__(self, seed: int, num_players: int, hand_size: int, board_size: int, winning_score: int,
+                 deals: list[bytes] = None, moves: list[list[int]] = None, final_scores: tuple[int, ...] = None):
+        self.seed = seed
+        self.num_players = num_players
+        self.hand_size = hand_size
+        self.board_size = board_size
+        self.winning_score = winning_score
+        self.deals = deals
+        self.moves = [] if moves is None else moves
+        self.final_scores = final_scores
+
+    def to_bytes(self) -> bytes:
+        flags = 0 if self.deals is None else RECORD_DEALS
+        parts = [ScopaGameRecord.__GAME_HEADER.pack(self.seed & 0xFFFFFFFFFFFFFFFF, flags, self.num_players,
+                                                    self.hand_size, self.board_size, self.winning_score,
+                                                    len(self.moves))]
+        for hand_number, hand_moves in enumerate(self.moves):
+            if self.deals is not None:
+                parts.append(self.deals[hand_number])
+            parts.append(ScopaGameRecord.__MOVE_COUNT.pack(len(hand_moves)))
+            parts.append(bytes(hand_moves))
+        parts.append(bytes(self.final_scores))
+        return b''.join(parts)
+
+    @staticmethod
+    def read(stream: BinaryIO) -> 'ScopaGameRecord':
+        header = stream.read(ScopaGameRecord.__GAME_HEADER.size)
+        if not header:
+            return None
+        seed, flags, num_players, hand_size, board_size, winning_score, num_hands = \
+            ScopaGameRecord.__GAME_HEADER.unpack(header)
+        record = ScopaGameRecord(seed, num_players, hand_size, board_size, winning_score,
+                                 deals=[] if flags & RECORD_DEALS else None)
+        for _ in range(num_hands):
+            if record.deals is not None:
+                record.deals.append(stream.read(len(ALL_CARDS)))
+            move_count, = ScopaGameRecord.__MOVE_COUNT.unpack(stream.read(ScopaGameRecord.__MOVE_COUNT.size))
+            record.moves.append(list(stream.read(move_count)))
+        record.final_scores = tuple(stream.read(num_players))
+        return record
+
+
+def take_options(board_mask: int, hand_index: int) -> list[int]:
+    # Every set of board cards adding up to the hand card's rank, by size and then by card index
+    board_indices = mask_indices(board_mask)
+    target = CARD_RANKS[hand_index]
+    options = []
+    chosen = []
+
+    def extend(start: int, total: int):
+        for i in range(start, len(board_indices)):
+            option_sum = total + CARD_RANKS[board_indices[i]]
+            if option_sum > target:
+                continue
+            chosen.append(1 << board_indices[i])
+            if option_sum == target:
+                options.append(sum(chosen))
+            else:
+                extend(i + 1, option_sum)
+            chosen.pop()
+
+    extend(0, 0)
+    options.sort(key=int.bit_count)
+    return options
+
+
+def encode_move(move: ScopaMove, board_mask: int, hand: tuple[ScopaCard, ...]) -> int:
+    hand_slot = hand.index(move.hand_card())
+    if move.move_type() == ScopaMoveType.DISCARD:
+        return hand_slot
+    hand_index, take_mask = move.masks()
+    option = take_options(board_mask, hand_index).index(take_mask) + 1
+    if option > __MAX_OPTIONS:
+        raise ValueError(f'Cannot record a take that is option {option} of its card; at most {__MAX_OPTIONS} fit')
+    return hand_slot | (option << __OPTION_SHIFT)
+
+
+def decode_move(encoded: int, board_mask: int, hand: tuple[ScopaCard, ...]) -> ScopaMove:
+    hand_index = hand[encoded & __HAND_SLOT_BITS].index()
+    option = encoded >> __OPTION_SHIFT
+    if not option:
+        return ScopaMove.from_masks(hand_index, 0)
+    return ScopaMove.from_masks(hand_index, take_options(board_mask, hand_index)[option - 1])
+
+
+class ScopaRecordWriter:
+
+    # Appends game records to a file, writing the file header only when the file is new or empty
+    def __init__(self, path: str):
+        self.path = path
+        self.__file = open(path, 'ab')
+        if self.__file.tell() == 0:
+            self.__file.write(RECORD_FILE_HEADER.pack(RECORD_MAGIC, RECORD_VERSION))
+
+    def write(self, record: ScopaGameRecord):
+        self.__file.write(record.to_bytes())
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_records(path: str) -> Iterator[ScopaGameRecord]:
+    with open(path, 'rb') as record_file:
+        magic, version = RECORD_FILE_HEADER.unpack(record_file.read(RECORD_FILE_HEADER.size))
+        if magic != RECORD_MAGIC or version != RECORD_VERSION:
+            raise ValueError(f'{path} is not a version {RECORD_VERSION} Scopa record file')
+        while True:
+            record = ScopaGameRecord.read(record_file)
+            if record is None:
+                return
+            yield record
+
+
+class ScopaGameRecorder:
+
+    __RECORDED_EVENTS = ('new_deck_event', 'dealing_players_event', 'begin_player_turn_event', 'move_made_event',
+                         'ending_event')
+
+    # Records a game by wrapping its event hooks on the instance, in the same way as ScopaGameInstrumentation, and
+    # hands the finished record to the writer (if any) when the game ends
+    def __init__(self, game: ScopaGame, writer: ScopaRecordWriter = None):
+        self.game = game
+        self.writer = writer
+        self.record = None
+        self.__players = None
+        self.__deal_pending = False
+        self.__board_mask = 0
+        self.__hand = ()
+
+    def attach(self) -> 'ScopaGameRecorder':
+        for event in ScopaGameRecorder.__RECORDED_EVENTS:
+            original = getattr(self.game, event)
+            recorder = getattr(self, f'_ScopaGameRecorder__{event}')
+            setattr(self.game, event, ScopaGameRecorder.__wrap(original, recorder))
+        return self
+
+    def detach(self):
+        for event in ScopaGameRecorder.__RECORDED_EVENTS:
+            delattr(self.game, event)
+
+    @staticmethod
+    def __wrap(original, recorder):
+        def recorded(*args):
+            recorder(*args)
+            original(*args)
+        return recorded
+
+    def __new_deck_event(self, scores: dict[ScopaPlayer, int]):
+        if self.record is None:
+            game = self.game
+            if game.hand_size > MAX_RECORDED_HAND_SIZE:
+                raise ValueError(f'Records store hand positions in 2 bits, so hands of more than '
+                                 f'{MAX_RECORDED_HAND_SIZE} cards cannot be recorded')
+            self.__players = list(game.players)
+            # A seeded game that shuffles for itself deals the same cards when replayed with its seed, so its deals
+            # are left out of the record
+            seeded = game.seed is not None and 0 <= game.seed <= 0xFFFFFFFFFFFFFFFF and not game.deck.has_deals()
+            self.record = ScopaGameRecord(game.seed if seeded else 0, len(game.players), game.hand_size,
+                                          game.board_size, game.winning_score, deals=None if seeded else [])
+        self.__deal_pending = True
+
+    def __dealing_players_event(self, dealer: ScopaPlayer):
+        # The deck has been shuffled and the board dealt by the first deal of each hand
+        if self.__deal_pending:
+            if self.record.deals is not None:
+                self.record.deals.append(bytes(self.game.deck.order()))
+            self.record.moves.append([])
+            self.__deal_pending = False
+
+    def __begin_player_turn_event(self, player: ScopaPlayer):
+        self.__board_mask = self.game.board_mask
+        self.__hand = player.get_hand()
+
+    def __move_made_event(self, move: ScopaMove):
+        self.record.moves[-1].append(encode_move(move, self.__board_mask, self.__hand))
+
+    def __ending_event(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
+        self.record.final_scores = tuple(scores[player] for player in self.__players)
+        if self.writer is not None:
+            self.writer.write(self.record)
+
+
+class ScopaReplayPlayer(ScopaPlayer):
+
+    # Plays back recorded moves instead of asking a strategy; all players of a game share one move stream
+    def __init__(self, name: str, moves: Iterator[int]):
+        super().__init__(name, show_hand=False)
+        self.__moves = moves
+
+    def wants_observation(self) -> bool:
+        return False
+
+    def make_move(self, scopa_board: list[ScopaCard], observation: ScopaObservation = None) -> ScopaMove:
+        return decode_move(next(self.__moves), cards_to_mask(scopa_board), self.get_hand())
+
+
+def replay_game(record: ScopaGameRecord) -> ScopaGameResult:
+    moves = (move for hand_moves in record.moves for move in hand_moves)
+    players = [ScopaReplayPlayer(f'Player {seat + 1}', moves) for seat in range(record.num_players)]
+    seats = {player: seat for seat, player in enumerate(players)}
+
+    game = HeadlessScopaGame(players=list(players), winning_score=record.winning_score, hand_size=record.hand_size,
+                             board_size=record.board_size, seed=record.seed,
+                             deals=None if record.deals is None else iter(record.deals))
+    winners = game.start_game()
+
+    return ScopaGameResult(record.seed,
+                           tuple(game.final_scores[player] for player in players),
+                           tuple(sorted(seats[winner] for winner in winners)),
+                           [hand_score.relabel(seats) for hand_score in game.hand_scores])
+
+
+def verify_record(record: ScopaGameRecord) -> bool:
+    return replay_game(record).final_scores == record.final_scores
@@ -0,0 +1,61 @@
+from scopa.player import ScopaPlayer
+
+
+class ScopaHandScore:
+
+    SCOPA = 'scopa'
+    CARDS = 'cards'
+    COINS = 'coins'
+    SEVEN_OF_COINS = 'seven_of_coins'
+    PRIMES = 'primes'
+    CATEGORIES = (SCOPA, CARDS, COINS, SEVEN_OF_COINS, PRIMES)
+
+    def __init__(self, scopas: dict, most_cards, most_coins, seven_of_coins, highest_primes):
+        self.scopas = scopas
+        self.most_cards = most_cards
+        self.most_coins = most_coins
+        self.seven_of_coins = seven_of_coins
+        self.highest_primes = highest_primes
+
+    def awards(self) -> list[tuple[str, object, int]]:
+        # (category, winner, points) in the order points are announced
+        awards = [(ScopaHandScore.SCOPA, player, count) for player, count in self.scopas.items()]
+        awards.append((ScopaHandScore.CARDS, self.most_cards, 1))
+        awards.append((ScopaHandScore.COINS, self.most_coins, 1))
+        if self.seven_of_coins is not None:
+            awards.append((ScopaHandScore.SEVEN_OF_COINS, self.seven_of_coins, 1))
+        awards.append((ScopaHandScore.PRIMES, self.highest_primes, 1))
+        return awards
+
+    def points(self) -> dict:
+        points = {player: 0 for player in self.scopas}
+        for _, player, award_points in self.awards():
+            points[player] += award_points
+        return points
+
+    def relabel(self, labels: dict) -> 'ScopaHandScore':
+        return ScopaHandScore({labels[player]: count for player, count in self.scopas.items()},
+                              labels[self.most_cards],
+                              labels[self.most_coins],
+                              None if self.seven_of_coins is None else labels[self.seven_of_coins],
+                              labels[self.highest_primes])
+
+
+# Ties for a category go to the earliest player in turn order
+def score_hand(players: list[ScopaPlayer]) -> ScopaHandScore:
+    seven_of_coins = None
+    for player in players:
+        if player.has_seven_of_coins():
+            seven_of_coins = player
+            break
+
+    return ScopaHandScore({player: player.get_scopa_count() for player in players},
+                          max(players, key=ScopaPlayer.get_num_captured),
+                          max(players, key=ScopaPlayer.get_num_coins_captured),
+                          seven_of_coins,
+                          max(players, key=ScopaPlayer.get_prime_total))
+
+
+# Points each player would get if the hand ended now, for strategies looking ahead mid-hand
+def projected_hand_points(players: list[ScopaPlayer]) -> dict[ScopaPlayer, int]:
+    return score_hand(players).points()
@@ -0,0 +1,416 @@
+import argparse
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scopa.cards import ScopaCard
+from scopa.engine import ScopaObservation
+from scopa.game.basegame import ScopaGame
+from scopa.game.sinks import ScopaEventSink, ScopaJsonLinesEventSink, ScopaNullEventSink
+from scopa.player import ScopaPlayer
+from scopa.scoring import ScopaHandScore
+from scopa.strategy import ScopaMove, ScopaStrategy, get_all_valid_moves
+from scopa import moveparser
+
+# Line protocol (UTF-8, one message per line). A client opens with "JOIN <name>" to be seated at the next table, or
+# "STATS" for a one-line server summary. Seated clients receive:
+#   TABLE <id> <player> ...        seating, in turn order
+#   DEAL <dealer>                  new cards are being dealt
+#   TURN <player>                  <player> is to move
+#   BOARD <card> ... / HAND <card> ...
+#   MOVES <turn> <move> ...        sent only to the player to move; it answers "<turn> <answer>", where the answer is
+#                                  a 1-based index into this list or a move in moveparser notation (e.g.
+#                                  "t,7co,3cu,4sw"). Answers for any other turn are ignored.
+#   ERROR <message>                the answer was rejected; answer again
+#   TIMEOUT <turn>                 no answer came in time and the player's strategy moved for them
+#   MOVED <player> <move>          a move was made (cards and moves use moveparser notation)
+#   SCOPA <player> / SWEEP <player> <card> ...
+#   SCORES <player>=<score> ...    running totals, at the start of each hand and after it is scored
+#   END <winner> ...               the game is over and the connection is closed
+#   ABORTED <reason>               the table stopped early (a player disconnected or the server is shutting down)
+
+DEFAULT_PORT = 7777
+
+
+class ScopaConnection:
+
+    # One client socket. Reads happen on the event loop; game threads send through the loop so writes stay ordered.
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, loop: asyncio.AbstractEventLoop):
+        self.reader = reader
+        self.writer = writer
+        self.loop = loop
+        self.name = None
+        self.watch = None
+        self.finished = asyncio.Event()
+
+    def send(self, line: str):
+        self.loop.call_soon_threadsafe(self.writer.write, (line + '\n').encode())
+
+    async def read_line(self) -> str:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError(f'{self.name} disconnected')
+        return line.decode().strip()
+
+    def read_line_blocking(self, timeout: float = None) -> str:
+        # For game threads: waits on the event loop without blocking it
+        read = self.read_line() if timeout is None else asyncio.wait_for(self.read_line(), timeout)
+        return asyncio.run_coroutine_threadsafe(read, self.loop).result()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.writer.close)
+
+
+class NetworkScopaPlayer(ScopaPlayer):
+
+    # A human player whose moves arrive over a ScopaConnection. If move_timeout passes without a valid answer the
+    # player's strategy moves for them.
+    def __init__(self, name: str, connection: ScopaConnection, strategy: str = ScopaStrategy.DEFAULT,
+                 move_timeout: float = None):
+        super().__init__(name, strategy=strategy, human=True, show_hand=False)
+        self.connection = connection
+        self.move_timeout = move_timeout
+        self.__timeout_strategy = ScopaStrategy(strategy)
+        self.__turns = itertools.count(1)
+
+    def make_move(self, scopa_board: list[ScopaCard], observation: ScopaObservation = None) -> ScopaMove:
+        hand = self.get_hand()
+        moves = get_all_valid_moves(scopa_board, hand)
+        self.connection.send('BOARD ' + ' '.join(moveparser.format_card(card) for card in scopa_board))
+        self.connection.send('HAND ' + ' '.join(moveparser.format_card(card) for card in hand))
+        # Prompts are numbered so that an answer arriving after its turn timed out is not taken for the next turn's
+        turn = str(next(self.__turns))
+        self.connection.send(f'MOVES {turn} ' + ' '.join(moveparser.format_move(move) for move in moves))
+
+        deadline = None if self.move_timeout is None else time.monotonic() + self.move_timeout
+        while True:
+            try:
+                line = self.connection.read_line_blocking(
+                    None if deadline is None else max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.connection.send(f'TIMEOUT {turn}')
+                return self.__timeout_strategy.make_move(scopa_board, hand)
+            answer_turn, _, answer = line.partition(' ')
+            if answer_turn.isdigit() and answer_turn != turn:
+                continue
+            try:
+                if answer_turn != turn:
+                    raise ValueError('Answers must start with the turn number from MOVES')
+                return NetworkScopaPlayer.__select_move(answer.strip(), moves)
+            except ValueError as ve:
+                self.connection.send(f'ERROR {ve}')
+
+    def close(self):
+        super().close()
+        self.__timeout_strategy.close()
+
+    @staticmethod
+    def __select_move(answer: str, moves: list[ScopaMove]) -> ScopaMove:
+        if answer.isdigit():
+            index = int(answer)
+            if not 1 <= index <= len(moves):
+                raise ValueError(f'Move index must be between 1 and {len(moves)}')
+            return moves[index - 1]
+
+        # Match on masks so the game always gets one of its own valid moves
+        move_masks = moveparser.parse_move(answer).masks()
+        for move in moves:
+            if move.masks() == move_masks:
+                return move
+        raise ValueError(f'{answer} is not a valid move')
+
+
+class ServerScopaGame(ScopaGame):
+
+    # Runs on a game thread and relays its events to every connected player at the table, and to sink (e.g. a game
+    # log) if one is given
+    def __init__(self, table_id: int, connections: list[ScopaConnection], players: list[ScopaPlayer] = None,
+                 winning_score: int = 11, hand_size: int = 3, board_size: int = 4, seed: int = None,
+                 sink: ScopaEventSink = None):
+        super().__init__(players=players, winning_score=winning_score, hand_size=hand_size, board_size=board_size,
+                         seed=seed)
+        self.table_id = table_id
+        self.connections = connections
+        self.sink = ScopaNullEventSink() if sink is None else sink
+        self.__turn_player = None
+        self.__seated = False
+
+    def broadcast(self, line: str):
+        for connection in self.connections:
+            connection.send(line)
+
+    def abort(self, reason: str):
+        self.broadcast(f'ABORTED {reason}')
+        self.sink.aborted(reason)
+
+    def new_deck_event(self, scores: dict[ScopaPlayer, int]):
+        if not self.__seated:
+            self.__seated = True
+            self.broadcast(f'TABLE {self.table_id} ' + ' '.join(str(player) for player in self.players))
+        self.broadcast(ServerScopaGame.__scores_line(scores))
+        self.sink.new_deck(scores)
+
+    def dealing_players_event(self, dealer: ScopaPlayer):
+        self.broadcast(f'DEAL {dealer}')
+        self.sink.dealing_players(dealer)
+
+    def begin_player_turn_event(self, player: ScopaPlayer):
+        self.__turn_player = player
+        self.broadcast(f'TURN {player}')
+        self.sink.begin_player_turn(player, self.board)
+
+    def invalid_move_event(self, error: ValueError):
+        if isinstance(self.__turn_player, NetworkScopaPlayer):
+            self.__turn_player.connection.send(f'ERROR {error}')
+        self.sink.invalid_move(error)
+
+    def move_made_event(self, move: ScopaMove):
+        self.broadcast(f'MOVED {self.__turn_player} {moveparser.format_move(move)}')
+        self.sink.move_made(move)
+
+    def scopa_event(self):
+        self.broadcast(f'SCOPA {self.__turn_player}')
+        self.sink.scopa()
+
+    def post_move_event(self, player: ScopaPlayer):
+        self.sink.post_move(player)
+
+    def end_of_deal_event(self):
+        self.sink.end_of_deal()
+
+    def last_capture_event(self, player: ScopaPlayer, cards: list[ScopaCard]):
+        self.broadcast(f'SWEEP {player} ' + ' '.join(moveparser.format_card(card) for card in cards))
+        self.sink.last_capture(player, cards)
+
+    def hand_scored_event(self, hand_score: ScopaHandScore, scores: dict[ScopaPlayer, int]):
+        self.broadcast(ServerScopaGame.__scores_line(scores))
+        self.sink.hand_scored(hand_score, scores)
+
+    def ending_event(self, winners: list[ScopaPlayer], scores: dict[ScopaPlayer, int]):
+        self.broadcast('END ' + ' '.join(str(winner) for winner in winners))
+        self.sink.ending(winners, scores)
+
+    @staticmethod
+    def __scores_line(scores: dict[ScopaPlayer, int]) -> str:
+        return 'SCORES ' + ' '.join(f'{player}={score}' for player, score in scores.items())
+
+
+class ScopaServerTable:
+
+    def __init__(self, table_id: int, connections: list[ScopaConnection]):
+        self.table_id = table_id
+        self.connections = connections
+        self.task = None
+
+    def cancel_connections(self):
+        for connection in self.connections:
+            connection.writer.close()
+
+
+class ScopaServer:
+
+    # Hosts many tables in one process. The event loop only does socket I/O and matchmaking; each table's game runs
+    # on its own executor thread, so AI strategies thinking and players waiting on a reply never stall the loop.
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, humans_per_table: int = 1,
+                 opponents: list[str] = None, max_tables: int = 256, move_timeout: float = None,
+                 winning_score: int = 11, hand_size: int = 3, board_size: int = 4, seed: int = None,
+                 event_log: str = None):
+        self.host = host
+        self.port = port
+        self.humans_per_table = humans_per_table
+        self.opponents = [ScopaStrategy.DEFAULT] if opponents is None else list(opponents)
+        if humans_per_table + len(self.opponents) < 2:
+            raise ValueError('Tables need at least 2 players')
+        self.max_tables = max_tables
+        self.move_timeout = move_timeout
+        self.game_options = {'winning_score': winning_score, 'hand_size': hand_size, 'board_size': board_size}
+        self.seed = seed
+        # Every table appends its events to the same JSON-lines file, a hand at a time
+        self.event_log = event_log
+        self.__event_log_file = None
+        self.__event_log_lock = threading.Lock()
+
+        self.active_tables = 0
+        self.completed_tables = 0
+        self.aborted_tables = 0
+        self.table_seconds = 0.0
+
+        self.__server = None
+        self.__executor = None
+        self.__table_slots = None
+        self.__waiting = []
+        self.__tables = set()
+        self.__table_starts = {}
+        self.__table_ids = itertools.count()
+        self.__started = None
+
+    async def start(self):
+        self.__executor = ThreadPoolExecutor(max_workers=self.max_tables, thread_name_prefix='scopa-table')
+        self.__table_slots = asyncio.Semaphore(self.max_tables)
+        self.__started = time.monotonic()
+        if self.event_log is not None:
+            self.__event_log_file = open(self.event_log, 'a', encoding='utf-8')
+        self.__server = await asyncio.start_server(self.__handle_connection, self.host, self.port, backlog=1024)
+        self.port = self.__server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.__server.serve_forever()
+
+    async def close(self):
+        self.__server.close()
+        for connection in self.__waiting:
+            connection.close()
+        self.__waiting.clear()
+        # Closing the sockets ends any game thread waiting on a reply
+        for table in list(self.__tables):
+            table.cancel_connections()
+        await asyncio.gather(*[table.task for table in self.__tables], return_exceptions=True)
+        self.__executor.shutdown(wait=True)
+        if self.__event_log_file is not None:
+            self.__event_log_file.close()
+            self.__event_log_file = None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            'active_tables': self.active_tables,
+            'completed_tables': self.completed_tables,
+            'aborted_tables': self.aborted_tables,
+            'waiting_players': len(self.__waiting),
+            # Table-seconds include the running time of tables still in progress
+            'table_seconds': self.table_seconds + sum(now - start for start in self.__table_starts.values()),
+            'cpu_seconds': time.process_time(),
+            'uptime': now - self.__started,
+        }
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = ScopaConnection(reader, writer, asyncio.get_running_loop())
+        try:
+            command, _, argument = (await connection.read_line()).partition(' ')
+        except ConnectionError:
+            writer.close()
+            return
+
+        if command.upper() == 'STATS':
+            writer.write(('STATS ' + ' '.join(f'{key}={value}' for key, value in self.stats().items()) + '\n').encode())
+            await writer.drain()
+            writer.close()
+            return
+
+        if command.upper() != 'JOIN':
+            writer.write(b'ERROR expected JOIN <name> or STATS\n')
+            await writer.drain()
+            writer.close()
+            return
+
+        # Names are sent space-separated, so they cannot contain whitespace
+        connection.name = '_'.join(argument.split()) or f'player{id(connection)}'
+        self.__waiting.append(connection)
+        connection.watch = asyncio.create_task(self.__watch_waiting(connection))
+        if len(self.__waiting) >= self.humans_per_table:
+            seated = self.__waiting[:self.humans_per_table]
+            del self.__waiting[:self.humans_per_table]
+            for seated_connection in seated:
+                seated_connection.watch.cancel()
+            table = ScopaServerTable(next(self.__table_ids), seated)
+            table.task = asyncio.create_task(self.__run_table(table))
+            self.__tables.add(table)
+
+        await connection.finished.wait()
+        writer.close()
+
+    async def __watch_waiting(self, connection: ScopaConnection):
+        # Reads from a waiting client until it is seated (and this task cancelled), only to notice it hanging up, so
+        # that it is never seated at a table that would abort at once. It has nothing to say before its first MOVES,
+        # so any line it sends meanwhile is dropped.
+        try:
+            while await connection.reader.readline():
+                pass
+        except ConnectionError:
+            pass
+        if connection in self.__waiting:
+            self.__waiting.remove(connection)
+        connection.finished.set()
+
+    # Runs on the game thread, so the players' strategies are only closed once the game no longer uses them, even
+    # if the table was cancelled while it played
+    @staticmethod
+    def __play_table(game: ServerScopaGame, players: list[ScopaPlayer]):
+        try:
+            game.start_game()
+        finally:
+            for player in players:
+                player.close()
+
+    async def __run_table(self, table: ScopaServerTable):
+        # The game thread reads from the same streams, so the waiting watches must have stopped first
+        await asyncio.wait([connection.watch for connection in table.connections])
+        async with self.__table_slots:
+            players = [NetworkScopaPlayer(connection.name, connection, move_timeout=self.move_timeout)
+                       for connection in table.connections]
+            players.extend(ScopaPlayer(f'{strategy}-{seat + 1}', strategy, show_hand=False)
+                           for seat, strategy in enumerate(self.opponents))
+            seed = None if self.seed is None else self.seed + table.table_id
+            sink = None
+            if self.__event_log_file is not None:
+                sink = ScopaJsonLinesEventSink(self.__event_log_file, {'table': table.table_id}, self.__event_log_lock)
+            game = ServerScopaGame(table.table_id, table.connections, players=players, seed=seed, sink=sink,
+                                   **self.game_options)
+
+            self.active_tables += 1
+            self.__table_starts[table.table_id] = time.monotonic()
+            try:
+                await asyncio.get_running_loop().run_in_executor(self.__executor, ScopaServer.__play_table, game,
+                                                                 players)
+                self.completed_tables += 1
+            except (ConnectionError, asyncio.CancelledError, RuntimeError) as error:
+                # RuntimeError covers a game thread whose reply could not be scheduled because the loop is closing
+                game.abort(str(error))
+                self.aborted_tables += 1
+            finally:
+                self.active_tables -= 1
+                self.table_seconds += time.monotonic() - self.__table_starts.pop(table.table_id)
+                self.__tables.discard(table)
+                for connection in table.connections:
+                    connection.finished.set()
+
+
+async def serve(args):
+    server = ScopaServer(args.host, args.port, humans_per_table=args.humans, opponents=args.opponents,
+                         max_tables=args.max_tables, move_timeout=args.move_timeout,
+                         winning_score=args.winning_score, seed=args.seed, event_log=args.event_log)
+    await server.start()
+    print(f'Serving Scopa on {server.host}:{server.port} ({args.humans} human(s) per table, '
+          f'opponents: {", ".join(server.opponents) or "none"})')
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(args):
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--humans', type=int, default=1, help='connected players seated at each table')
+    parser.add_argument('--opponents', nargs='*', default=[ScopaStrategy.DEFAULT],
+                        help='strategies of the AI players added to each table')
+    parser.add_argument('--max-tables', type=int, default=256, help='tables played at once; later joins wait')
+    parser.add_argument('--move-timeout', type=float, help='seconds before a player\'s strategy moves for them')
+    parser.add_argument('--winning-score', type=int, default=11)
+    parser.add_argument('--seed', type=int, help='table n is dealt with seed + n')
+    parser.add_argument('--event-log', help='append every table\'s events to this file as JSON lines')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Host Scopa tables over TCP')
+    add_arguments(parser)
+    main(parser.parse_args())
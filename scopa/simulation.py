@@ -0,0 +1,162 @@
+import argparse
+import time
+from typing import Iterable
+
+from scopa.deals import iter_deals
+from scopa.game.headlessgame import HeadlessScopaGame
+from scopa.player import ScopaPlayer
+from scopa.scoring import ScopaHandScore
+from scopa.strategy import ScopaStrategy
+
+
+class ScopaGameResult:
+
+    def __init__(self, seed: int, final_scores: tuple[int, ...], winners: tuple[int, ...],
+                 hands: list[ScopaHandScore]):
+        self.seed = seed
+        self.final_scores = final_scores
+        self.winners = winners
+        self.hands = hands
+
+    def scopa_counts(self) -> tuple[int, ...]:
+        counts = [0] * len(self.final_scores)
+        for hand in self.hands:
+            for seat, count in hand.scopas.items():
+                counts[seat] += count
+        return tuple(counts)
+
+
+class ScopaSimulationResult:
+
+    def __init__(self, strategies: list[str], keep_games: bool = True):
+        self.strategies = list(strategies)
+        self.games = [] if keep_games else None
+        self.num_games = 0
+        self.num_hands = 0
+        self.elapsed = 0.0
+        num_seats = len(strategies)
+        self.wins = [0] * num_seats
+        self.ties = [0] * num_seats
+        self.total_scores = [0] * num_seats
+        self.category_wins = {category: [0] * num_seats for category in ScopaHandScore.CATEGORIES}
+
+    def add_game(self, game: ScopaGameResult):
+        self.num_games += 1
+        self.num_hands += len(game.hands)
+        if len(game.winners) == 1:
+            self.wins[game.winners[0]] += 1
+        else:
+            for seat in game.winners:
+                self.ties[seat] += 1
+        for seat, score in enumerate(game.final_scores):
+            self.total_scores[seat] += score
+        for hand in game.hands:
+            for category, seat, points in hand.awards():
+                self.category_wins[category][seat] += points
+        if self.games is not None:
+            self.games.append(game)
+
+    def merge(self, other: 'ScopaSimulationResult'):
+        if other.strategies != self.strategies:
+            raise ValueError('Cannot merge simulation results for different strategies')
+        self.num_games += other.num_games
+        self.num_hands += other.num_hands
+        self.elapsed += other.elapsed
+        for seat in range(len(self.strategies)):
+            self.wins[seat] += other.wins[seat]
+            self.ties[seat] += other.ties[seat]
+            self.total_scores[seat] += other.total_scores[seat]
+            for category, seat_wins in self.category_wins.items():
+                seat_wins[seat] += other.category_wins[category][seat]
+        if self.games is not None and other.games is not None:
+            self.games.extend(other.games)
+            self.games.sort(key=lambda game: game.seed)
+
+    def win_rates(self) -> list[float]:
+        return [wins / self.num_games if self.num_games else 0.0 for wins in self.wins]
+
+    def games_per_second(self) -> float:
+        return self.num_games / self.elapsed if self.elapsed else 0.0
+
+
+# With a dataset writer, every decision of the game is appended to it as a row (see scopa.dataset)
+def play_game(strategies: list[str | ScopaStrategy], seed: int, winning_score: int = 11, hand_size: int = 3,
+              board_size: int = 4, batch_deals: bool = False, track_cards: bool = False,
+              dataset: 'ScopaDatasetWriter' = None) -> ScopaGameResult:
+    players = [ScopaPlayer(f'Player {seat + 1}', strategy=strategy, show_hand=False, track_cards=track_cards)
+               for seat, strategy in enumerate(strategies)]
+    seats = {player: seat for seat, player in enumerate(players)}
+
+    # The game rotates its own player list as the dealer changes, so hand it a copy
+    game = HeadlessScopaGame(players=list(players), winning_score=winning_score, hand_size=hand_size,
+                             board_size=board_size, seed=seed, deals=iter_deals(seed) if batch_deals else None)
+    if dataset is not None:
+        # Loaded here so simulations without a dataset do not import numpy
+        from scopa.dataset import ScopaDatasetRecorder
+        ScopaDatasetRecorder(game, dataset).attach()
+    try:
+        winners = game.start_game()
+    finally:
+        for player in players:
+            player.close()
+
+    return ScopaGameResult(seed,
+                           tuple(game.final_scores[player] for player in players),
+                           tuple(sorted(seats[winner] for winner in winners)),
+                           [hand_score.relabel(seats) for hand_score in game.hand_scores])
+
+
+def simulate_seeds(strategies: list[str], seeds: Iterable[int], keep_games: bool = True,
+                   **game_options) -> ScopaSimulationResult:
+    result = ScopaSimulationResult(strategies, keep_games=keep_games)
+    start = time.perf_counter()
+    for seed in seeds:
+        result.add_game(play_game(strategies, seed, **game_options))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def simulate_games(num_games: int, strategies: list[str] = None, seed: int = 0, keep_games: bool = True,
+                   **game_options) -> ScopaSimulationResult:
+    strategies = [ScopaStrategy.DEFAULT, ScopaStrategy.DEFAULT] if strategies is None else strategies
+    if len(strategies) < 2:
+        raise ValueError('Number of players must be greater than or equal to 2')
+    return simulate_seeds(strategies, range(seed, seed + num_games), keep_games=keep_games, **game_options)
+
+
+def main(args):
+    dataset = None
+    if args.dataset:
+        from scopa.dataset import ScopaDatasetWriter
+        dataset = ScopaDatasetWriter(args.dataset)
+    try:
+        result = simulate_games(args.games, args.strategies, seed=args.seed, keep_games=False,
+                                winning_score=args.winning_score, batch_deals=args.batch_deals,
+                                track_cards=args.track_cards, dataset=dataset)
+    finally:
+        if dataset is not None:
+            dataset.close()
+    print(f'Played {result.num_games} games ({result.num_hands} hands) in {result.elapsed:.2f}s '
+          f'({result.games_per_second():.1f} games/sec)')
+    for seat, strategy in enumerate(result.strategies):
+        print(f'Seat {seat + 1} ({strategy}): win rate {result.win_rates()[seat]:.3f} '
+              f'({result.wins[seat]} wins, {result.ties[seat]} ties, {result.total_scores[seat]} points)')
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--strategies', nargs='+', default=[ScopaStrategy.DEFAULT, ScopaStrategy.DEFAULT],
+                        help='one strategy per seat')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--winning-score', type=int, default=11)
+    parser.add_argument('--batch-deals', action='store_true', help='deal from batches of numpy-generated shuffles')
+    parser.add_argument('--track-cards', action='store_true',
+                        help='give every player a card tracker, which their strategy uses to avoid leaving scopas')
+    parser.add_argument('--dataset', metavar='DIR',
+                        help='append every decision to the columnar dataset in this directory (needs numpy)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -1,6 +1,8 @@
-from cards import ScopaCard, ScopaCardSuit, ScopaCardRank, get_prime_points
-from itertools import combinations
+from scopa.cards import ScopaCard, ALL_CARDS, COINS_MASK, RANK_MASKS, CARD_RANKS, SEVEN_OF_COINS, cards_to_mask, \
+    mask_indices, mask_max_prime, mask_to_cards
+from collections import OrderedDict
 from enum import Enum
+import json
 
 
 class ScopaMoveType(Enum):
@@ -10,6 +12,8 @@ class ScopaMoveType(Enum):
 
 class ScopaMove:
 
+    __slots__ = ('__move_type', '__hand_card', '__board_cards', '__masks')
+
     def __init__(self, move_type: ScopaMoveType, hand_card: ScopaCard, board_cards: list[ScopaCard] = None):
         if not hand_card:
             raise ValueError('Hand card cannot be None when making a move')
@@ -19,7 +23,8 @@ class ScopaMove:
             raise ValueError('Board cards cannot be specified if move type is DISCARD')
         self.__move_type = move_type
         self.__hand_card = hand_card
-        self.__board_cards = list(board_cards) if board_cards else None
+        self.__board_cards = tuple(board_cards) if board_cards else None
+        self.__masks = (hand_card.index(), cards_to_mask(board_cards) if board_cards else 0)
 
     def move_type(self) -> ScopaMoveType:
         return self.__move_type
@@ -27,9 +32,19 @@ class ScopaMove:
     def hand_card(self) -> ScopaCard:
         return self.__hand_card
 
-    def board_cards(self) -> list[ScopaCard]:
+    def board_cards(self) -> tuple[ScopaCard, ...]:
         return self.__board_cards
 
+    def masks(self) -> tuple[int, int]:
+        # (hand card index, taken board mask), the form used by get_all_valid_move_masks
+        return self.__masks
+
+    @staticmethod
+    def from_masks(hand_index: int, take_mask: int) -> 'ScopaMove':
+        if take_mask:
+            return ScopaMove(ScopaMoveType.TAKE, ALL_CARDS[hand_index], mask_to_cards(take_mask))
+        return ScopaMove(ScopaMoveType.DISCARD, ALL_CARDS[hand_index])
+
     def __str__(self):
         move_str = f'{self.__move_type.name} {self.__hand_card}'
         if self.__move_type == ScopaMoveType.TAKE:
@@ -37,28 +52,226 @@ class ScopaMove:
         return move_str
 
 
-def get_all_valid_moves(scopa_board: list[ScopaCard], hand: list[ScopaCard]) -> list[ScopaMove]:
+# Discards and single-card takes only depend on the cards involved, so one move of each is built up front and shared
+# (moves are immutable) instead of allocating new move records every turn. Pair takes are indexed by
+# hand card index * 40 + board card index and are None where the ranks differ.
+__DISCARD_MOVES = tuple(ScopaMove(ScopaMoveType.DISCARD, card) for card in ALL_CARDS)
+__PAIR_TAKE_MOVES = tuple(ScopaMove(ScopaMoveType.TAKE, hand_card, [board_card])
+                          if hand_card.rank() == board_card.rank() and hand_card is not board_card else None
+                          for hand_card in ALL_CARDS for board_card in ALL_CARDS)
+
+
+class ScopaMoveCache:
+
+    # Bounded LRU cache of generated moves. Entries are tuples of immutable moves, so callers can never change what
+    # a later lookup returns.
+    def __init__(self, capacity: int = 8192, enabled: bool = True):
+        if capacity < 1:
+            raise ValueError('Move cache capacity must be at least 1')
+        self.__entries = OrderedDict()
+        self.__capacity = capacity
+        self.__enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    def enable(self):
+        self.__enabled = True
+
+    def disable(self):
+        self.__enabled = False
+        self.clear()
+
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def set_capacity(self, capacity: int):
+        if capacity < 1:
+            raise ValueError('Move cache capacity must be at least 1')
+        self.__capacity = capacity
+        while len(self.__entries) > capacity:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key) -> tuple:
+        moves = self.__entries.get(key)
+        if moves is None:
+            self.misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return moves
+
+    def put(self, key, moves: tuple):
+        self.__entries[key] = moves
+        if len(self.__entries) > self.__capacity:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.__entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {'size': len(self.__entries), 'capacity': self.__capacity, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+# Shared cache used by default. Exact positions rarely repeat across ordinary games, so it starts disabled; enable it
+# for workloads that revisit positions, such as rollouts from the same root
+MOVE_CACHE = ScopaMoveCache(enabled=False)
+
+
+# Moves depend on the order of the board and hand (it decides tie breaks between equally scored moves), so the cache
+# key keeps card order rather than sorting it away
+def get_all_valid_moves(scopa_board: list[ScopaCard], hand: list[ScopaCard],
+                        cache: ScopaMoveCache = MOVE_CACHE) -> list[ScopaMove]:
+    if cache is None or not cache.enabled():
+        return __generate_valid_moves(scopa_board, hand)
+
+    key = (tuple(card.index() for card in scopa_board), tuple(card.index() for card in hand))
+    moves = cache.get(key)
+    if moves is None:
+        moves = tuple(__generate_valid_moves(scopa_board, hand))
+        cache.put(key, moves)
+    return list(moves)
+
+
+def __generate_valid_moves(scopa_board: list[ScopaCard], hand: list[ScopaCard]) -> list[ScopaMove]:
     potential_moves = []
-    single_take = set()
+    single_take = 0
 
     for hc in hand:
+        pair_offset = hc.index() * len(ALL_CARDS)
         for bc in scopa_board:
-            if bc.rank() == hc.rank():
-                potential_moves.append(ScopaMove(ScopaMoveType.TAKE, hc, [bc]))
-                single_take.add(hc)
+            move = __PAIR_TAKE_MOVES[pair_offset + bc.index()]
+            if move is not None:
+                potential_moves.append(move)
+                single_take |= hc.bit()
+
+    # Takes of two or more cards need at least two cards on the board
+    if len(scopa_board) > 1:
+        target_ranks = 0
+        for hc in hand:
+            if not single_take & hc.bit():
+                target_ranks |= 1 << CARD_RANKS[hc.index()]
+        if target_ranks:
+            board_combos = __board_combos_by_sum([CARD_RANKS[bc.index()] for bc in scopa_board], target_ranks)
+            for hc in hand:
+                if not single_take & hc.bit():
+                    for combo in board_combos.get(CARD_RANKS[hc.index()], ()):
+                        # The hand card index followed by the taken card indices, 6 bits each (the hand card is never
+                        # an ace, so its index is never 0 and marks where the key starts)
+                        key = hc.index()
+                        for i in combo:
+                            key = (key << 6) | scopa_board[i].index()
+                        potential_moves.append(__combo_take_move(hc, key))
+
+    if not potential_moves:
+        for hc in hand:
+            potential_moves.append(__DISCARD_MOVES[hc.index()])
+
+    return potential_moves
 
-    board_card_combos = []
-    for combo_num in range(2, len(scopa_board) + 1):
-        board_card_combos.extend(tuple(combinations(scopa_board, combo_num)))
 
-    for hc in hand:
-        if hc not in single_take:
-            for combo in board_card_combos:
-                if sum(bc.rank() for bc in combo) == hc.rank():
-                    potential_moves.append(ScopaMove(ScopaMoveType.TAKE, hc, list(combo)))
+# Multi-card takes are shared like the single-card ones, but built on first use: they are keyed by the hand card and
+# the taken cards in board order (the order they are shown and captured in). The cache stops growing once full
+# (2000 two-player games build about 7,000 of them).
+__COMBO_TAKE_MOVES = {}
+__MAX_COMBO_TAKE_MOVES = 1 << 15
+
+
+def __combo_take_move(hc: ScopaCard, key: int) -> ScopaMove:
+    move = __COMBO_TAKE_MOVES.get(key)
+    if move is None:
+        board_cards = []
+        card_indices = key
+        while card_indices >= 64:
+            board_cards.append(ALL_CARDS[card_indices & 63])
+            card_indices >>= 6
+        board_cards.reverse()
+        move = ScopaMove(ScopaMoveType.TAKE, hc, board_cards)
+        if len(__COMBO_TAKE_MOVES) < __MAX_COMBO_TAKE_MOVES:
+            __COMBO_TAKE_MOVES[key] = move
+    return move
+
+
+# Positions of every combination of 2 or more board ranks adding up to each target rank (target_ranks has bit r set
+# for rank r), in the same order as itertools.combinations by increasing size. Ranks are at least 1, so only subsets
+# summing to at most the largest target (10) are ever visited instead of all 2^n combinations. Ranks without any
+# combination are left out, which keeps the common turn with no multi-card take down to a few small allocations.
+def __board_combos_by_sum(board_ranks: list[int], target_ranks: int) -> dict[int, list[tuple[int, ...]]]:
+    combos = {}
+    __extend_board_combos(board_ranks, combos, target_ranks, target_ranks.bit_length() - 1, [], 0, 0)
+    for rank_combos in combos.values():
+        rank_combos.sort(key=len)
+    return combos
+
+
+def __extend_board_combos(board_ranks: list[int], combos: dict[int, list[tuple[int, ...]]], target_ranks: int,
+                          max_target: int, chosen: list[int], start: int, total: int):
+    for i in range(start, len(board_ranks)):
+        combo_sum = total + board_ranks[i]
+        if combo_sum > max_target:
+            continue
+        chosen.append(i)
+        if len(chosen) > 1 and target_ranks >> combo_sum & 1:
+            rank_combos = combos.get(combo_sum)
+            if rank_combos is None:
+                combos[combo_sum] = [tuple(chosen)]
+            else:
+                rank_combos.append(tuple(chosen))
+        if combo_sum < max_target:
+            __extend_board_combos(board_ranks, combos, target_ranks, max_target, chosen, i + 1, combo_sum)
+        chosen.pop()
+
+
+# Mask counterpart of get_all_valid_moves: moves are (hand card index, taken board mask) pairs, with a board mask of 0
+# for a discard. Cards are visited in card index order rather than board/hand order.
+def get_all_valid_move_masks(board_mask: int, hand_mask: int,
+                             cache: ScopaMoveCache = MOVE_CACHE) -> list[tuple[int, int]]:
+    if cache is None or not cache.enabled():
+        return __generate_valid_move_masks(board_mask, hand_mask)
+
+    key = (board_mask, hand_mask)
+    moves = cache.get(key)
+    if moves is None:
+        moves = tuple(__generate_valid_move_masks(board_mask, hand_mask))
+        cache.put(key, moves)
+    return list(moves)
+
+
+def __generate_valid_move_masks(board_mask: int, hand_mask: int) -> list[tuple[int, int]]:
+    potential_moves = []
+    board_indices = mask_indices(board_mask)
+    hand_indices = mask_indices(hand_mask)
+    single_take = 0
+
+    for hi in hand_indices:
+        same_rank = board_mask & RANK_MASKS[CARD_RANKS[hi]]
+        if same_rank:
+            single_take |= 1 << hi
+            for bi in mask_indices(same_rank):
+                potential_moves.append((hi, 1 << bi))
+
+    target_ranks = 0
+    for hi in hand_indices:
+        if not single_take & (1 << hi):
+            target_ranks |= 1 << CARD_RANKS[hi]
+    if target_ranks:
+        board_combos = __board_combos_by_sum([CARD_RANKS[bi] for bi in board_indices], target_ranks)
+        for hi in hand_indices:
+            if not single_take & (1 << hi):
+                for combo in board_combos.get(CARD_RANKS[hi], ()):
+                    potential_moves.append((hi, sum(1 << board_indices[i] for i in combo)))
 
     if not potential_moves:
-        potential_moves = [ScopaMove(ScopaMoveType.DISCARD, hc) for hc in hand]
+        potential_moves = [(hi, 0) for hi in hand_indices]
 
     return potential_moves
 
@@ -66,100 +279,253 @@ def get_all_valid_moves(scopa_board: list[ScopaCard], hand: list[ScopaCard]) ->
 class ScopaStrategy:
 
     DEFAULT = 'DEFAULT'
-    __SUPPORTED_STRATEGIES = {DEFAULT}
-
-    def __init__(self, strategy: str = DEFAULT):
+    ISMCTS = 'ISMCTS'
+    __SUPPORTED_STRATEGIES = {DEFAULT, ISMCTS}
+
+    # Feature row layout per move: cards taken from the board, coins taken, seven of coins taken, highest prime
+    # points taken, scopa
+    __NUM_FEATURES = 5
+    __SEVEN_OF_COINS_BIT = SEVEN_OF_COINS.bit()
+
+    # Move scoring weights, overridable per strategy and saved as weight profiles. DEFAULT weights are also the
+    # fallback for ISMCTS when it has no observation of the game.
+    WEIGHT_NAMES = ('scopa', 'cards', 'coins', 'seven_of_coins', 'highest_primes', 'discard_highest', 'discard_lowest')
+    DEFAULT_WEIGHTS = {
+        'scopa': 2,
+        'cards': 1,
+        'coins': 1,
+        'seven_of_coins': 2,
+        'highest_primes': 2,
+        'discard_highest': 0,
+        'discard_lowest': 0
+    }
+
+    def __init__(self, strategy: str = DEFAULT, iterations: int = 1000, time_budget: float = None, workers: int = 1,
+                 seed: int = None, endgame_solver: bool = False, weights: dict[str, float] = None,
+                 policy_table: 'ScopaPolicyTable' = None):
         if strategy not in ScopaStrategy.__SUPPORTED_STRATEGIES:
             raise ValueError(f'Strategy {strategy} not supported. Must be one of {ScopaStrategy.__SUPPORTED_STRATEGIES}.')
 
-        if strategy == ScopaStrategy.DEFAULT:
-            self.__scopa_weight = 2
-            self.__cards_weight = 1
-            self.__coins_weight = 1
-            self.__seven_of_coins_weight = 2
-            self.__highest_primes_weight = 2
-            self.__discard_highest_weight = 0
-            self.__discard_lowest_weight = 0
-
-    def make_move(self, scopa_board: list[ScopaCard], hand: list[ScopaCard]) -> ScopaMove:
+        weights = {**ScopaStrategy.DEFAULT_WEIGHTS, **({} if weights is None else weights)}
+        if len(weights) != len(ScopaStrategy.WEIGHT_NAMES):
+            unknown = set(weights) - set(ScopaStrategy.WEIGHT_NAMES)
+            raise ValueError(f'Unknown strategy weights {unknown}. Must be among {ScopaStrategy.WEIGHT_NAMES}.')
+        self.__scopa_weight = weights['scopa']
+        self.__cards_weight = weights['cards']
+        self.__coins_weight = weights['coins']
+        self.__seven_of_coins_weight = weights['seven_of_coins']
+        self.__highest_primes_weight = weights['highest_primes']
+        self.__discard_highest_weight = weights['discard_highest']
+        self.__discard_lowest_weight = weights['discard_lowest']
+
+        self.__search = None
+        if strategy == ScopaStrategy.ISMCTS:
+            from scopa.ismcts import ScopaISMCTS
+            self.__search = ScopaISMCTS(iterations=iterations, time_budget=time_budget, workers=workers, seed=seed)
+
+        # Exact search for the decisions left after the last deal
+        self.__endgame = None
+        if endgame_solver:
+            from scopa.endgame import ScopaEndgameSolver
+            self.__endgame = ScopaEndgameSolver(seed=seed)
+
+        # Precomputed moves for full opening positions (see scopa.policytable), only valid for the weights it was
+        # built with and for the plain weighted strategy
+        if policy_table is not None:
+            if self.__search is not None or self.__endgame is not None:
+                raise ValueError('A policy table can only be used by the DEFAULT strategy without the endgame solver')
+            if policy_table.weights != weights:
+                raise ValueError(f'Policy table {policy_table.path} was built for weights {policy_table.weights}')
+        self.__policy_table = policy_table
+
+        self.__strategy = strategy
+        self.__features = []
+        self.__scores = []
+
+    def name(self) -> str:
+        return self.__strategy
+
+    def weights(self) -> dict[str, float]:
+        return {
+            'scopa': self.__scopa_weight,
+            'cards': self.__cards_weight,
+            'coins': self.__coins_weight,
+            'seven_of_coins': self.__seven_of_coins_weight,
+            'highest_primes': self.__highest_primes_weight,
+            'discard_highest': self.__discard_highest_weight,
+            'discard_lowest': self.__discard_lowest_weight
+        }
+
+    def needs_observation(self) -> bool:
+        return self.__search is not None or self.__endgame is not None
+
+    def endgame_stats(self) -> 'ScopaEndgameStats':
+        return None if self.__endgame is None else self.__endgame.stats
+
+    # Stops the worker processes of a parallel ISMCTS search; the strategy can still move afterwards
+    def close(self):
+        if self.__search is not None:
+            self.__search.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def make_move(self, scopa_board: list[ScopaCard], hand: list[ScopaCard],
+                  observation: 'ScopaObservation' = None, tracker: 'ScopaCardTracker' = None) -> ScopaMove:
         if not hand:
             raise ValueError('Cannot make move with empty hand')
 
+        if self.__policy_table is not None and tracker is None:
+            move = self.__policy_table.lookup(scopa_board, hand)
+            if move is not None:
+                return move
+
         potential_moves = get_all_valid_moves(scopa_board, hand)
 
         if len(potential_moves) == 1:
             return potential_moves[0]
 
-        scores = self.__get_move_scores(potential_moves, scopa_board)
-        best_move, _ = max(list(zip(potential_moves, scores)), key=lambda x: x[1])
+        move_masks = None
+        if observation is not None:
+            if self.__endgame is not None and not observation.cards_in_deck:
+                move_masks = self.__endgame.choose_move(observation)
+            elif self.__search is not None:
+                move_masks = self.__search.choose_move(observation)
+        if move_masks is not None:
+            for pm in potential_moves:
+                if pm.masks() == move_masks:
+                    return pm
+
+        if tracker is not None:
+            return potential_moves[self.__tracked_best_move_index(cards_to_mask(scopa_board), len(hand),
+                                                                  [pm.masks() for pm in potential_moves], tracker)]
+        return potential_moves[self.__best_move_index(len(scopa_board), [pm.masks() for pm in potential_moves])]
+
+    def make_mask_move(self, board_mask: int, hand_mask: int) -> tuple[int, int]:
+        if not hand_mask:
+            raise ValueError('Cannot make move with empty hand')
 
-        return best_move
+        potential_moves = get_all_valid_move_masks(board_mask, hand_mask)
 
-    def __get_move_scores(self, potential_moves: list[ScopaMove], board: list[ScopaCard]) -> list[int]:
-        scores = [0] * len(potential_moves)
-        move_type = potential_moves[0].move_type()
+        if len(potential_moves) == 1:
+            return potential_moves[0]
 
-        if move_type == ScopaMoveType.TAKE:
+        return potential_moves[self.__best_move_index(board_mask.bit_count(), potential_moves)]
+
+    def make_mask_moves(self, positions: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        # Best move for each (board mask, hand mask) position, sharing the feature and score buffers
+        return [self.make_mask_move(board_mask, hand_mask) for board_mask, hand_mask in positions]
+
+    def get_move_scores(self, board_mask: int, potential_moves: list[tuple[int, int]]) -> list[int]:
+        self.__score_moves(board_mask.bit_count(), potential_moves)
+        return self.__scores[:len(potential_moves)]
+
+    def __best_move_index(self, board_size: int, potential_moves: list[tuple[int, int]]) -> int:
+        self.__score_moves(board_size, potential_moves)
+        scores = self.__scores
+        best_index = 0
+        for i in range(1, len(potential_moves)):
+            if scores[i] > scores[best_index]:
+                best_index = i
+        return best_index
+
+    def __tracked_best_move_index(self, board_mask: int, hand_size: int, potential_moves: list[tuple[int, int]],
+                                  tracker: 'ScopaCardTracker') -> int:
+        # Each score loses the scopa weight times the chance the next player can sweep the board the move leaves.
+        # They are assumed to hold as many cards as this hand did before moving. A take removes exactly the hand
+        # card's rank from the board total and a discard adds it.
+        self.__score_moves(board_mask.bit_count(), potential_moves)
+        scores = self.__scores
+        board_sum = sum(CARD_RANKS[index] for index in mask_indices(board_mask))
+        scopa_weight = self.__scopa_weight
+        best_index = 0
+        best_score = None
+        for i, (hand_index, take_mask) in enumerate(potential_moves):
+            score = scores[i]
+            if not take_mask:
+                score -= scopa_weight * tracker.capture_probability(board_sum + CARD_RANKS[hand_index], hand_size)
+            elif take_mask != board_mask:
+                score -= scopa_weight * tracker.capture_probability(board_sum - CARD_RANKS[hand_index], hand_size)
+            if best_score is None or score > best_score:
+                best_index = i
+                best_score = score
+        return best_index
+
+    def __score_moves(self, board_size: int, potential_moves: list[tuple[int, int]]):
+        num_moves = len(potential_moves)
+        if len(self.__scores) < num_moves:
+            self.__scores.extend([0] * (num_moves - len(self.__scores)))
+            self.__features.extend([0] * (num_moves * ScopaStrategy.__NUM_FEATURES - len(self.__features)))
+        scores = self.__scores
+        features = self.__features
+
+        if potential_moves[0][1]:
+            # One pass builds the feature rows and the per-feature maxima...
             most_cards = 1
             most_coins = 0
             highest_prime = 0
+            row = 0
+            for hand_index, board_mask in potential_moves:
+                taken_mask = board_mask | (1 << hand_index)
+                num_taken = board_mask.bit_count()
+                num_coins = (taken_mask & COINS_MASK).bit_count()
+                max_prime = mask_max_prime(taken_mask)
+
+                features[row] = num_taken
+                features[row + 1] = num_coins
+                features[row + 2] = (taken_mask & ScopaStrategy.__SEVEN_OF_COINS_BIT) != 0
+                features[row + 3] = max_prime
+                features[row + 4] = num_taken == board_size
+                row += ScopaStrategy.__NUM_FEATURES
+
+                if num_taken > most_cards:
+                    most_cards = num_taken
+                if num_coins > most_coins:
+                    most_coins = num_coins
+                if max_prime > highest_prime:
+                    highest_prime = max_prime
+
+            # ...and the scores are a weighted reduction over those rows
+            row = 0
+            for i in range(num_moves):
+                score = 0
+                if features[row + 4]:
+                    score += self.__scopa_weight
+                if features[row + 2]:
+                    score += self.__seven_of_coins_weight
+                if 1 < most_cards == features[row]:
+                    score += self.__cards_weight
+                if 0 < most_coins == features[row + 1]:
+                    score += self.__coins_weight
+                if highest_prime == features[row + 3]:
+                    score += self.__highest_primes_weight
+                scores[i] = score
+                row += ScopaStrategy.__NUM_FEATURES
 
-            for i, pm in enumerate(potential_moves):
-                cards_to_take = list(pm.board_cards())
-                cards_to_take.append(pm.hand_card())
-
-                if len(pm.board_cards()) == len(board):
-                    scores[i] += self.__scopa_weight
-
-                for c in cards_to_take:
-                    if c.rank() == ScopaCardRank.SEVEN and c.suit() == ScopaCardSuit.COINS:
-                        scores[i] += self.__seven_of_coins_weight
-                        break
-
-                if len(pm.board_cards()) > most_cards:
-                    most_cards = len(pm.board_cards())
-
-                coin_cards = [c for c in cards_to_take if c.suit() == ScopaCardSuit.COINS]
-                if len(coin_cards) > most_coins:
-                    most_coins = len(coin_cards)
-
-                move_highest_prime = max([get_prime_points(c.rank()) for c in cards_to_take])
-                if move_highest_prime > highest_prime:
-                    highest_prime = move_highest_prime
-
-            for i, pm in enumerate(potential_moves):
-                cards_to_take = list(pm.board_cards())
-                cards_to_take.append(pm.hand_card())
-
-                if 1 < most_cards == len(pm.board_cards()):
-                    scores[i] += self.__cards_weight
-
-                coin_cards = [c for c in cards_to_take if c.suit() == ScopaCardSuit.COINS]
-                if 0 < most_coins == len(coin_cards):
-                    scores[i] += self.__coins_weight
-
-                if highest_prime == max([get_prime_points(c.rank()) for c in cards_to_take]):
-                    scores[i] += self.__highest_primes_weight
-
-        elif move_type == ScopaMoveType.DISCARD:
-
-            lowest_rank = potential_moves[0].hand_card().rank()
+        else:
             lowest_rank_idx = 0
-            highest_rank = potential_moves[0].hand_card().rank()
             highest_rank_idx = 0
-            for i, pm in enumerate(potential_moves):
-                if pm.hand_card().rank() < lowest_rank:
-                    lowest_rank = pm.hand_card().rank()
+            for i in range(num_moves):
+                scores[i] = 0
+                rank = CARD_RANKS[potential_moves[i][0]]
+                if rank < CARD_RANKS[potential_moves[lowest_rank_idx][0]]:
                     lowest_rank_idx = i
-
-                if pm.hand_card().rank() > highest_rank:
-                    highest_rank = pm.hand_card().rank()
+                if rank > CARD_RANKS[potential_moves[highest_rank_idx][0]]:
                     highest_rank_idx = i
 
             scores[lowest_rank_idx] += self.__discard_lowest_weight
             scores[highest_rank_idx] += self.__discard_highest_weight
 
-        else:
-            raise ValueError(f'Move type {move_type} not supported')
 
-        return scores
+def load_weights_profile(path: str) -> dict[str, float]:
+    # A weight profile is a JSON object with a "weights" object (see ScopaStrategy.WEIGHT_NAMES) and any metadata
+    with open(path) as profile_file:
+        return json.load(profile_file)['weights']
+
+
+def save_weights_profile(path: str, weights: dict[str, float], **metadata):
+    with open(path, 'w') as profile_file:
+        json.dump({'weights': weights, **metadata}, profile_file, indent=2)
@@ -0,0 +1,191 @@
+from itertools import combinations_with_replacement
+import argparse
+import json
+import os
+import time
+
+from scopa.scoring import ScopaHandScore
+from scopa.simulation import play_game
+from scopa.strategy import ScopaStrategy
+
+
+class ScopaStrategyStats:
+
+    def __init__(self, strategy: str):
+        self.strategy = strategy
+        self.games = 0
+        self.wins = 0
+        self.ties = 0
+        self.total_score = 0
+        self.scopas = 0
+        self.category_wins = {category: 0 for category in ScopaHandScore.CATEGORIES}
+
+    def merge(self, other: 'ScopaStrategyStats'):
+        self.games += other.games
+        self.wins += other.wins
+        self.ties += other.ties
+        self.total_score += other.total_score
+        self.scopas += other.scopas
+        for category, wins in other.category_wins.items():
+            self.category_wins[category] += wins
+
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'strategy': self.strategy,
+            'games': self.games,
+            'wins': self.wins,
+            'ties': self.ties,
+            'win_rate': self.win_rate(),
+            'average_score': self.total_score / self.games if self.games else 0.0,
+            'category_wins': dict(self.category_wins),
+        }
+
+
+class ScopaTournamentResult:
+
+    def __init__(self):
+        self.matchups = {}
+        self.num_games = 0
+        self.elapsed = 0.0
+
+    def merge_shard(self, matchup: tuple[str, ...], num_games: int, shard_stats: dict[str, ScopaStrategyStats]):
+        self.num_games += num_games
+        matchup_stats = self.matchups.setdefault(matchup, {})
+        for strategy, stats in shard_stats.items():
+            matchup_stats.setdefault(strategy, ScopaStrategyStats(strategy)).merge(stats)
+
+    def overall(self) -> dict[str, ScopaStrategyStats]:
+        totals = {}
+        for matchup_stats in self.matchups.values():
+            for strategy, stats in matchup_stats.items():
+                totals.setdefault(strategy, ScopaStrategyStats(strategy)).merge(stats)
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            'games': self.num_games,
+            'elapsed': self.elapsed,
+            'overall': [stats.to_dict() for stats in self.overall().values()],
+            'matchups': [{'strategies': list(matchup), 'stats': [stats.to_dict() for stats in matchup_stats.values()]}
+                         for matchup, matchup_stats in self.matchups.items()],
+        }
+
+
+def get_matchups(strategies: list[str], player_counts: list[int]) -> list[tuple[str, ...]]:
+    matchups = []
+    for player_count in player_counts:
+        if player_count < 2:
+            raise ValueError('Number of players must be greater than or equal to 2')
+        matchups.extend(combinations_with_replacement(strategies, player_count))
+    return matchups
+
+
+def play_shard(matchup: tuple[str, ...], seed_start: int, seed_stop: int,
+               game_options: dict = None) -> dict[str, ScopaStrategyStats]:
+    game_options = {} if game_options is None else game_options
+    shard_stats = {strategy: ScopaStrategyStats(strategy) for strategy in matchup}
+    num_seats = len(matchup)
+
+    for seed in range(seed_start, seed_stop):
+        # Rotate seating with the seed so no strategy always gets the first-player tie breaks
+        rotation = seed % num_seats
+        seated = matchup[rotation:] + matchup[:rotation]
+        game = play_game(list(seated), seed, **game_options)
+
+        for seat, strategy in enumerate(seated):
+            stats = shard_stats[strategy]
+            stats.games += 1
+            stats.total_score += game.final_scores[seat]
+            if seat in game.winners:
+                if len(game.winners) == 1:
+                    stats.wins += 1
+                else:
+                    stats.ties += 1
+        for hand in game.hands:
+            for category, seat, points in hand.awards():
+                if category == ScopaHandScore.SCOPA:
+                    shard_stats[seated[seat]].scopas += points
+                shard_stats[seated[seat]].category_wins[category] += points
+
+    return shard_stats
+
+
+def run_tournament(strategies: list[str], player_counts: list[int], num_games: int, seed: int = 0,
+                   workers: int = None, shard_size: int = 250, **game_options) -> ScopaTournamentResult:
+    shards = []
+    for matchup in get_matchups(strategies, player_counts):
+        for shard_start in range(seed, seed + num_games, shard_size):
+            shards.append((matchup, shard_start, min(shard_start + shard_size, seed + num_games)))
+
+    # A dataset writer appends to one file per column, so only a single process may write to it
+    if game_options.get('dataset') is not None and workers != 1:
+        raise ValueError('Tournaments can only write a dataset with a single worker')
+
+    result = ScopaTournamentResult()
+    start = time.perf_counter()
+    if workers == 1:
+        for matchup, shard_start, shard_stop in shards:
+            shard_stats = play_shard(matchup, shard_start, shard_stop, game_options)
+            result.merge_shard(matchup, shard_stop - shard_start, shard_stats)
+    else:
+        # Loaded here so shard workers and single-process runs do not pay for importing multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_shard, matchup, shard_start, shard_stop, game_options)
+                       for matchup, shard_start, shard_stop in shards]
+            # Shards are merged in submission order; counts are plain sums, so the totals do not depend on the
+            # number of workers or on which worker finished first
+            for (matchup, shard_start, shard_stop), future in zip(shards, futures):
+                result.merge_shard(matchup, shard_stop - shard_start, future.result())
+    result.elapsed = time.perf_counter() - start
+
+    return result
+
+
+def main(args):
+    dataset = None
+    if args.dataset:
+        from scopa.dataset import ScopaDatasetWriter
+        dataset = ScopaDatasetWriter(args.dataset)
+    try:
+        result = run_tournament(args.strategies, args.players, args.games, seed=args.seed,
+                                workers=1 if dataset is not None else args.workers, shard_size=args.shard_size,
+                                dataset=dataset)
+    finally:
+        if dataset is not None:
+            dataset.close()
+
+    print(f'Played {result.num_games} games in {result.elapsed:.2f}s '
+          f'({result.num_games / result.elapsed if result.elapsed else 0.0:.1f} games/sec)')
+    for matchup, matchup_stats in result.matchups.items():
+        print(f'{" vs ".join(matchup)}:')
+        for stats in matchup_stats.values():
+            categories = ', '.join(f'{category}: {wins}' for category, wins in stats.category_wins.items())
+            print(f'  {stats.strategy}: win rate {stats.win_rate():.3f} ({stats.wins} wins, {stats.ties} ties) '
+                  f'{categories}')
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(result.to_dict(), json_file, indent=2)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--strategies', nargs='+', default=[ScopaStrategy.DEFAULT])
+    parser.add_argument('--players', nargs='+', type=int, default=[2])
+    parser.add_argument('--games', type=int, default=1000, help='games per matchup')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--shard-size', type=int, default=250)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--dataset', metavar='DIR',
+                        help='append every decision to the columnar dataset in this directory (needs numpy; games '
+                             'are then played in a single process)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,59 @@
+from scopa.cards import ALL_CARDS, CARD_RANKS, FULL_DECK_MASK, ScopaCard, ScopaCardRank, mask_indices
+
+
+class ScopaCardTracker:
+
+    __slots__ = ('unseen_mask', 'num_unseen', 'rank_counts')
+
+    # What one player has seen of the current hand: the board deals, their own cards and every card played. Anything
+    # else is unseen, i.e. in an opponent's hand or still in the deck. ScopaGame and ScopaPlayer feed it one card at a
+    # time, and every update is O(1). rank_counts is indexed by rank (index 0 is unused).
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.unseen_mask = FULL_DECK_MASK
+        self.num_unseen = len(ALL_CARDS)
+        self.rank_counts = [0] + [len(ALL_CARDS) // len(ScopaCardRank)] * len(ScopaCardRank)
+
+    def see_card(self, card: ScopaCard):
+        bit = card.bit()
+        if self.unseen_mask & bit:
+            self.unseen_mask ^= bit
+            self.num_unseen -= 1
+            self.rank_counts[card.rank()] -= 1
+
+    def see_cards(self, cards: list[ScopaCard]):
+        for card in cards:
+            self.see_card(card)
+
+    def is_unseen(self, card: ScopaCard) -> bool:
+        return bool(self.unseen_mask & card.bit())
+
+    def remaining(self, rank: int) -> int:
+        return self.rank_counts[rank]
+
+    def holding_probability(self, card: ScopaCard, hand_size: int) -> float:
+        # Chance that an opponent holding hand_size unknown cards has this one, e.g. the seven of coins
+        if not self.unseen_mask & card.bit():
+            return 0.0
+        return min(hand_size / self.num_unseen, 1.0)
+
+    def capture_probability(self, board_sum: int, hand_size: int) -> float:
+        # Chance that an opponent holding hand_size cards drawn from the unseen ones has a card of rank board_sum, and
+        # so can take a board whose ranks add up to it (hypergeometric: one minus the chance of drawing none)
+        if not 1 <= board_sum <= ScopaCardRank.KING:
+            return 0.0
+        missing = self.num_unseen - self.rank_counts[board_sum]
+        none_drawn = 1.0
+        for drawn in range(min(hand_size, self.num_unseen)):
+            none_drawn *= (missing - drawn) / (self.num_unseen - drawn)
+            if none_drawn <= 0.0:
+                return 1.0
+        return 1.0 - none_drawn
+
+    def scopa_probability(self, board_mask: int, hand_size: int) -> float:
+        # Chance that the next opponent can sweep this board
+        if not board_mask:
+            return 0.0
+        return self.capture_probability(sum(CARD_RANKS[index] for index in mask_indices(board_mask)), hand_size)
@@ -0,0 +1,200 @@
+import argparse
+import os
+import random
+import time
+
+from scopa.simulation import play_game
+from scopa.strategy import ScopaStrategy, load_weights_profile, save_weights_profile
+
+
+class ScopaCandidateStats:
+
+    def __init__(self, weights: dict[str, float]):
+        self.weights = weights
+        self.games = 0
+        self.wins = 0
+        self.margin = 0
+
+    def add(self, games: int, wins: int, margin: int):
+        self.games += games
+        self.wins += wins
+        self.margin += margin
+
+    def fitness(self) -> float:
+        # Mean final score margin over the opponent; far less noisy than the win rate for the same number of games
+        return self.margin / self.games if self.games else 0.0
+
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    def to_dict(self) -> dict:
+        return {'weights': self.weights, 'games': self.games, 'wins': self.wins, 'win_rate': self.win_rate(),
+                'fitness': self.fitness()}
+
+
+class ScopaTuningResult:
+
+    def __init__(self, opponent_weights: dict[str, float]):
+        self.opponent_weights = opponent_weights
+        self.generations = []
+        self.best = None
+        self.elapsed = 0.0
+        self.num_games = 0
+
+    def to_dict(self) -> dict:
+        return {'opponent_weights': self.opponent_weights, 'generations': self.generations,
+                'best': None if self.best is None else self.best.to_dict(), 'elapsed': self.elapsed,
+                'num_games': self.num_games}
+
+
+def evaluate_weights(weights: dict[str, float], opponent_weights: dict[str, float], seed_start: int, seed_stop: int,
+                     game_options: dict = None) -> tuple[int, int, int]:
+    # Plays each seed twice with the seats swapped, so both players get the same deals from both seats; returns
+    # (games, wins, total final score margin) for weights
+    game_options = {} if game_options is None else game_options
+    candidate = ScopaStrategy(weights=weights)
+    opponent = ScopaStrategy(weights=opponent_weights)
+    games = wins = margin = 0
+    for seed in range(seed_start, seed_stop):
+        for seat, seated in enumerate(((candidate, opponent), (opponent, candidate))):
+            game = play_game(list(seated), seed, **game_options)
+            games += 1
+            margin += game.final_scores[seat] - game.final_scores[1 - seat]
+            if game.winners == (seat,):
+                wins += 1
+    return games, wins, margin
+
+
+def evaluate_candidates(candidates: list[dict[str, float]], opponent_weights: dict[str, float], seed_start: int,
+                        num_seeds: int, executor=None, shard_size: int = 125,
+                        game_options: dict = None) -> list[ScopaCandidateStats]:
+    # Every candidate plays the same seeds (common random numbers), so differences between candidates come from
+    # their weights rather than from their deals
+    stats = [ScopaCandidateStats(weights) for weights in candidates]
+    shards = [(index, shard_start, min(shard_start + shard_size, seed_start + num_seeds))
+              for index in range(len(candidates))
+              for shard_start in range(seed_start, seed_start + num_seeds, shard_size)]
+    if executor is None:
+        for index, shard_start, shard_stop in shards:
+            stats[index].add(*evaluate_weights(candidates[index], opponent_weights, shard_start, shard_stop,
+                                               game_options))
+    else:
+        futures = [(index, executor.submit(evaluate_weights, candidates[index], opponent_weights, shard_start,
+                                           shard_stop, game_options))
+                   for index, shard_start, shard_stop in shards]
+        for index, future in futures:
+            stats[index].add(*future.result())
+    return stats
+
+
+def run_tuning(generations: int = 10, population: int = 16, elite: int = 4, games_per_candidate: int = 2000,
+               initial_std: float = 1.0, min_std: float = 0.05, smoothing: float = 0.7,
+               start_weights: dict[str, float] = None, opponent_weights: dict[str, float] = None,
+               validation_games: int = 4000, seed: int = 0, workers: int = None, shard_size: int = 125,
+               progress=print, **game_options) -> ScopaTuningResult:
+    # Cross-entropy method: sample a population of weight vectors from independent normals, evaluate them all on
+    # the same games against a fixed opponent, and move each weight's mean and deviation towards the elite. The
+    # final mean and the best candidate seen are then replayed on seeds no generation used and the better is kept.
+    names = ScopaStrategy.WEIGHT_NAMES
+    opponent_weights = dict(ScopaStrategy.DEFAULT_WEIGHTS) if opponent_weights is None else opponent_weights
+    start_weights = opponent_weights if start_weights is None else start_weights
+    mean = [float(start_weights.get(name, ScopaStrategy.DEFAULT_WEIGHTS[name])) for name in names]
+    std = [initial_std] * len(names)
+    rng = random.Random(seed)
+    seeds_per_candidate = max(games_per_candidate // 2, 1)
+
+    result = ScopaTuningResult(opponent_weights)
+    start = time.perf_counter()
+    executor = None
+    if workers is None or workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        best = None
+        for generation in range(generations):
+            candidates = [dict(zip(names, mean))]
+            while len(candidates) < population:
+                candidates.append({name: round(rng.gauss(mu, sigma), 3) for name, mu, sigma in zip(names, mean, std)})
+            generation_seed = seed + generation * seeds_per_candidate
+            stats = evaluate_candidates(candidates, opponent_weights, generation_seed, seeds_per_candidate, executor,
+                                        shard_size, game_options)
+            result.num_games += sum(candidate.games for candidate in stats)
+
+            stats.sort(key=lambda candidate: candidate.fitness(), reverse=True)
+            if best is None or stats[0].fitness() > best.fitness():
+                best = stats[0]
+            elites = stats[:elite]
+            for i, name in enumerate(names):
+                values = [candidate.weights[name] for candidate in elites]
+                elite_mean = sum(values) / len(values)
+                elite_std = (sum((value - elite_mean) ** 2 for value in values) / len(values)) ** 0.5
+                mean[i] = smoothing * elite_mean + (1 - smoothing) * mean[i]
+                std[i] = max(smoothing * elite_std + (1 - smoothing) * std[i], min_std)
+
+            result.generations.append({'generation': generation, 'best': stats[0].to_dict(),
+                                       'elite_fitness': sum(candidate.fitness() for candidate in elites) / len(elites),
+                                       'mean': dict(zip(names, mean)), 'std': dict(zip(names, std))})
+            if progress:
+                progress(f'Generation {generation + 1}/{generations}: best margin {stats[0].fitness():+.3f} '
+                         f'(win rate {stats[0].win_rate():.3f}), elite margin '
+                         f'{result.generations[-1]["elite_fitness"]:+.3f}, mean std {sum(std) / len(std):.3f}')
+
+        finalists = [{name: round(value, 3) for name, value in zip(names, mean)}]
+        if best is not None:
+            finalists.append(best.weights)
+        validation_seed = seed + generations * seeds_per_candidate
+        validated = evaluate_candidates(finalists, opponent_weights, validation_seed, max(validation_games // 2, 1),
+                                        executor, shard_size, game_options)
+        result.num_games += sum(candidate.games for candidate in validated)
+        result.best = max(validated, key=lambda candidate: candidate.fitness())
+        if progress:
+            progress(f'Validation over {result.best.games} games: margin {result.best.fitness():+.3f}, '
+                     f'win rate {result.best.win_rate():.3f}')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def main(args):
+    opponent_weights = load_weights_profile(args.opponent_profile) if args.opponent_profile else None
+    start_weights = load_weights_profile(args.start_profile) if args.start_profile else None
+    result = run_tuning(generations=args.generations, population=args.population, elite=args.elite,
+                        games_per_candidate=args.games, initial_std=args.initial_std, min_std=args.min_std,
+                        start_weights=start_weights, opponent_weights=opponent_weights,
+                        validation_games=args.validation_games, seed=args.seed, workers=args.workers,
+                        shard_size=args.shard_size, winning_score=args.winning_score)
+
+    print(f'Played {result.num_games} games in {result.elapsed:.2f}s '
+          f'({result.num_games / result.elapsed if result.elapsed else 0.0:.1f} games/sec)')
+    print(f'Best weights: {result.best.weights}')
+    save_weights_profile(args.output, result.best.weights, fitness=result.best.fitness(),
+                         win_rate=result.best.win_rate(), validation_games=result.best.games,
+                         opponent_weights=result.opponent_weights, generations=result.generations)
+    print(f'Wrote {args.output}')
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--population', type=int, default=16, help='weight vectors evaluated per generation')
+    parser.add_argument('--elite', type=int, default=4, help='best candidates the next generation is fitted to')
+    parser.add_argument('--games', type=int, default=2000, help='games per candidate per generation')
+    parser.add_argument('--initial-std', type=float, default=1.0)
+    parser.add_argument('--min-std', type=float, default=0.05)
+    parser.add_argument('--validation-games', type=int, default=4000)
+    parser.add_argument('--start-profile', help='weight profile to start the search from')
+    parser.add_argument('--opponent-profile', help='weight profile of the fixed opponent (defaults to DEFAULT)')
+    parser.add_argument('--winning-score', type=int, default=11)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--shard-size', type=int, default=125, help='seeds per task sent to a worker')
+    parser.add_argument('--output', default='tuned_profile.json', help='where to write the best weight profile')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,27 @@
+from scopa.comparison import ScopaComparisonStats, ScopaSequentialTest, run_comparison
+from scopa.strategy import ScopaStrategy
+
+
+def test_identical_pair_scores_are_negligible():
+    # Every pair scoring exactly 0.5 has no variance at all, which must still end the test
+    stats = ScopaComparisonStats()
+    stats.pairs = 200
+    stats.score_sum = 100.0
+    stats.score_square_sum = 50.0
+    assert stats.score_variance() == 0.0
+    assert ScopaSequentialTest().status(stats) == ScopaSequentialTest.NEGLIGIBLE
+
+
+def test_lopsided_pair_scores_are_significant():
+    stats = ScopaComparisonStats()
+    stats.pairs = 200
+    stats.score_sum = 200.0
+    stats.score_square_sum = 200.0
+    assert ScopaSequentialTest().status(stats) == ScopaSequentialTest.BETTER
+
+
+def test_same_strategy_stops_as_negligible():
+    result = run_comparison(ScopaStrategy(), ScopaStrategy(), max_games=4000, workers=1)
+    assert result.status == ScopaSequentialTest.NEGLIGIBLE
+    assert result.stats.games < 4000
+    assert result.stats.score() == 0.5
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from scopa.dataset import ScopaDatasetWriter, open_dataset
+from scopa.simulation import simulate_games
+from scopa.tournament import run_tournament
+
+
+def test_simulation_writes_every_decision(tmp_path):
+    with ScopaDatasetWriter(str(tmp_path)) as dataset:
+        simulate_games(3, seed=0, winning_score=1, dataset=dataset)
+    columns = open_dataset(str(tmp_path))
+    assert len(columns['turn']) > 0
+    assert set(columns['game_seed']) == {0, 1, 2}
+
+
+def test_tournament_needs_a_single_worker_for_a_dataset(tmp_path):
+    with ScopaDatasetWriter(str(tmp_path)) as dataset:
+        with pytest.raises(ValueError):
+            run_tournament(['DEFAULT'], [2], 2, workers=2, dataset=dataset)
+        run_tournament(['DEFAULT'], [2], 2, workers=1, winning_score=1, dataset=dataset)
+    assert len(open_dataset(str(tmp_path))['turn']) > 0
+
+
+def test_interrupted_write_is_refused(tmp_path):
+    with ScopaDatasetWriter(str(tmp_path)) as dataset:
+        simulate_games(1, seed=0, winning_score=1, dataset=dataset)
+    # As if the run stopped after appending some of the columns of its last rows
+    with open(os.path.join(str(tmp_path), 'game_seed.bin'), 'ab') as column_file:
+        column_file.write(bytes(8))
+    with pytest.raises(ValueError):
+        open_dataset(str(tmp_path))
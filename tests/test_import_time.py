@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Modules that short-lived processes import, with the slowest acceptable import in milliseconds (the scopa modules
+# alone; interpreter startup is not counted). SCOPA_IMPORT_BUDGET_SCALE multiplies every budget on slower machines.
+IMPORT_BUDGETS_MS = {
+    'scopa.__main__': 25.0,
+    'scopa.simulation': 60.0,
+    'scopa.tournament': 60.0,
+    'scopa.game.headlessgame': 50.0,
+}
+BUDGET_SCALE = float(os.environ.get('SCOPA_IMPORT_BUDGET_SCALE', '1.0'))
+REPEATS = 3
+
+# Heavy or optional modules that none of the above may import
+FORBIDDEN_MODULES = ('tkinter', 'numpy', 'multiprocessing')
+
+
+def measure_import(module: str) -> tuple[float, set[str]]:
+    # Cumulative import time of module in a fresh interpreter, in milliseconds, and every module it imported
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True)
+    elapsed = None
+    imported = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            elapsed = int(cumulative) / 1000
+    return elapsed, imported
+
+
+@pytest.mark.parametrize('module', IMPORT_BUDGETS_MS)
+def test_import_skips_heavy_modules(module):
+    _, imported = measure_import(module)
+    assert sorted(name for name in imported if name.split('.')[0] in FORBIDDEN_MODULES) == []
+
+
+@pytest.mark.parametrize('module', IMPORT_BUDGETS_MS)
+def test_import_within_budget(module):
+    # Best of several fresh interpreters; the first also warms the bytecode cache
+    elapsed = min(measure_import(module)[0] for _ in range(REPEATS))
+    assert elapsed <= IMPORT_BUDGETS_MS[module] * BUDGET_SCALE
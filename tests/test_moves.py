@@ -0,0 +1,77 @@
+from itertools import combinations
+import random
+
+import pytest
+
+from scopa.cards import ALL_CARDS, ScopaCard, ScopaCardRank, ScopaCardSuit, cards_to_mask
+from scopa.strategy import ScopaMoveCache, ScopaMoveType, get_all_valid_move_masks, get_all_valid_moves
+
+
+def reference_moves(scopa_board: list[ScopaCard], hand: list[ScopaCard]) -> list[tuple]:
+    # The original generator: every combination of 2 or more board cards, by size, checked against every hand card
+    # that cannot take a single card of its own rank
+    moves = []
+    single_take = set()
+    for hc in hand:
+        for bc in scopa_board:
+            if bc.rank() == hc.rank():
+                moves.append((ScopaMoveType.TAKE, hc, (bc,)))
+                single_take.add(hc)
+
+    board_combos = []
+    for combo_size in range(2, len(scopa_board) + 1):
+        board_combos.extend(combinations(scopa_board, combo_size))
+    for hc in hand:
+        if hc not in single_take:
+            for combo in board_combos:
+                if sum(bc.rank() for bc in combo) == hc.rank():
+                    moves.append((ScopaMoveType.TAKE, hc, combo))
+
+    if not moves:
+        moves = [(ScopaMoveType.DISCARD, hc, None) for hc in hand]
+    return moves
+
+
+def as_tuples(moves) -> list[tuple]:
+    return [(move.move_type(), move.hand_card(), move.board_cards()) for move in moves]
+
+
+def random_positions(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        board_size = rng.randint(0, 10)
+        hand_size = rng.randint(1, 3)
+        cards = rng.sample(ALL_CARDS, board_size + hand_size)
+        yield cards[:board_size], cards[board_size:]
+
+
+@pytest.mark.parametrize('cache', [None, ScopaMoveCache(capacity=64)])
+def test_moves_match_reference_in_order(cache):
+    for scopa_board, hand in random_positions(3000):
+        assert as_tuples(get_all_valid_moves(tuple(scopa_board), tuple(hand), cache=cache)) == \
+            reference_moves(scopa_board, hand)
+
+
+def test_move_masks_match_reference():
+    for scopa_board, hand in random_positions(3000, seed=1):
+        expected = sorted((hc.index(), cards_to_mask(board_cards) if board_cards else 0)
+                          for _, hc, board_cards in reference_moves(scopa_board, hand))
+        assert sorted(get_all_valid_move_masks(cards_to_mask(scopa_board), cards_to_mask(hand), cache=None)) == \
+            expected
+
+
+def test_single_card_take_excludes_sums():
+    # A seven on the board must be taken alone even though 3 + 4 also make seven
+    seven = ScopaCard(ScopaCardRank.SEVEN, ScopaCardSuit.CUPS)
+    scopa_board = (ScopaCard(ScopaCardRank.THREE, ScopaCardSuit.COINS),
+                   ScopaCard(ScopaCardRank.FOUR, ScopaCardSuit.CUPS),
+                   ScopaCard(ScopaCardRank.SEVEN, ScopaCardSuit.SWORDS))
+    moves = as_tuples(get_all_valid_moves(scopa_board, (seven,), cache=None))
+    assert moves == [(ScopaMoveType.TAKE, seven, (scopa_board[2],))]
+
+
+def test_discards_when_nothing_can_be_taken():
+    scopa_board = (ScopaCard(ScopaCardRank.KING, ScopaCardSuit.COINS),)
+    hand = (ScopaCard(ScopaCardRank.ACE, ScopaCardSuit.CUPS), ScopaCard(ScopaCardRank.TWO, ScopaCardSuit.CLUBS))
+    assert as_tuples(get_all_valid_moves(scopa_board, hand, cache=None)) == \
+        [(ScopaMoveType.DISCARD, card, None) for card in hand]
@@ -0,0 +1,22 @@
+import multiprocessing
+
+from scopa.simulation import play_game
+from scopa.strategy import ScopaStrategy
+
+
+def test_close_stops_parallel_search_workers():
+    with ScopaStrategy(ScopaStrategy.ISMCTS, iterations=20, workers=2, seed=0) as strategy:
+        play_game([strategy, ScopaStrategy.DEFAULT], seed=0, winning_score=1)
+        assert multiprocessing.active_children()
+    assert not multiprocessing.active_children()
+
+
+def test_play_game_leaves_strategies_it_was_handed_open():
+    strategy = ScopaStrategy(ScopaStrategy.ISMCTS, iterations=20, workers=2, seed=0)
+    try:
+        play_game([strategy, ScopaStrategy.DEFAULT], seed=0, winning_score=1)
+        # play_game closes its players, which must leave a strategy it was handed running
+        assert multiprocessing.active_children()
+    finally:
+        strategy.close()
+    assert not multiprocessing.active_children()